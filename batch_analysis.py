@@ -0,0 +1,106 @@
+import atexit
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# Worker count defaults to one per core; override with BATCH_WORKERS
+DEFAULT_WORKERS = int(os.environ.get("BATCH_WORKERS", "0")) or os.cpu_count() or 1
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "10000"))
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+# Per-process advisor, created by _init_worker inside each pool worker
+_worker_advisor = None
+
+
+def _init_worker():
+    """Give each worker process its own Prolog engine and team_rules.pl consult"""
+    global _worker_advisor
+    # Workers are spawned, never forked, so warming up here starts a fresh
+    # SWI-Prolog engine in this process instead of sharing the parent's
+    import inference_system
+    inference_system.warm_up()
+    _worker_advisor = inference_system.PokemonTeamAdvisor()
+
+
+def _analyze_one(team_data, parts=None):
+    """Analyze a single team inside a worker, reporting errors per team"""
+    if not isinstance(team_data, list) or len(team_data) == 0:
+        return {'status': 'error', 'message': 'No Pokemon provided'}
+    try:
+        # Members sent by name only are filled in the same way /api/analyze fills them
+        team_data = _worker_advisor.complete_team_data(team_data)
+        return {'status': 'success', 'analysis': _worker_advisor.analyze_team(team_data, parts)}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
+def get_executor(max_workers=None):
+    """Return (the shared worker pool, its worker count), creating the pool on first use"""
+    global _executor, _executor_workers
+    workers = max_workers or DEFAULT_WORKERS
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            log.debug("Starting batch analysis pool with %d workers", workers)
+            _executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker)
+            _executor_workers = workers
+        return _executor, _executor_workers
+
+
+def shutdown_pool():
+    """Stop the worker pool (called automatically at exit)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+atexit.register(shutdown_pool)
+
+
+def analyze_teams(teams, max_workers=None, parts=None):
+    """Analyze many teams in parallel; results are returned in input order
+
+    parts limits each analysis to some sections (see PokemonTeamAdvisor.analyze_team).
+    """
+    if len(teams) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch of {len(teams)} teams exceeds the limit of {MAX_BATCH_SIZE}")
+    if not teams:
+        return []
+
+    executor, workers = get_executor(max_workers)
+    # A few chunks per worker keeps IPC overhead low without starving the tail
+    chunksize = max(1, len(teams) // (workers * 4))
+    return list(executor.map(functools.partial(_analyze_one, parts=parts), teams, chunksize=chunksize))
+
+
+if __name__ == '__main__':
+    # python batch_analysis.py teams.json results.json [workers]
+    import json
+    import time
+    if len(sys.argv) < 3:
+        print("Usage: python batch_analysis.py teams.json results.json [workers]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        teams = json.load(f)
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    start = time.perf_counter()
+    results = analyze_teams(teams, workers)
+    elapsed = time.perf_counter() - start
+    with open(sys.argv[2], 'w', encoding='utf-8') as f:
+        json.dump(results, f)
+    failed = sum(1 for r in results if r['status'] != 'success')
+    print(f"✓ Analyzed {len(results)} teams in {elapsed:.2f}s ({failed} errors)")
@@ -0,0 +1,195 @@
+"""Microbenchmarks for the analysis pipeline
+
+    python benchmark.py                 # time every stage, compare to the baseline
+    python benchmark.py --save          # time every stage and write a new baseline
+    python benchmark.py --threshold 0.5 # allow 50% slowdown before failing
+    python benchmark.py --responses     # /api/analyze payload size and encode time, full vs fields=
+
+Teams are drawn (seeded) from the static species in team_rules.pl, so runs are
+repeatable and never touch the network. Exits with status 1 when any stage is
+slower than its baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ["POKEMON_OFFLINE"] = "1"
+
+import inference_system
+import responses
+import rule_engine
+import species_cache
+import species_table
+import team_completion
+from static_species import load_static_species
+
+DEFAULT_BASELINE = os.path.join(species_cache.DATA_DIR, "benchmark_baseline.json")
+# /api/complete target: two members given, four slots filled from this many candidates, under a second
+COMPLETION_MEMBERS = 2
+COMPLETION_CANDIDATES = 100
+COMPLETION_TARGET_SECONDS = 1.0
+
+
+def synthetic_teams(count, seed=0):
+    """count teams of 1-6 distinct static species, in the shape the frontend sends"""
+    species = sorted((s for s in load_static_species().values() if s['types'] and s['stats']),
+                     key=lambda s: s['name'])
+    rng = random.Random(seed)
+    teams = []
+    for _ in range(count):
+        members = rng.sample(species, rng.randint(1, min(6, len(species))))
+        teams.append([{'name': m['name'], 'types': list(m['types']), 'stats': dict(m['stats'])}
+                      for m in members])
+    return teams
+
+
+def time_stage(func, teams, repeat):
+    """Median over `repeat` passes of the mean seconds per team"""
+    passes = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for team in teams:
+            func(team)
+        passes.append((time.perf_counter() - start) / len(teams))
+    return statistics.median(passes)
+
+
+def stages(advisor):
+    """name -> callable(team); the Prolog stages only when SWI-Prolog loaded"""
+    result = {
+        'propositional_analysis': advisor.propositional_analysis,
+        'role_planning': advisor.role_planning,
+        'calculate_weaknesses': advisor.calculate_weaknesses,
+        'fallback_recommendations': advisor.fallback_recommendations,
+        'native_recommendations': rule_engine.recommend,
+        'ranked_recommendations': rule_engine.rank,
+    }
+    completion_pool = team_completion.build_candidates(
+        species_table.synthetic_species(COMPLETION_CANDIDATES).values())
+    # Teams of one member leave five slots, so those passes are the harder case
+    result['complete_team_2_of_6'] = lambda team: team_completion.complete_team(
+        team[:COMPLETION_MEMBERS], completion_pool, k=5)
+    if inference_system.PROLOG_AVAILABLE:
+        pool = inference_system.PROLOG_POOL
+
+        def add_team(team):
+            with pool.checkout() as context:
+                advisor.add_team_to_prolog(team, context)
+
+        result['add_team_to_prolog'] = add_team
+        result['add_team_per_fact'] = add_team_per_fact
+        result['prolog_recommendations'] = advisor.prolog_recommendations
+    return result
+
+
+def add_team_per_fact(team):
+    """The loader load_team/1 replaced: three retractalls and one assertz per fact
+
+    Kept as a stage so add_team_to_prolog is always measured against it.
+    """
+    normalize_name = inference_system.normalize_pokemon_name
+    normalize_term = inference_system.normalize_type_name
+    with inference_system.PROLOG_POOL.checkout() as context:
+        for pattern in ("current_pokemon(_)", "has_type(_, _)", "base_stat(_, _, _)"):
+            inference_system.safe_prolog_retractall(pattern, context)
+        for pokemon in team:
+            name = normalize_name(pokemon['name'])
+            inference_system.safe_prolog_assert(f"current_pokemon({name})", context)
+            for stat, value in pokemon['stats'].items():
+                inference_system.safe_prolog_assert(f"base_stat({name}, '{normalize_term(stat)}', {value})", context)
+            for t in pokemon['types']:
+                inference_system.safe_prolog_assert(f"has_type({name}, {normalize_term(t)})", context)
+
+
+def run(teams, repeat):
+    advisor = inference_system.PokemonTeamAdvisor()
+    results = {}
+    for name, func in stages(advisor).items():
+        func(teams[0])  # warm caches (tabling, lazy imports) outside the timed passes
+        results[name] = time_stage(func, teams, repeat)
+    return results
+
+
+def response_report(teams, repeat):
+    """Analysis time, encode time and body bytes for full responses and recommendation-only ones"""
+    advisor = inference_system.PokemonTeamAdvisor()
+    print(f"{'response':<18}{'analyze us':>12}{'json us':>10}{'orjson us':>11}"
+          f"{'bytes':>9}{'gzip':>8}{'br':>8}")
+    for label, parts in (('full', None), ('recommendations', ('logic_programming',))):
+        advisor.analyze_team(teams[0], parts)
+        analyze = time_stage(lambda team: advisor.analyze_team(team, parts), teams, repeat)
+        payloads = [{'status': 'success', 'analysis': advisor.analyze_team(team, parts)} for team in teams]
+        if parts is None:
+            for payload in payloads:
+                payload['knowledge_representation_used'] = inference_system.kr_methods_used()
+        sizes = responses.measure(payloads, repeat)
+        print(f"{label:<18}{analyze * 1e6:>12.1f}{sizes['json_encode_us']:>10.1f}"
+              f"{sizes.get('orjson_encode_us', float('nan')):>11.1f}{sizes['identity_bytes']:>9.0f}"
+              f"{sizes['gzip_bytes']:>8.0f}{sizes.get('br_bytes', float('nan')):>8.0f}")
+
+
+def compare(results, baseline, threshold):
+    """Print each stage against the baseline; return the names that regressed"""
+    regressions = []
+    print(f"{'stage':<28}{'us/team':>12}{'baseline':>12}{'change':>10}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        line = f"{name:<28}{seconds * 1e6:>12.1f}"
+        if base:
+            change = seconds / base - 1
+            line += f"{base * 1e6:>12.1f}{change:>+10.1%}"
+            if change > threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the analysis pipeline stages")
+    parser.add_argument('--teams', type=int, default=200, help="synthetic teams per pass")
+    parser.add_argument('--repeat', type=int, default=5, help="timed passes per stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument('--save', action='store_true', help="write these results as the new baseline")
+    parser.add_argument('--responses', action='store_true',
+                        help="report response size and encode time instead of stage timings")
+    args = parser.parse_args(argv)
+
+    inference_system.init_prolog()
+    teams = synthetic_teams(args.teams, args.seed)
+    if args.responses:
+        response_report(teams, args.repeat)
+        return 0
+    results = run(teams, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('stages', {})
+    regressions = compare(results, baseline, args.threshold)
+    completion = results['complete_team_2_of_6']
+    if completion > COMPLETION_TARGET_SECONDS:
+        print(f"✗ complete_team_2_of_6 took {completion:.2f}s, over the {COMPLETION_TARGET_SECONDS:.0f}s target")
+        regressions.append('complete_team_2_of_6')
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'teams': args.teams, 'seed': args.seed, 'stages': results}, f, indent=2)
+        print(f"✓ Baseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"✗ {len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+import json
+import time
+
+import type_chart
+from static_species import STAT_ORDER
+
+BUNDLE_FORMAT = 1
+
+
+def type_chart_dict():
+    """{attacking type: {defending type: multiplier}} for non-neutral matchups (types.js' typeDictionary)"""
+    chart = {}
+    for a, attack in enumerate(type_chart.TYPES):
+        row = {}
+        for d, defense in enumerate(type_chart.TYPES):
+            mult = float(type_chart.CHART[a, d])
+            if mult != 1:
+                row[defense] = int(mult) if mult.is_integer() else mult
+        chart[attack] = row
+    return chart
+
+
+class Bundle:
+    """One encoded bootstrap payload: JSON bytes, their gzip, and the ETag naming them"""
+    __slots__ = ('version', 'etag', 'body', 'gzipped', 'built_at', 'name_count', 'species_count')
+
+    def __init__(self, species):
+        """species: {pokeapi slug: {'types': [...], 'stats': {...}} or None for name-only entries}"""
+        names = sorted(species)
+        compact = {}
+        for name in names:
+            data = species[name]
+            if data and data.get('types'):
+                stats = data.get('stats') or {}
+                compact[name] = [list(data['types']), [stats.get(stat, 0) for stat in STAT_ORDER]]
+
+        content = {
+            'format': BUNDLE_FORMAT,
+            'types': list(type_chart.TYPES),
+            'type_chart': type_chart_dict(),
+            'stat_order': list(STAT_ORDER),
+            'names': names,
+            'species': compact
+        }
+        canonical = json.dumps(content, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        # Content-addressed: the same data always gets the same version and ETag
+        self.version = hashlib.sha256(canonical).hexdigest()[:16]
+        content['version'] = self.version
+        self.body = json.dumps(content, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        # mtime=0 keeps the compressed bytes identical across rebuilds
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = f'"{self.version}"'
+        self.built_at = time.time()
+        self.name_count = len(names)
+        self.species_count = len(compact)
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'names': self.name_count,
+            'species': self.species_count,
+            'bytes': len(self.body),
+            'gzip_bytes': len(self.gzipped),
+            'built_at': self.built_at
+        }
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value names this ETag (or is '*')"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # Weak comparison: W/"v" matches "v"
+    return '*' in candidates or etag in (c[2:] if c.startswith('W/') else c for c in candidates)
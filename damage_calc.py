@@ -0,0 +1,254 @@
+import numpy as np
+
+import type_chart
+from move_data import (ABILITY_IMMUNITIES, ABILITY_STAT_BOOSTS, ADAPTABILITY, ATTACK_WITH_DEFENSE,
+                       EVIOLITE, EXPERT_BELT, ITEM_DAMAGE, ITEM_STAT_BOOSTS, MOVES, NATURES, SPECIAL,
+                       SPECIAL_VS_DEFENSE, STATS, TECHNICIAN, TYPE_BOOST_ITEMS, to_id)
+from static_species import STAT_ORDER
+
+LEVEL = 100
+MAX_MOVES = 4
+MIN_ROLL = 0.85  # damage rolls run from 85% to 100%
+_HP, _ATK, _DEF, _SPA, _SPD, _SPE = range(6)
+_STAT_COLUMN = {stat: i for i, stat in enumerate(STATS)}
+
+# Team members are sent without sets: a balanced spread unless the payload carries 'evs'/'nature'
+DEFAULT_EVS = {stat: 84 for stat in STATS}
+DEFAULT_NATURE = 'serious'
+# ...and without moves: one STAB attack of this power from their better attacking stat
+ASSUMED_STAB_POWER = 90
+
+# Threat score weights
+W_OHKO = 2.0      # per member the set OHKOs
+W_2HKO = 1.0      # per member it 2HKOs but does not OHKO
+W_ANSWER = 1.5    # per member that 2HKOs it back without being OHKO'd
+W_DAMAGE = 1.0    # times the mean share of a member's HP its best hit takes
+
+
+def _first(value):
+    """Smogon lists alternatives for a slot; the first is the main option"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def nature_multipliers(nature):
+    """(6,) stat multipliers for a nature name (unknown natures are neutral)"""
+    mult = np.ones(len(STATS))
+    up, down = NATURES.get(to_id(nature or ''), (None, None))
+    if up:
+        mult[_STAT_COLUMN[up]] = 1.1
+        mult[_STAT_COLUMN[down]] = 0.9
+    return mult
+
+
+def compute_stats(base, evs, ivs, natures):
+    """Level 100 stats for (N, 6) base stats, EVs, IVs and nature multipliers"""
+    core = np.floor((2 * base + ivs + np.floor(evs / 4)) * LEVEL / 100)
+    stats = np.floor((core + 5) * natures)
+    stats[:, _HP] = core[:, _HP] + LEVEL + 10
+    return stats
+
+
+def base_damage(power, attack, defense):
+    """The level/power/stat part of the damage formula, before modifiers; arrays broadcast"""
+    level_factor = np.floor(2 * LEVEL / 5 + 2)
+    raw = np.floor(np.floor(np.floor(level_factor * power * attack / defense) / 50) + 2)
+    return np.where(power > 0, raw, 0)
+
+
+def _spread(values, default):
+    values = values if isinstance(values, dict) else {}
+    return [values.get(stat, default) for stat in STATS]
+
+
+class MetaSets:
+    """Every Smogon set of a format as arrays, built once per data version
+
+    Row s is one set; move columns are padded to MAX_MOVES with power 0. Sets
+    whose species has no known base stats are skipped (counted in .skipped).
+    """
+
+    def __init__(self, smogon_sets, species_lookup):
+        labels, items, abilities, natures, move_names = [], [], [], [], []
+        base, evs, ivs, nature_mult, pairs = [], [], [], [], []
+        self.skipped = 0
+        for species in sorted(smogon_sets):
+            data = species_lookup(species)
+            pair = type_chart.type_pair(data.get('types', [])) if data else None
+            if pair is None or not data.get('stats'):
+                self.skipped += len(smogon_sets[species])
+                continue
+            for set_name, set_data in smogon_sets[species].items():
+                labels.append((species, set_name))
+                items.append(_first(set_data.get('item')))
+                abilities.append(_first(set_data.get('ability')))
+                natures.append(_first(set_data.get('nature')))
+                move_names.append([_first(m) for m in set_data.get('moves', [])][:MAX_MOVES])
+                base.append([data['stats'].get(stat, 0) for stat in STAT_ORDER])
+                evs.append(_spread(_first(set_data.get('evs')), 0))
+                ivs.append(_spread(_first(set_data.get('ivs')), 31))
+                nature_mult.append(nature_multipliers(natures[-1]))
+                pairs.append(pair)
+
+        count = len(labels)
+        self.labels = labels
+        self.items = items
+        self.abilities = abilities
+        self.natures = natures
+        self.move_names = move_names
+        self.pairs = np.asarray(pairs, dtype=np.intp).reshape(count, 2)
+        shape = (count, len(STATS))
+        self.stats = compute_stats(np.asarray(base, dtype=float).reshape(shape),
+                                   np.asarray(evs, dtype=float).reshape(shape),
+                                   np.asarray(ivs, dtype=float).reshape(shape),
+                                   np.asarray(nature_mult, dtype=float).reshape(shape))
+
+        # Stats as they stand in battle, after item and ability multipliers
+        self.battle_stats = self.stats.copy()
+        self.profiles = type_chart.DUAL_PROFILES[self.pairs[:, 0], self.pairs[:, 1]].astype(float)
+        item_ids = [to_id(i or '') for i in items]
+        ability_ids = [to_id(a or '') for a in abilities]
+        for s, (item, ability) in enumerate(zip(item_ids, ability_ids)):
+            for boost in (ITEM_STAT_BOOSTS.get(item), ABILITY_STAT_BOOSTS.get(ability)):
+                if boost:
+                    stat, mult = boost
+                    column = _STAT_COLUMN[stat]
+                    self.battle_stats[s, column] = np.floor(self.battle_stats[s, column] * mult)
+            if item == EVIOLITE:
+                self.battle_stats[s, [_DEF, _SPD]] = np.floor(self.battle_stats[s, [_DEF, _SPD]] * 1.5)
+            for t in ABILITY_IMMUNITIES.get(ability, ()):
+                self.profiles[s, type_chart.TYPE_INDEX[t]] = 0
+
+        # One row per set, one column per move slot
+        moves = (count, MAX_MOVES)
+        self.power = np.zeros(moves)
+        self.move_type = np.zeros(moves, dtype=np.intp)
+        self.attack = np.ones(moves)
+        self.defense_column = np.full(moves, _DEF, dtype=np.intp)
+        self.modifier = np.ones(moves)
+        self.expert_belt = np.array([item == EXPERT_BELT for item in item_ids], dtype=bool)
+        for s, names in enumerate(move_names):
+            stab_types = set(self.pairs[s])
+            for m, name in enumerate(names):
+                move_id = to_id(name or '')
+                if move_id not in MOVES:
+                    continue  # status or unlisted move
+                move_type, category, power = MOVES[move_id]
+                t = type_chart.TYPE_INDEX[move_type]
+                if ability_ids[s] == TECHNICIAN and power <= 60:
+                    power *= 1.5
+                self.power[s, m] = power
+                self.move_type[s, m] = t
+                if move_id in ATTACK_WITH_DEFENSE:
+                    self.attack[s, m] = self.battle_stats[s, _DEF]
+                else:
+                    self.attack[s, m] = self.battle_stats[s, _SPA if category == SPECIAL else _ATK]
+                special_target = category == SPECIAL and move_id not in SPECIAL_VS_DEFENSE
+                self.defense_column[s, m] = _SPD if special_target else _DEF
+                modifier = ITEM_DAMAGE.get(item_ids[s], 1.0)
+                if TYPE_BOOST_ITEMS.get(item_ids[s]) == move_type:
+                    modifier *= 1.2
+                if t in stab_types:
+                    modifier *= 2.0 if ability_ids[s] == ADAPTABILITY else 1.5
+                self.modifier[s, m] = modifier
+
+    def __len__(self):
+        return len(self.labels)
+
+
+class TeamArrays:
+    """The team members with known types and stats, as arrays"""
+
+    def __init__(self, team_data):
+        members = [m for m in team_data
+                   if type_chart.type_pair(m.get('types', [])) is not None and m.get('stats')]
+        count = len(members)
+        self.names = [m['name'] for m in members]
+        self.pairs = np.asarray([type_chart.type_pair(m['types']) for m in members],
+                                dtype=np.intp).reshape(count, 2)
+        shape = (count, len(STATS))
+        base = np.asarray([[m['stats'].get(stat, 0) for stat in STAT_ORDER] for m in members],
+                          dtype=float).reshape(shape)
+        evs = np.asarray([_spread(m.get('evs') or DEFAULT_EVS, 0) for m in members], dtype=float).reshape(shape)
+        ivs = np.full(shape, 31.0)
+        natures = np.asarray([nature_multipliers(m.get('nature') or DEFAULT_NATURE) for m in members],
+                             dtype=float).reshape(shape)
+        self.stats = compute_stats(base, evs, ivs, natures)
+        self.profiles = type_chart.DUAL_PROFILES[self.pairs[:, 0], self.pairs[:, 1]].astype(float)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def threat_matrix(meta, team):
+    """Damage between every meta set and every team member, in a few array operations
+
+    Returns (S, M) arrays: 'max'/'min' share of the member's HP the set's best move
+    takes at the top/bottom damage roll, 'move' the move slot that does it, and
+    'answer' the bottom-roll share of the set's HP the member's assumed STAB takes.
+    """
+    # Sets attacking members: (sets, move slots, members)
+    effectiveness = team.profiles[:, meta.move_type].transpose(1, 2, 0)
+    defense = team.stats.T[meta.defense_column]
+    raw = base_damage(meta.power[:, :, None], meta.attack[:, :, None], defense)
+    modifier = meta.modifier[:, :, None] * effectiveness
+    modifier = np.where(meta.expert_belt[:, None, None] & (effectiveness > 1), modifier * 1.2, modifier)
+    damage = np.floor(raw * modifier)
+    best_move = damage.argmax(axis=1)
+    best = damage.max(axis=1)
+    hp = team.stats[:, _HP][None, :]
+
+    # Members attacking sets with one STAB move each of their types: (sets, members, 2)
+    special = team.stats[:, _SPA] > team.stats[:, _ATK]
+    attack = np.where(special, team.stats[:, _SPA], team.stats[:, _ATK])
+    set_defense = np.where(special[None, :], meta.battle_stats[:, [_SPD]], meta.battle_stats[:, [_DEF]])
+    answer_raw = base_damage(ASSUMED_STAB_POWER, attack[None, :], set_defense)
+    answer_effectiveness = meta.profiles[:, team.pairs].max(axis=2)
+    answer = np.floor(np.floor(answer_raw * 1.5 * answer_effectiveness) * MIN_ROLL)
+
+    return {
+        'max': best / hp,
+        'min': np.floor(best * MIN_ROLL) / hp,
+        'move': best_move,
+        'answer': answer / meta.stats[:, [_HP]]
+    }
+
+
+def rank_threats(meta, team, k=10):
+    """The k meta sets this team handles worst, most threatening first"""
+    if not len(meta) or not len(team):
+        return []
+    matrix = threat_matrix(meta, team)
+    ohko = matrix['min'] >= 1
+    twohko = (matrix['min'] >= 0.5) & ~ohko
+    answered = (matrix['answer'] >= 0.5) & ~ohko
+    score = (W_OHKO * ohko.sum(axis=1) + W_2HKO * twohko.sum(axis=1)
+             - W_ANSWER * answered.sum(axis=1) + W_DAMAGE * np.minimum(matrix['max'], 1).mean(axis=1))
+    order = np.argsort(-score, kind='stable')[:k]
+
+    threats = []
+    for s in order.tolist():
+        species, set_name = meta.labels[s]
+        damage = {}
+        for m, member in enumerate(team.names):
+            slot = int(matrix['move'][s, m])
+            moves = meta.move_names[s]
+            damage[member] = {
+                'move': moves[slot] if meta.power[s, slot] > 0 else None,
+                'percent': [round(100 * float(matrix['min'][s, m]), 1), round(100 * float(matrix['max'][s, m]), 1)]
+            }
+        threats.append({
+            'pokemon': species,
+            'set': set_name,
+            'item': meta.items[s],
+            'ability': meta.abilities[s],
+            'nature': meta.natures[s],
+            'moves': meta.move_names[s],
+            'score': round(float(score[s]), 3),
+            'ohko': [team.names[m] for m in np.flatnonzero(ohko[s])],
+            '2hko': [team.names[m] for m in np.flatnonzero(twohko[s])],
+            'answered_by': [team.names[m] for m in np.flatnonzero(answered[s])],
+            'damage': damage
+        })
+    return threats
@@ -1,21 +1,79 @@
-from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
-import requests
 import json
+import logging
 import os
 import sys
 import subprocess
+import threading
+import time
 
-app = Flask(__name__, static_folder='.')
-CORS(app)
+_IMPORT_STARTED = time.perf_counter()
 
-# Try to import Prolog, but have a fallback
+# Flask, requests and the NumPy-backed modules cost ~250 ms to import, so the
+# functions that use them import them there and importing this file stays fast
+import metrics
+import prolog_pool
+import result_cache
+import rule_engine
+import suggest
+from static_species import RULES_PATH, load_static_species
+
+# Per-request detail (team dumps, Prolog debug queries) is logged at DEBUG; LOG_LEVEL=DEBUG turns it on
+log = logging.getLogger("inference_system")
+log.setLevel(os.environ.get("LOG_LEVEL", "WARNING").upper())
+
+# Exposed at GET /metrics
+STAGE_SECONDS = metrics.Histogram(
+    'analyze_stage_seconds', 'Time spent in each stage of PokemonTeamAdvisor.analyze_team', ['stage'])
+ANALYZE_SECONDS = metrics.Histogram(
+    'analyze_request_seconds', 'Time to answer POST /api/analyze', ['cache'])
+SUGGEST_SECONDS = metrics.Histogram(
+    'suggest_lookup_seconds', 'Time to look up GET /api/suggest matches',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01))
+INDEX_REFRESH_SECONDS = metrics.Histogram(
+    'index_refresh_seconds', 'Time to rebuild the species table and derived indexes in the background',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10))
+RECOMMENDATIONS = metrics.Counter(
+    'recommendations_total', 'Recommendation lists served, by the path that produced them', ['source'])
+
+# 'python' answers recommendations with rule_engine (the native mirror of team_rules.pl)
+# even when SWI-Prolog is installed; 'auto' uses Prolog when it loaded, rule_engine otherwise
+RULE_ENGINE = os.environ.get("RULE_ENGINE", "auto").lower()
+
+# Prolog state, filled in by init_prolog() during warm-up
 PROLOG_AVAILABLE = False
 prolog = None
+PROLOG_POOL = None
+
+# Smogon data: snapshot on disk, conditional refresh in the background (see get_smogon_loader)
+SMOGON_LOADER = None
+_smogon_loader_lock = threading.Lock()
+# Other formats, loaded on first request and evicted under a memory budget (see get_format_loader)
+SMOGON_FORMATS = None
+_smogon_formats_lock = threading.Lock()
+
+# Shared species store: LRU in memory, JSON snapshot on disk (see get_species_cache)
+SPECIES_CACHE = None
+_species_cache_lock = threading.Lock()
+
+# Finished /api/analyze payloads keyed by team fingerprint (see get_analysis_cache)
+ANALYSIS_CACHE = None
+_analysis_cache_lock = threading.Lock()
+
+# Incremental team sessions (see get_session_store)
+SESSION_STORE = None
+SESSION_CONTEXTS = None
+_session_store_lock = threading.Lock()
+
+# Readiness gate: requests that arrive during warm-up use the fallback path,
+# or wait up to READY_WAIT_SECONDS for warm-up to finish first
+READY_WAIT_SECONDS = float(os.environ.get("READY_WAIT_SECONDS", "0"))
+_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+_shared_warm = False
+_shared_warm_lock = threading.Lock()
+STARTUP_TIMINGS = {}
 
-print("=" * 60)
-print("Attempting to load Prolog...")
-print("=" * 60)
 
 def test_swipl_installation():
     """Test if SWI-Prolog is properly installed and accessible"""
@@ -35,76 +93,377 @@ def test_swipl_installation():
         print(f"✗ Error checking SWI-Prolog: {e}")
         return False
 
-# First check if SWI-Prolog is installed
-swipl_ok = test_swipl_installation()
 
-if swipl_ok:
+def _start_prolog():
+    """Import PySwip, consult team_rules.pl and build the context pool: (engine, pool), or Nones
+
+    Runs on the Prolog owner thread (prolog_pool.on_engine_thread), which then
+    makes every later PySwip call as well.
+    """
+    engine = None
+    pool = None
     try:
         from pyswip import Prolog
         print("✓ PySwip module imported")
         
         # Wrap Prolog initialization in try-catch
         try:
-            prolog = Prolog()
+            engine = Prolog()
             print("✓ Prolog engine initialized")
             
-            # Try to consult the file
-            if os.path.exists("team_rules.pl"):
-                # Use a simpler consult approach
-                prolog.consult("team_rules.pl")
+            rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "team_rules.pl")
+            if os.path.exists(rules_path):
+                engine.consult(rules_path.replace("\\", "/"))
                 
                 # Test with a simple query to make sure it's working
-                test_result = list(prolog.query("important_coverage_type(X)"))
+                test_result = list(engine.query("important_coverage_type(X)"))
                 if len(test_result) > 0:
-                    PROLOG_AVAILABLE = True
                     print("✓ Prolog knowledge base loaded and tested successfully!")
+                    # Isolated team contexts so concurrent requests never share Prolog facts
+                    pool = prolog_pool.PrologEnginePool(engine)
+                    print(f"✓ Prolog engine pool ready ({pool.size} contexts)")
                 else:
                     print("✗ Prolog loaded but queries not working")
-                    prolog = None
             else:
                 print("✗ team_rules.pl not found")
-                prolog = None
         except Exception as prolog_error:
             print(f"✗ Prolog engine error: {prolog_error}")
             print("  Falling back to non-Prolog mode")
-            prolog = None
-            PROLOG_AVAILABLE = False
     except ImportError:
         print("✗ PySwip not installed")
         print("  Running in fallback mode (without Prolog recommendations)")
-        PROLOG_AVAILABLE = False
     except Exception as e:
         print(f"✗ Prolog initialization failed: {e}")
         print("  Running in fallback mode (without Prolog recommendations)")
-        PROLOG_AVAILABLE = False
-else:
-    print("  Skipping PySwip since SWI-Prolog is not available")
-    PROLOG_AVAILABLE = False
+    return (engine, pool) if pool is not None else (None, None)
+
+
+def init_prolog():
+    """Start SWI-Prolog, consult team_rules.pl and build the context pool"""
+    global prolog, PROLOG_POOL, PROLOG_AVAILABLE
+    
+    print("=" * 60)
+    print("Attempting to load Prolog...")
+    print("=" * 60)
+    
+    engine = None
+    pool = None
+    
+    # First check if SWI-Prolog is installed
+    if test_swipl_installation():
+        engine, pool = prolog_pool.on_engine_thread(_start_prolog)
+    else:
+        print("  Skipping PySwip since SWI-Prolog is not available")
+    
+    print("=" * 60)
+    
+    # Publish the pool before the flag so a request never sees one without the other
+    if pool is not None:
+        prolog = engine
+        PROLOG_POOL = pool
+        PROLOG_AVAILABLE = True
+    return PROLOG_AVAILABLE
+
+
+def lookup_cached_species(name):
+    """Species data from the cache or the static table, never from the network"""
+    data = get_species_cache().peek(name)
+    if data is None:
+        data = load_static_species().get(normalize_pokemon_name(name))
+    return data
+
+
+def get_smogon_loader():
+    """Shared Smogon loader (empty until load_smogon_data() has run)"""
+    global SMOGON_LOADER
+    import smogon_loader
+    if SMOGON_LOADER is None:
+        with _smogon_loader_lock:
+            if SMOGON_LOADER is None:
+                SMOGON_LOADER = smogon_loader.SmogonDataLoader(
+                    species_lookup=lookup_cached_species, species_version=lambda: get_species_cache().version)
+    return SMOGON_LOADER
+
+
+def get_smogon_formats():
+    """Shared smogon_loader.SmogonFormats with the default loader pinned"""
+    global SMOGON_FORMATS
+    import smogon_loader
+    if SMOGON_FORMATS is None:
+        with _smogon_formats_lock:
+            if SMOGON_FORMATS is None:
+                SMOGON_FORMATS = smogon_loader.SmogonFormats(
+                    get_smogon_loader(),
+                    lambda fmt: smogon_loader.SmogonDataLoader(
+                        format_id=fmt, species_lookup=lookup_cached_species,
+                        species_version=lambda: get_species_cache().version))
+    return SMOGON_FORMATS
+
+
+def get_format_loader(format_id=None):
+    """Loaded Smogon data for a format (None = default); raises smogon_loader.UnknownFormat"""
+    if not format_id:
+        return get_smogon_loader()
+    return get_smogon_formats().get(format_id)
+
+
+def load_smogon_data(background_refresh=True):
+    """Load the default format's Smogon data from the local snapshot, refreshing it if upstream changed"""
+    loader = get_smogon_loader()
+    if not loader.load_smogon_data():
+        print("  Continuing without Smogon filtering")
+    if background_refresh:
+        loader.start_background_refresh()
+
+
+def get_species_cache():
+    """Shared species cache, created (and its snapshot loaded) on first use"""
+    global SPECIES_CACHE
+    import species_cache
+    if SPECIES_CACHE is None:
+        with _species_cache_lock:
+            if SPECIES_CACHE is None:
+                SPECIES_CACHE = species_cache.SpeciesCache()
+    return SPECIES_CACHE
+
+
+def uses_prolog():
+    """True when recommendations come from SWI-Prolog rather than rule_engine"""
+    return RULE_ENGINE != 'python' and PROLOG_AVAILABLE and prolog is not None
+
 
-print("=" * 60)
+def analysis_generation():
+    """Changes whenever a cached analysis could be stale: rules edited, the indexes it reads rebuilt, Prolog came up
 
-# Load Smogon data
-SMOGON_DATA = {}
-VIABLE_POKEMON = set()
+    Keyed on the data versions those indexes were built from rather than the
+    live loader and cache versions: until refresh_indexes() rebuilds them,
+    analyses still come from the old ones, so cached results stay valid.
+    """
+    return (os.path.getmtime(RULES_PATH),
+            _species_table_key,
+            _recommendation_pool_key,
+            _species_index_key,
+            _meta_sets_key,
+            PROLOG_AVAILABLE)
 
-def load_smogon_data():
-    """Load Smogon Gen9 OU data on startup"""
-    global SMOGON_DATA, VIABLE_POKEMON
+
+def get_analysis_cache():
+    """Shared order-insensitive cache of analysis results"""
+    global ANALYSIS_CACHE
+    if ANALYSIS_CACHE is None:
+        with _analysis_cache_lock:
+            if ANALYSIS_CACHE is None:
+                ANALYSIS_CACHE = result_cache.AnalysisCache(analysis_generation)
+    return ANALYSIS_CACHE
+
+
+def get_session_store():
+    """Shared session store; sessions give back their Prolog contexts when they expire"""
+    global SESSION_STORE
+    import team_sessions
+    if SESSION_STORE is None:
+        with _session_store_lock:
+            if SESSION_STORE is None:
+                SESSION_STORE = team_sessions.SessionStore(release_context=release_session_context)
+    return SESSION_STORE
+
+
+def acquire_session_context():
+    """A dedicated Prolog context for a session, or None when recommendations don't use Prolog"""
+    global SESSION_CONTEXTS
+    if not uses_prolog():
+        return None
+    with _session_store_lock:
+        if SESSION_CONTEXTS is None:
+            SESSION_CONTEXTS = prolog_pool.SessionContexts(prolog)
+    return SESSION_CONTEXTS.acquire()
+
+
+def release_session_context(context):
+    if SESSION_CONTEXTS is not None:
+        SESSION_CONTEXTS.release(context)
+
+
+def _timed_stage(stage, step):
+    started = time.perf_counter()
+    step()
+    STARTUP_TIMINGS[stage] = round(time.perf_counter() - started, 4)
+
+
+# Indexes derived from the species and Smogon data are built by warm_shared() and
+# afterwards rebuilt off the request path: a getter whose key is stale returns the
+# index it has and asks for a refresh, and refresh_indexes() rebuilds everything on
+# one background thread INDEX_REFRESH_DELAY seconds later, so a burst of species
+# inserts costs one rebuild rather than one per request
+INDEX_REFRESH_DELAY = float(os.environ.get("INDEX_REFRESH_DELAY", "2"))
+_index_refresh = None  # pending threading.Timer
+_index_refresh_lock = threading.Lock()
+_index_builder = threading.local()
+
+
+def _reset_index_refresh():
+    # A pending timer does not survive fork
+    global _index_refresh, _index_refresh_lock
+    _index_refresh = None
+    _index_refresh_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_index_refresh)
+
+
+def warm_up_pending():
+    """True from start_warm_up() until warm-up finishes"""
+    return _warm_up_thread is not None and not _ready.is_set()
+
+
+def _defer_build(current):
+    """True when a getter with nothing built yet should return None and leave the build to warm-up
+
+    Requests arriving during warm-up take the fallback path instead of building
+    the table and pools themselves.
+    """
+    return current is None and warm_up_pending() and not getattr(_index_builder, 'active', False)
+
+
+def _serve_stale(current):
+    """True when a getter should return current as is and leave the rebuild to refresh_indexes()"""
+    if current is None or getattr(_index_builder, 'active', False):
+        return False
+    request_index_refresh()
+    return True
+
+
+def request_index_refresh():
+    """Schedule one refresh_indexes() on a background thread unless one is already pending"""
+    global _index_refresh
+    with _index_refresh_lock:
+        if _index_refresh is not None:
+            return
+        _index_refresh = threading.Timer(INDEX_REFRESH_DELAY, refresh_indexes)
+        _index_refresh.name = "index-refresh"
+        _index_refresh.daemon = True
+        _index_refresh.start()
+
+
+def refresh_indexes():
+    """Rebuild the species table and every index whose data changed, on the calling thread"""
+    global _index_refresh
+    with _index_refresh_lock:
+        # Changes from here on schedule another refresh
+        _index_refresh = None
+    _index_builder.active = True
+    started = time.perf_counter()
     try:
-        print("Loading Smogon Gen9 OU data...")
-        response = requests.get("https://pkmn.github.io/smogon/data/sets/gen9ou.json", timeout=10)
-        if response.status_code == 200:
-            SMOGON_DATA = response.json()
-            VIABLE_POKEMON = set(SMOGON_DATA.keys())
-            print(f"✓ Loaded {len(VIABLE_POKEMON)} viable Pokemon from Smogon Gen9 OU")
-        else:
-            print(f"✗ Failed to load Smogon data: {response.status_code}")
+        get_species_table()
+        build_indexes()
     except Exception as e:
-        print(f"✗ Error loading Smogon data: {e}")
-        print("  Continuing without Smogon filtering")
+        log.warning("Index refresh failed: %s", e)
+    finally:
+        _index_builder.active = False
+    INDEX_REFRESH_SECONDS.observe(time.perf_counter() - started)
+
+
+def build_indexes():
+    """Every index derived from the species and Smogon data, built ahead of the first request"""
+    get_recommendation_pool()
+    get_completion_pool()
+    get_species_index()
+    get_meta_sets()
+    get_speed_tiers()
+    get_suggest_index()
+    get_bootstrap_bundle()
 
-# Load on startup
-load_smogon_data()
+
+def warm_shared():
+    """Load the read-only data: rules, species snapshot, Smogon sets, species table and indexes
+
+    Starts no threads and no Prolog engine, so a server can run it once before
+    forking and its workers share the result copy-on-write.
+    """
+    global _shared_warm
+    with _shared_warm_lock:
+        if _shared_warm:
+            return
+        _index_builder.active = True
+        try:
+            for stage, step in (('rules', rule_engine.load_rule_base),
+                                ('species_cache', get_species_cache),
+                                ('smogon', lambda: load_smogon_data(background_refresh=False)),
+                                ('species_table', get_species_table),
+                                ('indexes', build_indexes)):
+                _timed_stage(stage, step)
+        finally:
+            _index_builder.active = False
+        _shared_warm = True
+
+
+def warm_up():
+    """Do the slow startup work: Prolog, then the shared data (unless warm_shared() already ran)"""
+    started = time.perf_counter()
+    _timed_stage('prolog', init_prolog)
+    warm_shared()
+    # Threads do not survive fork, so the refresh thread starts here rather than in warm_shared()
+    get_smogon_loader().start_background_refresh()
+    STARTUP_TIMINGS['warm_up_total'] = round(time.perf_counter() - started, 4)
+    _ready.set()
+    print(f"✓ Warm-up finished in {STARTUP_TIMINGS['warm_up_total']:.2f}s")
+
+
+def start_warm_up(background=True):
+    """Run warm_up() once: on a daemon thread, or on the calling thread if background is False
+
+    A blocking call made while a background warm-up is running waits for it.
+    """
+    global _warm_up_thread
+    run_here = False
+    with _warm_up_lock:
+        if _warm_up_thread is None and not _ready.is_set():
+            if background:
+                _warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+                _warm_up_thread.start()
+            else:
+                _warm_up_thread = threading.current_thread()
+                run_here = True
+        thread = _warm_up_thread
+    if run_here:
+        warm_up()
+    elif not background and thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout=READY_WAIT_SECONDS):
+    """Block until warm-up is done or the timeout passes; returns readiness"""
+    if timeout > 0:
+        return _ready.wait(timeout)
+    return _ready.is_set()
+
+
+# Views are collected here and registered on the app by create_app()
+_ROUTES = []
+
+
+def route(rule, **options):
+    """Record a view function for create_app() to register"""
+    def decorator(view):
+        _ROUTES.append((rule, view, options))
+        return view
+    return decorator
+
+
+# Sections of an analysis, in response order; fields= on /api/analyze picks a subset
+ANALYSIS_PARTS = ('propositional_logic', 'logic_programming', 'planning', 'speed_tiers', 'explanation')
+# The explanation is written from these sections, so asking for it computes them too
+EXPLANATION_NEEDS = ('propositional_logic', 'planning')
+# Top-level /api/analyze keys fields= can name ('status' is always sent)
+ANALYZE_FIELDS = {'analysis': dict.fromkeys(ANALYSIS_PARTS, True), 'knowledge_representation_used': True,
+                  'prolog_available': True, 'format': True, 'ready': True}
+
+# Important offensive types (mirrors important_coverage_type/1 in team_rules.pl)
+IMPORTANT_TYPES = ['fighting', 'ground', 'steel', 'fairy', 'fire', 'water', 'ice', 'dragon']
 
 
 def normalize_pokemon_name(name):
@@ -117,7 +476,7 @@ def normalize_type_name(type_name):
     return type_name.lower().replace("-", "_")
 
 
-def safe_prolog_query(query_str):
+def safe_prolog_query(query_str, context=None):
     """Safely execute a Prolog query with error handling"""
     global prolog, PROLOG_AVAILABLE
     
@@ -125,14 +484,15 @@ def safe_prolog_query(query_str):
         return None
     
     try:
-        result = list(prolog.query(query_str))
-        return result
+        if context is not None:
+            return context.query(query_str)
+        return prolog_pool.run_query(prolog, query_str)
     except Exception as e:
-        print(f"  Prolog query error: {e}")
+        log.warning("Prolog query error: %s", e)
         return None
 
 
-def safe_prolog_assert(fact_str):
+def safe_prolog_assert(fact_str, context=None):
     """Safely assert a Prolog fact with error handling"""
     global prolog, PROLOG_AVAILABLE
     
@@ -140,14 +500,17 @@ def safe_prolog_assert(fact_str):
         return False
     
     try:
-        list(prolog.query(f"assertz({fact_str})"))
+        if context is not None:
+            context.query(f"assertz({fact_str})")
+        else:
+            prolog_pool.run_query(prolog, f"assertz({fact_str})")
         return True
     except Exception as e:
-        print(f"  Prolog assert error for '{fact_str}': {e}")
+        log.warning("Prolog assert error for '%s': %s", fact_str, e)
         return False
 
 
-def safe_prolog_retractall(pattern):
+def safe_prolog_retractall(pattern, context=None):
     """Safely retract all matching Prolog facts"""
     global prolog, PROLOG_AVAILABLE
     
@@ -155,161 +518,413 @@ def safe_prolog_retractall(pattern):
         return False
     
     try:
-        list(prolog.query(f"retractall({pattern})"))
+        if context is not None:
+            context.query(f"retractall({pattern})")
+        else:
+            prolog_pool.run_query(prolog, f"retractall({pattern})")
         return True
     except Exception as e:
-        print(f"  Prolog retractall error for '{pattern}': {e}")
+        log.warning("Prolog retractall error for '%s': %s", pattern, e)
         return False
 
 
+# Candidate pools for /api/complete and ranked recommendations, rebuilt when the
+# viable list or species cache grows
+_completion_pool = None
+_completion_pool_key = None
+_recommendation_pool = None
+_recommendation_pool_key = None
+_species_index = None
+_species_index_key = None
+_pool_lock = threading.Lock()
+
+
+def _pool_key():
+    # Both versions change on every swap, insert or eviction; an id() or len() can repeat for different data
+    return (get_smogon_loader().version, get_species_cache().version)
+
+
+def candidate_species():
+    """Smogon-viable species with cached data plus the static table"""
+    # Only species already known locally, so a request never waits on PokeAPI
+    return [dict(view.to_dict(), name=normalize_pokemon_name(view.name))
+            for view in get_species_table().viable()]
+
+
+def get_completion_pool():
+    """Bitmask candidates for team_completion"""
+    global _completion_pool, _completion_pool_key
+    import team_completion
+    key = _pool_key()
+    if key == _completion_pool_key or _serve_stale(_completion_pool) or _defer_build(_completion_pool):
+        return _completion_pool
+    with _pool_lock:
+        if _completion_pool is None or key != _completion_pool_key:
+            _completion_pool = team_completion.build_candidates(candidate_species())
+            _completion_pool_key = key
+    return _completion_pool
+
+
+def format_candidates(loader):
+    """Species with sets in a non-default format whose data is already known locally"""
+    species = []
+    for name in sorted(loader.viable_pokemon):
+        data = lookup_cached_species(name)
+        if data and data.get('stats'):
+            species.append(dict(data, name=normalize_pokemon_name(name)))
+    return species
+
+
+def get_recommendation_pool(format_id=None):
+    """rule_engine.rank() candidates, for the default format unless format_id names another"""
+    global _recommendation_pool, _recommendation_pool_key
+    loader = get_format_loader(format_id)
+    if loader is not get_smogon_loader():
+        return loader.derived('recommendation_pool', get_species_cache().version,
+                              lambda loader: rule_engine.build_pool(format_candidates(loader)))
+    key = _pool_key()
+    if (key == _recommendation_pool_key or _serve_stale(_recommendation_pool)
+            or _defer_build(_recommendation_pool)):
+        return _recommendation_pool
+    with _pool_lock:
+        if _recommendation_pool is None or key != _recommendation_pool_key:
+            _recommendation_pool = rule_engine.build_pool(candidate_species())
+            _recommendation_pool_key = key
+    return _recommendation_pool
+
+
+def get_species_index(format_id=None):
+    """smogon_loader.SpeciesIndex (type and role bitsets) for the default format unless format_id names another"""
+    global _species_index, _species_index_key
+    loader = get_format_loader(format_id)
+    if loader is not get_smogon_loader():
+        return loader.species_index()
+    key = _pool_key()
+    if key == _species_index_key or _serve_stale(_species_index) or _defer_build(_species_index):
+        return _species_index
+    with _pool_lock:
+        if _species_index is None or key != _species_index_key:
+            _species_index = loader.species_index()
+            _species_index_key = key
+    return _species_index
+
+
+def known_species():
+    """{PokeAPI slug: species data or None} for Smogon-viable, static and cached species"""
+    import species_cache
+    to_slug = species_cache.to_pokeapi_name
+    species = {}
+    for name in get_smogon_loader().viable_pokemon:
+        species[to_slug(name)] = None
+    for name, data in load_static_species().items():
+        species[to_slug(name)] = data
+    for slug, data in get_species_cache().items():
+        species[slug] = data
+    for slug, data in species.items():
+        if data is None:
+            species[slug] = lookup_cached_species(slug)
+    return species
+
+
+# Memory-mapped species table, reopened when the species data behind it changes
+_species_table = None
+_species_table_key = None
+_species_table_lock = threading.Lock()
+
+
+def get_species_table():
+    """species_table.SpeciesTable of every known species; viable = candidate for recommendations"""
+    global _species_table, _species_table_key
+    import species_cache
+    import species_table
+    key = _pool_key()
+    if key == _species_table_key or _serve_stale(_species_table) or _defer_build(_species_table):
+        return _species_table
+    with _species_table_lock:
+        if _species_table is None or key != _species_table_key:
+            species = known_species()
+            to_slug = species_cache.to_pokeapi_name
+            # Same candidates as before: cached Smogon-viable species plus static ones with stats
+            viable = {to_slug(name) for name in get_smogon_loader().viable_pokemon}
+            viable.update(to_slug(name) for name, data in load_static_species().items() if data['stats'])
+            _species_table = species_table.open_table(species, viable)
+            _species_table_key = key
+    return _species_table
+
+
+# Smogon sets as damage_calc arrays, rebuilt when the sets or species data change
+_meta_sets = None
+_meta_sets_key = None
+_meta_sets_lock = threading.Lock()
+
+
+def table_species(name):
+    """Types and stats from the species table, or None"""
+    view = get_species_table().get(name)
+    return view.to_dict() if view is not None else None
+
+
+def get_meta_sets(format_id=None):
+    """damage_calc.MetaSets for every Smogon set of a format whose species data is known"""
+    global _meta_sets, _meta_sets_key
+    import damage_calc
+    loader = get_format_loader(format_id)
+    if loader is not get_smogon_loader():
+        return loader.derived('meta_sets', get_species_cache().version,
+                              lambda loader: damage_calc.MetaSets(loader.smogon_sets, lookup_cached_species))
+    key = (get_smogon_loader().version, _pool_key())
+    if key == _meta_sets_key or _serve_stale(_meta_sets) or _defer_build(_meta_sets):
+        return _meta_sets
+    with _meta_sets_lock:
+        if _meta_sets is None or key != _meta_sets_key:
+            _meta_sets = damage_calc.MetaSets(get_smogon_loader().smogon_sets, table_species)
+            _meta_sets_key = key
+    return _meta_sets
+
+
+def get_speed_tiers(format_id=None):
+    """speed_tiers.SpeedTiers over the same sets as get_meta_sets(), rebuilt along with them"""
+    import speed_tiers
+    meta = get_meta_sets(format_id)
+    if meta is None:
+        return None  # warm-up still building it
+    # Versioned by the MetaSets object itself: holding it means its id() is never reused
+    return get_format_loader(format_id).derived('speed_tiers', meta,
+                                                lambda loader: speed_tiers.SpeedTiers(meta))
+
+
+# Encoded /api/bootstrap payload, rebuilt when the species data behind it changes
+_bootstrap_bundle = None
+_bootstrap_key = None
+_bootstrap_lock = threading.Lock()
+
+
+def get_bootstrap_bundle():
+    """Type chart, species names and compact types/stats, encoded and gzipped once per data version"""
+    global _bootstrap_bundle, _bootstrap_key
+    import bootstrap
+    loader = get_smogon_loader()
+    cache = get_species_cache()
+    key = (cache.version, loader.version, os.path.getmtime(RULES_PATH))
+    if key == _bootstrap_key or _serve_stale(_bootstrap_bundle):
+        return _bootstrap_bundle
+    with _bootstrap_lock:
+        if _bootstrap_bundle is None or key != _bootstrap_key:
+            _bootstrap_bundle = bootstrap.Bundle(known_species())
+            _bootstrap_key = key
+    return _bootstrap_bundle
+
+
+# Name index for /api/suggest, built once per species data version and then only read
+_suggest_index = None
+_suggest_key = None
+_suggest_lock = threading.Lock()
+
+
+def get_suggest_index():
+    """suggest.SuggestIndex over every known species slug, weighted by Smogon set count"""
+    global _suggest_index, _suggest_key
+    import species_cache
+    loader = get_smogon_loader()
+    cache = get_species_cache()
+    key = (cache.version, loader.version)
+    if key == _suggest_key or _serve_stale(_suggest_index):
+        return _suggest_index
+    with _suggest_lock:
+        if _suggest_index is None or key != _suggest_key:
+            to_slug = species_cache.to_pokeapi_name
+            weights = {to_slug(name): len(sets) for name, sets in loader.smogon_sets.items()}
+            names = set(weights)
+            names.update(to_slug(name) for name in load_static_species())
+            names.update(slug for slug, _ in cache.items())
+            _suggest_index = suggest.SuggestIndex(names, weights)
+            _suggest_key = key
+    return _suggest_index
+
+
 class PokemonTeamAdvisor:
-    def __init__(self):
+    def __init__(self, format_id=None):
         self.pokeapi_base = "https://pokeapi.co/api/v2/"
+        self.format_id = format_id  # Smogon format recommendations come from; None = default
     
     def get_pokemon_data(self, name):
-        """Fetch Pokémon data from PokeAPI"""
-        try:
-            response = requests.get(f"{self.pokeapi_base}pokemon/{name.lower()}")
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'name': data['name'],
-                    'types': [t['type']['name'] for t in data['types']],
-                    'stats': {s['stat']['name']: s['base_stat'] for s in data['stats']}
-                }
-        except Exception as e:
-            print(f"  ✗ Error fetching {name}: {e}")
-        return None
+        """Look up Pokémon data in the species cache (PokeAPI on a miss)"""
+        return get_species_cache().get(name)
     
-    def add_team_to_prolog(self, team_data):
-        """Dynamically add team facts to Prolog"""
+    def complete_team_data(self, team_data):
+        """Fill in types/stats for members sent by name only, fetching them concurrently"""
+        missing = [p for p in team_data if p.get('name') and not (p.get('types') and p.get('stats'))]
+        if not missing:
+            return team_data
+        # The mapped table answers known species without a cache lookup or network call
+        table = get_species_table()
+        filled = {}
+        for p in missing if table is not None else ():
+            view = table.get(p['name'])
+            if view is not None:
+                filled[id(p)] = {'types': view.types, 'stats': view.stats}
+        missing = [p for p in missing if id(p) not in filled]
+        if missing:
+            found = get_species_cache().get_many(p['name'] for p in missing)
+            filled.update((id(p), data) for p, data in zip(missing, found) if data)
+        return [dict(p, types=p.get('types') or filled[id(p)]['types'],
+                     stats=p.get('stats') or filled[id(p)]['stats']) if id(p) in filled else p
+                for p in team_data]
+    
+    def add_team_to_prolog(self, team_data, context):
+        """Dynamically add team facts to a Prolog team context"""
         if not PROLOG_AVAILABLE or prolog is None:
-            print("  Prolog not available, skipping")
+            log.debug("Prolog not available, skipping")
             return False
             
         try:
-            # Safely retract all dynamic facts
-            print("Clearing previous Prolog facts...")
-            safe_prolog_retractall("current_pokemon(_)")
-            safe_prolog_retractall("has_type(_, _)")
-            safe_prolog_retractall("base_stat(_, _, _)")
-            
-            print("Adding Prolog facts:")
-            
-            # Add current team Pokemon
+            # One load_team/1 call replaces the context's previous team
+            members = []
             for pokemon in team_data:
                 name = normalize_pokemon_name(pokemon['name'])
-                print(f"  Adding: {name}")
-                
-                # Assert Pokemon exists on current team
-                if not safe_prolog_assert(f"current_pokemon({name})"):
-                    continue
-     
-                # Add base stats
-                for stat_name, val in pokemon['stats'].items():
-                    safe_stat = normalize_type_name(stat_name)
-                    safe_prolog_assert(f"base_stat({name}, '{safe_stat}', {val})")
-                    
-                # Add types
-                for t in pokemon['types']:
-                    safe_type = normalize_type_name(t)
-                    if safe_prolog_assert(f"has_type({name}, {safe_type})"):
-                        print(f"    has_type({name}, {safe_type})")
+                types = [normalize_type_name(t) for t in pokemon['types']]
+                stats = [(normalize_type_name(stat_name), val) for stat_name, val in pokemon['stats'].items()]
+                members.append((name, types, stats))
             
-            print("✓ Facts added to Prolog")
+            with STAGE_SECONDS.time(stage='prolog_load'):
+                loaded = context.load_team(members)
+            if not loaded:
+                log.warning("load_team/1 failed")
+                return False
+            
+            log.debug("Facts added to Prolog (%d Pokemon)", len(members))
             return True
             
         except Exception as e:
-            print(f"Error adding facts to Prolog: {e}")
+            log.warning("Error adding facts to Prolog: %s", e)
             return False
     
-    def test_prolog_queries(self):
+    def test_prolog_queries(self, context):
         """Test basic Prolog queries to verify facts are loaded"""
         if not PROLOG_AVAILABLE or prolog is None:
             return
             
-        print("\n--- Prolog Debug Queries ---")
+        log.debug("--- Prolog Debug Queries ---")
         
         # Test current_pokemon
-        results = safe_prolog_query("current_pokemon(X)")
+        results = safe_prolog_query("current_pokemon(X)", context)
         if results:
-            print(f"current_pokemon(X): {[r['X'] for r in results]}")
+            log.debug("current_pokemon(X): %s", [r['X'] for r in results])
         
         # Test has_type
-        results = safe_prolog_query("has_type(X, Y)")
+        results = safe_prolog_query("has_type(X, Y)", context)
         if results:
-            print(f"has_type(X, Y): {[(r['X'], r['Y']) for r in results[:10]]}")
+            log.debug("has_type(X, Y): %s", [(r['X'], r['Y']) for r in results[:10]])
         
         # Test team_covers_type
-        results = safe_prolog_query("team_covers_type(X)")
+        results = safe_prolog_query("team_covers_type(X)", context)
         if results:
-            print(f"team_covers_type(X): {[r['X'] for r in results]}")
+            log.debug("team_covers_type(X): %s", [r['X'] for r in results])
         
         # Test needs_offensive_coverage
-        results = safe_prolog_query("needs_offensive_coverage(X)")
+        results = safe_prolog_query("needs_offensive_coverage(X)", context)
         if results:
-            print(f"needs_offensive_coverage(X): {[r['X'] for r in results]}")
+            log.debug("needs_offensive_coverage(X): %s", [r['X'] for r in results])
         
-        print("--- End Debug ---\n")
+        log.debug("--- End Debug ---")
                 
     def prolog_recommendations(self, team_data):
-        """Use Prolog for intelligent recommendations"""
-        if not PROLOG_AVAILABLE or prolog is None:
-            print("  Using fallback recommendations (Prolog unavailable)")
-            return self.fallback_recommendations(team_data)
+        """Use Prolog (or its native mirror) for intelligent recommendations"""
+        if warm_up_pending():
+            return self.timed_fallback(team_data)
+        if not uses_prolog():
+            log.debug("Using native rule engine (RULE_ENGINE=%s, Prolog available: %s)",
+                      RULE_ENGINE, PROLOG_AVAILABLE)
+            return self.native_recommendations(team_data)
         
         try:
-            print("Attempting Prolog query...")
-            success = self.add_team_to_prolog(team_data)
-            if not success:
-                print("  Failed to add team to Prolog, using fallback")
-                return self.fallback_recommendations(team_data)
-            
-            # Debug: test queries
-            self.test_prolog_queries()
-            
-            recommendations = []
-            
-            # Query for recommendations
-            query = "recommend_pokemon(Pokemon, Explanation)"
-            print(f"Query: {query}")
-            
-            results = safe_prolog_query(query)
-            
-            if results is None:
-                print("  Prolog query failed, using fallback")
-                return self.fallback_recommendations(team_data)
-            
-            print(f"Got {len(results)} results from Prolog")
-            
-            # Process results (limit to top 5)
-            seen_pokemon = set()
-            for result in results:
-                pokemon_name = str(result['Pokemon'])
-                if pokemon_name not in seen_pokemon:
-                    seen_pokemon.add(pokemon_name)
-                    explanation = str(result['Explanation'])
-                    recommendations.append({
-                        'pokemon': pokemon_name,
-                        'explanation': explanation
-                    })
-                    print(f"  Recommendation: {pokemon_name} - {explanation}")
-                    if len(recommendations) >= 5:
-                        break
-                
+            with PROLOG_POOL.checkout() as context:
+                recommendations = self.query_recommendations(team_data, context)
         except Exception as e:
-            print(f"  Prolog recommendation error: {e}")
-            return self.fallback_recommendations(team_data)
+            log.warning("Prolog recommendation error: %s", e)
+            return self.native_recommendations(team_data)
             
         # If no recommendations from Prolog, use fallback
         if not recommendations:
-            print("No Prolog results, using fallback")
-            return self.fallback_recommendations(team_data)
+            log.debug("No Prolog results, using fallback")
+            return self.timed_fallback(team_data)
             
+        RECOMMENDATIONS.inc(source='prolog')
+        return recommendations
+    
+    def native_recommendations(self, team_data):
+        """Ranked recommendations with the team's needs derived by rule_engine, without Prolog"""
+        try:
+            with STAGE_SECONDS.time(stage='ranking'):
+                recommendations = rule_engine.rank(team_data, k=5, pool=get_recommendation_pool(self.format_id))
+        except Exception as e:
+            log.warning("Native rule engine error: %s", e)
+            recommendations = None
+        
+        if not recommendations:
+            return self.timed_fallback(team_data)
+        
+        RECOMMENDATIONS.inc(source='native')
+        return recommendations
+    
+    def timed_fallback(self, team_data):
+        """fallback_recommendations, counted and timed as the 'fallback' stage"""
+        RECOMMENDATIONS.inc(source='fallback')
+        with STAGE_SECONDS.time(stage='fallback'):
+            return self.fallback_recommendations(team_data)
+    
+    def query_recommendations(self, team_data, context):
+        """Load the team into a checked-out context, query its needs and rank the candidates"""
+        success = self.add_team_to_prolog(team_data, context)
+        if not success:
+            log.debug("Failed to add team to Prolog, using fallback")
+            return None
+        
+        # Debug: test queries (four extra round trips, so only when someone will read them)
+        if log.isEnabledFor(logging.DEBUG):
+            self.test_prolog_queries(context)
+        
+        needs = self.query_needs(context)
+        if needs is None:
+            return None
+        
+        with STAGE_SECONDS.time(stage='ranking'):
+            recommendations = rule_engine.rank(team_data, k=5, pool=get_recommendation_pool(self.format_id),
+                                               needs=needs)
+        for rec in recommendations:
+            log.debug("Recommendation: %s (%.2f) - %s", rec['pokemon'], rec['score'], rec['explanation'])
+        
         return recommendations
     
+    def query_needs(self, context):
+        """(needs_offensive_coverage, team_weak_against, needs_role) for the team loaded in context"""
+        # One round trip; the candidates are scored in Python
+        query = ("findall(T, needs_offensive_coverage(T), Types), "
+                 "findall([A, S], team_weak_against(A, S), Weak), "
+                 "findall(R, needs_role(R), Roles)")
+        
+        with STAGE_SECONDS.time(stage='prolog_query'):
+            results = safe_prolog_query(query, context)
+        
+        if not results:
+            log.debug("Prolog query failed, using fallback")
+            return None
+        
+        result = results[0]
+        needs = ([str(t) for t in result['Types']],
+                 [(str(a), float(severity)) for a, severity in result['Weak']],
+                 [str(r) for r in result['Roles']])
+        log.debug("Team needs from Prolog: %s", needs)
+        return needs
+    
     def fallback_recommendations(self, team_data):
-        """Fallback recommendations when Prolog is not available"""
+        """Fallback recommendations when Prolog is not available
+        
+        Once warm-up has built the species index, candidates are the viable
+        species bringing the missing types and roles; before that (or if the
+        index finds none) a fixed Gen9 OU pick per missing type.
+        """
+        import type_chart
         recommendations = []
         
         # Get current types
@@ -317,54 +932,117 @@ class PokemonTeamAdvisor:
         for pokemon in team_data:
             current_types.update(pokemon['types'])
         
-        # Important types to have
-        important_types = ['fighting', 'ground', 'steel', 'fairy', 'fire', 'water', 'ice', 'dragon']
-        missing_types = [t for t in important_types if t not in current_types]
+        missing_types = [t for t in IMPORTANT_TYPES if t not in current_types]
+        
+        if is_ready():
+            recommendations = self.indexed_recommendations(team_data, missing_types)
+            if recommendations:
+                return recommendations
         
         # Suggest Pokemon for missing types (using Gen9 OU viable Pokemon)
         type_suggestions = {
-            'fighting': ('great_tusk', 'Provides missing Fighting-type coverage (Gen9 OU)'),
-            'ground': ('garchomp', 'Provides missing Ground-type coverage (Gen9 OU)'),
-            'steel': ('kingambit', 'Provides missing Steel-type coverage (Gen9 OU)'),
-            'fairy': ('iron_valiant', 'Provides missing Fairy-type coverage (Gen9 OU)'),
-            'fire': ('chi_yu', 'Provides missing Fire-type coverage (Gen9 OU)'),
-            'water': ('palafin', 'Provides missing Water-type coverage (Gen9 OU)'),
-            'ice': ('chien_pao', 'Provides missing Ice-type coverage (Gen9 OU)'),
-            'dragon': ('dragapult', 'Provides missing Dragon-type coverage (Gen9 OU)')
+            'fighting': ('great_tusk', ['ground', 'fighting'], 'Provides missing Fighting-type coverage (Gen9 OU)'),
+            'ground': ('garchomp', ['dragon', 'ground'], 'Provides missing Ground-type coverage (Gen9 OU)'),
+            'steel': ('kingambit', ['dark', 'steel'], 'Provides missing Steel-type coverage (Gen9 OU)'),
+            'fairy': ('iron_valiant', ['fairy', 'fighting'], 'Provides missing Fairy-type coverage (Gen9 OU)'),
+            'fire': ('chi_yu', ['dark', 'fire'], 'Provides missing Fire-type coverage (Gen9 OU)'),
+            'water': ('palafin', ['water'], 'Provides missing Water-type coverage (Gen9 OU)'),
+            'ice': ('chien_pao', ['dark', 'ice'], 'Provides missing Ice-type coverage (Gen9 OU)'),
+            'dragon': ('dragapult', ['dragon', 'ghost'], 'Provides missing Dragon-type coverage (Gen9 OU)')
         }
         
         for missing_type in missing_types[:5]:
             if missing_type in type_suggestions:
-                name, reason = type_suggestions[missing_type]
+                name, _, reason = type_suggestions[missing_type]
                 recommendations.append({
                     'pokemon': name,
                     'explanation': reason
                 })
         
+        # Cover the team's worst weakness with the suggestion that takes least damage from it
+        weaknesses = self.calculate_weaknesses(team_data)
+        if weaknesses and len(recommendations) < 5:
+            attack_idx = type_chart.TYPE_INDEX[weaknesses[0]]
+            suggested = {rec['pokemon'] for rec in recommendations}
+            candidates = [(type_chart.defensive_profile(types)[attack_idx], name)
+                          for name, types, _ in type_suggestions.values() if name not in suggested]
+            if candidates:
+                mult, name = min(candidates)
+                if mult < 1:
+                    recommendations.append({
+                        'pokemon': name,
+                        'explanation': f'Helps resist team weakness to {weaknesses[0]}-type attacks'
+                    })
+        
         return recommendations
     
-    def propositional_analysis(self, team_data):
-        """Propositional logic for type coverage analysis"""
-        important_types = ['fighting', 'ground', 'steel', 'fairy', 'fire', 'water', 'ice', 'dragon']
+    def indexed_recommendations(self, team_data, missing_types):
+        """Up to five viable species for the missing types and roles, from the format's species index"""
+        import smogon_loader
+        import team_completion
+        try:
+            loader = get_format_loader(self.format_id)
+            index = get_species_index(self.format_id)
+        except smogon_loader.UnknownFormat:
+            return []
         
-        covered_types = set()
+        team_roles = set()
         for pokemon in team_data:
-            covered_types.update(pokemon['types'])
+            team_roles.update(team_completion.species_roles(pokemon.get('stats') or {}))
+        missing_roles = [r for r in team_completion.REQUIRED_ROLES if r not in team_roles]
+        
+        on_team = {normalize_pokemon_name(p['name']) for p in team_data if p.get('name')}
+        limit = 5 + len(on_team)
+        names = loader.get_viable_recommendations(missing_types[:5], missing_roles, limit=limit, index=index)
+        if not names and missing_roles:
+            # Nobody covers both; types matter more than roles
+            names = loader.get_viable_recommendations(missing_types[:5], limit=limit, index=index)
+        
+        recommendations = []
+        for name in names:
+            pokemon = normalize_pokemon_name(name)
+            if pokemon in on_team:
+                continue
+            data = lookup_cached_species(name) or {}
+            types = [t for t in missing_types if t in (data.get('types') or ())]
+            roles = [r for r in missing_roles if r in team_completion.species_roles(data.get('stats') or {})]
+            if types:
+                explanation = f"Provides missing {', '.join(t.title() for t in types)}-type coverage ({loader.format_id})"
+            elif roles:
+                explanation = f"Fills the missing {roles[0].replace('_', ' ')} role ({loader.format_id})"
+            else:
+                explanation = f"Viable in {loader.format_id}"
+            recommendations.append({'pokemon': pokemon, 'explanation': explanation})
+            if len(recommendations) == 5:
+                break
+        return recommendations
+    
+    def propositional_analysis(self, team_data, matchups=None):
+        """Propositional logic for type coverage analysis"""
+        import type_chart
+        if matchups is None:
+            matchups = type_chart.team_matchups(team_data)
+        stab = matchups['stab']
         
         type_coverage = {}
-        for imp_type in important_types:
-            type_coverage[imp_type] = imp_type in covered_types
+        for imp_type in IMPORTANT_TYPES:
+            type_coverage[imp_type] = bool(stab[type_chart.TYPE_INDEX[imp_type]])
         
-        coverage_score = sum(type_coverage.values()) / len(important_types)
+        coverage_score = sum(type_coverage.values()) / len(IMPORTANT_TYPES)
         
         return {
             'type_coverage': type_coverage,
-            'score': coverage_score
+            'score': coverage_score,
+            'super_effective_coverage': [t for t, hit in zip(type_chart.TYPES, matchups['coverage']) if hit],
+            'weaknesses': type_chart.vector_to_dict(matchups['weak']),
+            'resistances': type_chart.vector_to_dict(matchups['resist']),
+            'immunities': type_chart.vector_to_dict(matchups['immune'])
         }
     
-    def role_planning(self, team_data):
+    def role_planning(self, team_data, roles=None):
         """Analyze team roles"""
-        roles = self.calculate_roles(team_data)
+        if roles is None:
+            roles = self.calculate_roles(team_data)
         
         required_roles = {
             'physical_sweeper': 1,
@@ -383,8 +1061,19 @@ class PokemonTeamAdvisor:
             'missing_roles': missing_roles
         }
     
+    def speed_analysis(self, team_data):
+        """Which Smogon sets each member outspeeds, ties and is outsped by (Scarf, nature and EVs included)"""
+        tiers = get_speed_tiers(self.format_id)
+        if tiers is None:
+            return {'sets': 0, 'members': {}}
+        return {
+            'sets': len(tiers),
+            'members': tiers.team_report(team_data)
+        }
+    
     def calculate_roles(self, team_data):
         """Calculate role distribution of team"""
+        import team_completion
         roles = {
             'physical_sweeper': 0,
             'special_sweeper': 0,
@@ -393,62 +1082,17 @@ class PokemonTeamAdvisor:
         }
         
         for pokemon in team_data:
-            stats = pokemon['stats']
-            
-            # Physical sweeper: High Attack + Speed
-            if stats.get('attack', 0) >= 100 and stats.get('speed', 0) >= 80:
-                roles['physical_sweeper'] += 1
-            
-            # Special sweeper: High Sp. Atk + Speed
-            if stats.get('special-attack', 0) >= 100 and stats.get('speed', 0) >= 80:
-                roles['special_sweeper'] += 1
-            
-            # Wall: High defensive stats
-            if (stats.get('hp', 0) >= 80 and 
-                stats.get('defense', 0) >= 80 and 
-                stats.get('special-defense', 0) >= 80):
-                roles['wall'] += 1
-            
-            # Tank: High HP
-            if stats.get('hp', 0) >= 90:
-                roles['tank'] += 1
+            for role in team_completion.species_roles(pokemon['stats']):
+                roles[role] += 1
         
         return roles
     
-    def calculate_weaknesses(self, team_data):
+    def calculate_weaknesses(self, team_data, matchups=None):
         """Calculate major type weaknesses"""
-        weakness_count = {}
-        
-        # Simplified type weaknesses
-        type_weaknesses = {
-            'grass': ['fire', 'ice', 'flying', 'bug', 'poison'],
-            'water': ['electric', 'grass'],
-            'fire': ['water', 'ground', 'rock'],
-            'electric': ['ground'],
-            'ground': ['water', 'grass', 'ice'],
-            'rock': ['water', 'grass', 'fighting', 'ground', 'steel'],
-            'flying': ['electric', 'ice', 'rock'],
-            'psychic': ['bug', 'ghost', 'dark'],
-            'bug': ['fire', 'flying', 'rock'],
-            'dragon': ['ice', 'dragon', 'fairy'],
-            'dark': ['fighting', 'bug', 'fairy'],
-            'steel': ['fire', 'fighting', 'ground'],
-            'fairy': ['poison', 'steel'],
-            'fighting': ['flying', 'psychic', 'fairy'],
-            'poison': ['ground', 'psychic'],
-            'ghost': ['ghost', 'dark'],
-            'ice': ['fire', 'fighting', 'rock', 'steel'],
-            'normal': ['fighting']
-        }
-        
-        for pokemon in team_data:
-            for ptype in pokemon['types']:
-                if ptype in type_weaknesses:
-                    for weak in type_weaknesses[ptype]:
-                        weakness_count[weak] = weakness_count.get(weak, 0) + 1
-        
-        sorted_weaknesses = sorted(weakness_count.items(), key=lambda x: x[1], reverse=True)
-        return [w[0] for w in sorted_weaknesses[:3]]
+        import type_chart
+        if matchups is None:
+            matchups = type_chart.team_matchups(team_data)
+        return type_chart.major_weaknesses(matchups)
     
     def calculate_strengths(self, team_data):
         """Calculate team's offensive strengths"""
@@ -460,15 +1104,20 @@ class PokemonTeamAdvisor:
         sorted_types = sorted(type_count.items(), key=lambda x: x[1], reverse=True)
         return [t[0] for t in sorted_types[:3]]
     
-    def generate_explanation(self, team_data, analysis):
+    def generate_explanation(self, team_data, analysis, matchups=None):
         """Generate natural language explanation of reasoning"""
-        weaknesses = self.calculate_weaknesses(team_data)
+        weaknesses = self.calculate_weaknesses(team_data, matchups)
         strengths = self.calculate_strengths(team_data)
         
         coverage_score = analysis['propositional_logic']['score'] * 100
         missing_roles = analysis['planning']['missing_roles']
         
-        prolog_status = "✓ Active" if PROLOG_AVAILABLE else "✗ Fallback mode (Prolog unavailable)"
+        if uses_prolog():
+            prolog_status = "✓ Active"
+        elif PROLOG_AVAILABLE:
+            prolog_status = "✓ Native rule engine"
+        else:
+            prolog_status = "✓ Native rule engine (Prolog unavailable)"
         
         explanation = f"""Team Analysis Summary:
 
@@ -494,105 +1143,598 @@ Recommendations prioritized by:
         
         return explanation
     
-    def analyze_team(self, team_data):
-        """Comprehensive team analysis using multiple KR techniques"""
-        prop_analysis = self.propositional_analysis(team_data)
-        prolog_recs = self.prolog_recommendations(team_data)
-        planning = self.role_planning(team_data)
+    def analyze_team(self, team_data, parts=None):
+        """Comprehensive team analysis using multiple KR techniques
+        
+        parts limits it to some of ANALYSIS_PARTS (None computes all); sections
+        the explanation needs are computed for it but not returned.
+        """
+        wanted = set(ANALYSIS_PARTS if parts is None else parts)
+        needed = wanted | set(EXPLANATION_NEEDS) if 'explanation' in wanted else wanted
+        analysis = {}
+        if 'propositional_logic' in needed:
+            with STAGE_SECONDS.time(stage='propositional'):
+                analysis['propositional_logic'] = self.propositional_analysis(team_data)
+        if 'logic_programming' in needed:
+            analysis['logic_programming'] = self.prolog_recommendations(team_data)
+        if 'planning' in needed:
+            with STAGE_SECONDS.time(stage='role_planning'):
+                analysis['planning'] = self.role_planning(team_data)
+        if 'speed_tiers' in needed:
+            with STAGE_SECONDS.time(stage='speed_tiers'):
+                analysis['speed_tiers'] = self.speed_analysis(team_data)
+        
+        if 'explanation' in needed:
+            with STAGE_SECONDS.time(stage='explanation'):
+                analysis['explanation'] = self.generate_explanation(team_data, analysis)
+        
+        return {part: value for part, value in analysis.items() if part in wanted}
+    
+    def analyze_session(self, session):
+        """analyze_team() for a session, reading its delta-maintained aggregates"""
+        cached = session.cached_analysis()
+        if cached is not None:
+            return cached
+        
+        team_data = session.members
+        matchups = session.matchups()
+        with STAGE_SECONDS.time(stage='propositional'):
+            prop_analysis = self.propositional_analysis(team_data, matchups)
+        prolog_recs = self.session_recommendations(session)
+        with STAGE_SECONDS.time(stage='role_planning'):
+            planning = self.role_planning(team_data, dict(session.role_counts))
+        with STAGE_SECONDS.time(stage='speed_tiers'):
+            speed = self.speed_analysis(team_data)
         
         analysis = {
             'propositional_logic': prop_analysis,
             'logic_programming': prolog_recs,
             'planning': planning,
+            'speed_tiers': speed,
         }
         
-        analysis['explanation'] = self.generate_explanation(team_data, analysis)
+        with STAGE_SECONDS.time(stage='explanation'):
+            analysis['explanation'] = self.generate_explanation(team_data, analysis, matchups)
         
+        session.store_analysis(analysis)
         return analysis
     
+    def session_recommendations(self, session):
+        """Recommendations from the session's own Prolog context (its facts are already loaded)"""
+        team_data = session.members
+        if not team_data:
+            return []
+        if warm_up_pending():
+            return self.timed_fallback(team_data)
+        if not uses_prolog():
+            return self.native_recommendations(team_data)
+        
+        try:
+            if session.context is None:
+                session.attach_context(acquire_session_context())
+            needs = self.query_needs(session.context)
+        except Exception as e:
+            log.warning("Prolog session recommendation error: %s", e)
+            needs = None
+        if needs is None:
+            return self.native_recommendations(team_data)
+        
+        with STAGE_SECONDS.time(stage='ranking'):
+            recommendations = rule_engine.rank(team_data, k=5, pool=get_recommendation_pool(self.format_id),
+                                               needs=needs)
+        if not recommendations:
+            return self.timed_fallback(team_data)
+        RECOMMENDATIONS.inc(source='prolog')
+        return recommendations
+    
+
+def kr_methods_used():
+    kr_methods = [
+        'Propositional Logic (Type coverage)',
+        'Planning (Role composition)',
+        'Explanation Generation'
+    ]
+    
+    if uses_prolog():
+        kr_methods.insert(1, 'Logic Programming (Prolog rules)')
+    else:
+        kr_methods.insert(1, 'Logic Programming (native rule engine)')
+    return kr_methods
+
+
+def warming_up_response():
+    """503 for requests that need an index warm-up has not built yet"""
+    import flask
+    return flask.jsonify({'status': 'error', 'message': 'Warming up, retry shortly', 'ready': False}), 503
+
 
-@app.route('/api/analyze', methods=['POST'])
+def requested_format(data):
+    """(format id, or None for the default; error response or None) from the body or ?format="""
+    import flask
+    import smogon_loader
+    requested = data.get('format') or flask.request.args.get('format')
+    if not requested:
+        return None, None
+    try:
+        loader = get_format_loader(requested)
+    except smogon_loader.UnknownFormat as e:
+        return None, (flask.jsonify({'status': 'error', 'message': str(e)}), 404)
+    return (None if loader is get_smogon_loader() else loader.format_id), None
+
+
+def requested_fields(data):
+    """(fields tree or None, analysis parts or None, error response or None) from the body or ?fields="""
+    import flask
+    import responses
+    fields = responses.parse_fields(data.get('fields') or flask.request.args.get('fields'))
+    if fields is None:
+        return None, None, None
+    unknown = responses.unknown_fields(fields, ANALYZE_FIELDS)
+    if unknown:
+        return None, None, (flask.jsonify({
+            'status': 'error',
+            'message': f"Unknown field(s): {', '.join(unknown)}",
+            'fields': sorted(ANALYZE_FIELDS) + [f"analysis.{part}" for part in ANALYSIS_PARTS]
+        }), 400)
+    sections = fields.get('analysis')
+    if sections is None:
+        return fields, (), None
+    return fields, (None if sections is True else tuple(p for p in ANALYSIS_PARTS if p in sections)), None
+
+
+@route('/api/analyze', methods=['POST'])
 def analyze_team():
     """Main endpoint for team analysis"""
-    data = request.json
+    import flask
+    import responses
+    started = time.perf_counter()
+    data = flask.request.json
     team_data = data.get('team', [])
-    print(f"\n{'='*60}")
-    print(f"Received team with {len(team_data)} Pokemon")
+    log.debug("Received team with %d Pokemon", len(team_data))
     
     if len(team_data) == 0:
-        return jsonify({
+        return flask.jsonify({
             'status': 'error',
             'message': 'No Pokemon provided'
         }), 400
     
-    advisor = PokemonTeamAdvisor()
+    # Before warm-up finishes this answers from the fallback path
+    wait_until_ready()
+    format_id, error = requested_format(data)
+    if error:
+        return error
+    fields, parts, error = requested_fields(data)
+    if error:
+        return error
+    advisor = PokemonTeamAdvisor(format_id)
+    # Read before any index is used, so a result from indexes rebuilt meanwhile is not cached
+    generation = analysis_generation()
+    team_data = advisor.complete_team_data(team_data)
+    
+    # Same members in any slot order share one cache entry (and one answer)
+    cache = get_analysis_cache()
+    key = result_cache.team_fingerprint(team_data)
+    if format_id:
+        # The generation only tracks the default format; other formats rebuild their
+        # indexes from the live data, so their keys carry its versions
+        key = f"{format_id}:{get_format_loader(format_id).version}:{get_species_cache().version}:{key}"
+    # A full entry answers any projection; partial ones are kept under their sections
+    cached = cache.get(key)
+    if cached is None and parts is not None:
+        key = f"{key}|{','.join(parts)}"
+        cached = cache.get(key)
+    if cached is not None:
+        ANALYZE_SECONDS.observe(time.perf_counter() - started, cache='hit')
+        return flask.jsonify(responses.project(dict(cached, ready=is_ready()), fields))
     
     try:
-        analysis = advisor.analyze_team(team_data)
-        
-        kr_methods = [
-            'Propositional Logic (Type coverage)',
-            'Planning (Role composition)',
-            'Explanation Generation'
-        ]
+        analysis = advisor.analyze_team(result_cache.canonical_team(team_data), parts)
         
-        if PROLOG_AVAILABLE:
-            kr_methods.insert(1, 'Logic Programming (Prolog rules)')
-        else:
-            kr_methods.insert(1, 'Heuristic Recommendations (Prolog unavailable)')
-        
-        return jsonify({
+        payload = {
             'status': 'success',
             'analysis': analysis,
-            'knowledge_representation_used': kr_methods,
-            'prolog_available': PROLOG_AVAILABLE
-        })
+            'knowledge_representation_used': kr_methods_used(),
+            'prolog_available': PROLOG_AVAILABLE,
+            'format': format_id or get_smogon_loader().format_id
+        }
+        cache.put(key, payload, generation)
+        ANALYZE_SECONDS.observe(time.perf_counter() - started, cache='miss')
+        return flask.jsonify(responses.project(dict(payload, ready=is_ready()), fields))
     except Exception as e:
-        print(f"Analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
+        log.exception("Analysis error: %s", e)
+        return flask.jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
-@app.route('/api/test-pokemon/<name>', methods=['GET'])
+@route('/api/analyze/batch', methods=['POST'])
+def analyze_team_batch():
+    """Analyze many teams at once on the worker pool"""
+    import batch_analysis
+    import flask
+    import responses
+    data = flask.request.json or {}
+    teams = data.get('teams', [])
+
+    if not isinstance(teams, list) or len(teams) == 0:
+        return flask.jsonify({
+            'status': 'error',
+            'message': 'No teams provided'
+        }), 400
+
+    fields, parts, error = requested_fields(data)
+    if error:
+        return error
+    try:
+        results = batch_analysis.analyze_teams(teams, parts=parts)
+    except ValueError as e:
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        log.exception("Batch analysis error: %s", e)
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return flask.jsonify({
+        'status': 'success',
+        'count': len(results),
+        'errors': sum(1 for r in results if r['status'] != 'success'),
+        'results': [responses.project(r, fields, always=('status', 'message')) for r in results]
+    })
+
+@route('/api/complete', methods=['POST'])
+def complete_team():
+    """Search for the best ways to fill a partial team's empty slots"""
+    import flask
+    import team_completion
+    data = flask.request.json or {}
+    team_data = data.get('team', [])
+
+    if len(team_data) >= team_completion.TEAM_SIZE:
+        return flask.jsonify({
+            'status': 'error',
+            'message': 'Team is already full'
+        }), 400
+
+    try:
+        k = max(1, min(int(data.get('k', 5)), 50))
+        # Members sent by name only are filled in the same way /api/analyze fills them
+        team_data = PokemonTeamAdvisor().complete_team_data(team_data)
+        pool = get_completion_pool()
+        if pool is None:
+            return warming_up_response()
+        start = time.perf_counter()
+        completions = team_completion.complete_team(team_data, pool, k=k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        log.exception("Completion error: %s", e)
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return flask.jsonify({
+        'status': 'success',
+        'completions': completions,
+        'candidates': len(pool),
+        'search_ms': round(elapsed_ms, 2)
+    })
+
+@route('/api/threats', methods=['POST'])
+def team_threats():
+    """The Smogon sets this team handles worst, from a damage matrix over every set"""
+    import damage_calc
+    import flask
+    data = flask.request.json or {}
+    team_data = data.get('team', [])
+
+    if len(team_data) == 0:
+        return flask.jsonify({
+            'status': 'error',
+            'message': 'No Pokemon provided'
+        }), 400
+
+    wait_until_ready()
+    format_id, error = requested_format(data)
+    if error:
+        return error
+    try:
+        limit = max(1, min(int(data.get('limit', 10)), 50))
+        team_data = PokemonTeamAdvisor(format_id).complete_team_data(team_data)
+        meta = get_meta_sets(format_id)
+        if meta is None:
+            return warming_up_response()
+        start = time.perf_counter()
+        team = damage_calc.TeamArrays(team_data)
+        threats = damage_calc.rank_threats(meta, team, k=limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        log.exception("Threat calculation error: %s", e)
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return flask.jsonify({
+        'status': 'success',
+        'threats': threats,
+        'members': team.names,
+        'format': format_id or get_smogon_loader().format_id,
+        'sets': len(meta),
+        'sets_skipped': meta.skipped,
+        'calc_ms': round(elapsed_ms, 2)
+    })
+
+def session_response(session, status=200):
+    """A session's members and analysis, shaped like the /api/analyze response"""
+    import flask
+    advisor = PokemonTeamAdvisor()
+    with session.lock:
+        analysis = advisor.analyze_session(session)
+        members = session.members
+    return flask.jsonify({
+        'status': 'success',
+        'session_id': session.id,
+        'team': members,
+        'analysis': analysis,
+        'knowledge_representation_used': kr_methods_used(),
+        'prolog_available': PROLOG_AVAILABLE,
+        'ready': is_ready()
+    }), status
+
+def session_not_found(session_id):
+    import flask
+    return flask.jsonify({'status': 'error', 'message': f'Session {session_id} not found or expired'}), 404
+
+@route('/api/sessions', methods=['POST'])
+def create_session():
+    """Start a team session, optionally with an initial team"""
+    import flask
+    import team_sessions
+    data = flask.request.get_json(silent=True) or {}
+    wait_until_ready()
+    advisor = PokemonTeamAdvisor()
+    team_data = advisor.complete_team_data(data.get('team', []))
+    
+    session = get_session_store().create(acquire_session_context())
+    try:
+        with session.lock:
+            for pokemon in team_data:
+                session.add(pokemon)
+    except team_sessions.SessionError as e:
+        get_session_store().close(session.id)
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 400
+    return session_response(session, 201)
+
+@route('/api/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Current analysis of a session's team (recomputed only after an edit)"""
+    session = get_session_store().get(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    return session_response(session)
+
+@route('/api/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    import flask
+    if not get_session_store().close(session_id):
+        return session_not_found(session_id)
+    return flask.jsonify({'status': 'success'})
+
+@route('/api/sessions/<session_id>/members', methods=['POST'])
+def add_session_member(session_id):
+    """Add one member; only that member's facts and aggregates change"""
+    import flask
+    import team_sessions
+    session = get_session_store().get(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    data = flask.request.get_json(silent=True) or {}
+    pokemon = data.get('pokemon')
+    if not pokemon or not pokemon.get('name'):
+        return flask.jsonify({'status': 'error', 'message': 'No Pokemon provided'}), 400
+    
+    pokemon = PokemonTeamAdvisor().complete_team_data([pokemon])[0]
+    try:
+        with session.lock:
+            session.add(pokemon)
+    except team_sessions.SessionError as e:
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 400
+    return session_response(session)
+
+@route('/api/sessions/<session_id>/members/<name>', methods=['DELETE'])
+def remove_session_member(session_id, name):
+    """Remove one member by name; only that member's facts and aggregates change"""
+    import flask
+    import team_sessions
+    session = get_session_store().get(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    try:
+        with session.lock:
+            session.remove(name)
+    except team_sessions.SessionError as e:
+        return flask.jsonify({'status': 'error', 'message': str(e)}), 404
+    return session_response(session)
+
+@route('/api/sessions/stats', methods=['GET'])
+def session_stats():
+    """Active sessions, expiries and evictions"""
+    import flask
+    return flask.jsonify({'status': 'success', 'sessions': get_session_store().stats()})
+
+@route('/api/bootstrap', methods=['GET'])
+def bootstrap_bundle():
+    """Everything the page needs at load time in one gzipped, ETagged response
+
+    Plain requests revalidate every time (a warm page load is a single 304);
+    requests for ?v=<version> may be cached indefinitely.
+    """
+    import bootstrap
+    import flask
+    wait_until_ready()
+    bundle = get_bootstrap_bundle()
+    versioned = flask.request.args.get('v') == bundle.version
+    headers = {
+        'ETag': bundle.etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'public, max-age=31536000, immutable' if versioned else 'no-cache'
+    }
+    if bootstrap.etag_matches(flask.request.headers.get('If-None-Match'), bundle.etag):
+        return flask.Response(status=304, headers=headers)
+    # Quality > 0, so 'gzip;q=0' is a refusal
+    if flask.request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+        return flask.Response(bundle.gzipped, mimetype='application/json', headers=headers)
+    return flask.Response(bundle.body, mimetype='application/json', headers=headers)
+
+@route('/api/suggest', methods=['GET'])
+def suggest_species():
+    """Species names for the autocomplete box: prefix matches, then close misspellings"""
+    import flask
+    query = flask.request.args.get('q', '')
+    try:
+        limit = min(max(int(flask.request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return flask.jsonify({'status': 'error', 'message': 'limit must be an integer'}), 400
+    index = get_suggest_index()
+    started = time.perf_counter()
+    suggestions = index.suggest(query, limit)
+    took = time.perf_counter() - started
+    SUGGEST_SECONDS.observe(took)
+    return flask.jsonify({
+        'status': 'success',
+        'query': query,
+        'suggestions': suggestions,
+        'took_us': round(took * 1e6, 1)
+    })
+
+@route('/api/prolog/stats', methods=['GET'])
+def prolog_stats():
+    """Prolog engine pool size and time spent waiting for a context"""
+    import flask
+    return flask.jsonify({
+        'status': 'success',
+        'prolog_available': PROLOG_AVAILABLE,
+        'pool': PROLOG_POOL.stats() if PROLOG_POOL is not None else None
+    })
+
+@route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage timings and recommendation-path counters in Prometheus text format"""
+    import flask
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@route('/api/test-pokemon/<name>', methods=['GET'])
 def test_pokemon(name):
     """Test endpoint to check Pokémon data fetching"""
+    import flask
     advisor = PokemonTeamAdvisor()
     data = advisor.get_pokemon_data(name)
     if data:
-        return jsonify({'status': 'success', 'pokemon': data})
+        return flask.jsonify({'status': 'success', 'pokemon': data})
     else:
-        return jsonify({'status': 'error', 'message': f'Pokémon {name} not found'}), 404
+        return flask.jsonify({'status': 'error', 'message': f'Pokémon {name} not found'}), 404
+
+@route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Species and analysis cache hit/miss counters, and the mapped species table"""
+    import flask
+    table = get_species_table()
+    return flask.jsonify({
+        'status': 'success',
+        'species_cache': get_species_cache().stats(),
+        'analysis_cache': get_analysis_cache().stats(),
+        'species_table': table.stats_summary() if table is not None else None,
+        'smogon_formats': get_smogon_formats().stats()
+    })
    
-@app.route('/test', methods=['GET'])
+@route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once warm-up has finished, 503 before"""
+    import flask
+    body = {
+        'ready': is_ready(),
+        'prolog_available': PROLOG_AVAILABLE,
+        'startup_seconds': STARTUP_TIMINGS
+    }
+    return flask.jsonify(body), (200 if body['ready'] else 503)
+
+@route('/test', methods=['GET'])
 def test():
-    return jsonify({
+    import flask
+    return flask.jsonify({
         'message': 'Pokémon Logic Engine is working!',
         'prolog_available': PROLOG_AVAILABLE,
         'endpoints': {
             'test': 'GET /test',
+            'ready': 'GET /ready',
             'analyze': 'POST /api/analyze',
-            'test-pokemon': 'GET /api/test-pokemon/<name>'
+            'analyze-batch': 'POST /api/analyze/batch',
+            'complete': 'POST /api/complete',
+            'threats': 'POST /api/threats',
+            'bootstrap': 'GET /api/bootstrap',
+            'suggest': 'GET /api/suggest?q=<prefix>&limit=<n>',
+            'sessions': 'POST /api/sessions, GET|DELETE /api/sessions/<id>',
+            'session-members': 'POST /api/sessions/<id>/members, DELETE /api/sessions/<id>/members/<name>',
+            'test-pokemon': 'GET /api/test-pokemon/<name>',
+            'cache-stats': 'GET /api/cache/stats',
+            'prolog-stats': 'GET /api/prolog/stats',
+            'metrics': 'GET /metrics'
         }
     })   
     
-@app.route('/')
+@route('/')
 def serve_frontend():
-    return send_from_directory('.', 'pokemon.html')
+    import flask
+    return flask.send_from_directory('.', 'pokemon.html')
 
-@app.route('/<path:path>')
+@route('/<path:path>')
 def serve_static(path):
     """Serve static files (CSS, JS)"""
-    return send_from_directory('.', path)
+    import flask
+    return flask.send_from_directory('.', path)
+
+
+def create_app(warm='background'):
+    """Build the Flask app; warm may be 'background', 'blocking' or None"""
+    import flask
+    import responses
+    from flask_cors import CORS
+    
+    # No-op if the embedding server already configured logging
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    app = flask.Flask(__name__, static_folder='.')
+    app.json = responses.FastJSONProvider(app)
+    CORS(app)
+    app.after_request(lambda response: responses.compress_response(response, flask.request.accept_encodings))
+    for rule, view, options in _ROUTES:
+        app.add_url_rule(rule, view.__name__, view, **options)
+    
+    if warm == 'blocking':
+        start_warm_up(background=False)
+    elif warm == 'background':
+        start_warm_up(background=True)
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    """Build the default app the first time `inference_system.app` is used (e.g. by a WSGI server)"""
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+STARTUP_TIMINGS['import'] = round(time.perf_counter() - _IMPORT_STARTED, 4)
 
 
 if __name__ == '__main__':
+    # Warm up before serving so the status below is accurate
+    app = create_app(warm='blocking')
     print("=" * 60)
     print("Pokémon Team Builder - Knowledge Representation System")
     print("=" * 60)
     print(f"\nProlog Status: {'✓ Available' if PROLOG_AVAILABLE else '✗ Unavailable (using fallback)'}")
+    print(f"Rule engine: {'Prolog' if uses_prolog() else 'native (rule_engine.py)'}")
     if not PROLOG_AVAILABLE:
         print("\nTo enable Prolog features:")
         print("1. Install SWI-Prolog from: https://www.swi-prolog.org/download/stable")
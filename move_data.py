@@ -0,0 +1,204 @@
+# Static battle data for damage_calc: attacking moves, natures, items and abilities.
+#
+# Moves are the attacking moves common in Gen 9 OU sets. Multi-hit, always-crit and
+# conditional-power moves carry one expected power (Surging Strikes' three critical
+# 25s as 112, Knock Off against a held item as 97). Status moves and anything not
+# listed deal no damage.
+
+PHYSICAL = 0
+SPECIAL = 1
+
+# move id -> (type, category, power)
+MOVES = {
+    # normal
+    'bodyslam': ('normal', PHYSICAL, 85), 'doubleedge': ('normal', PHYSICAL, 120),
+    'extremespeed': ('normal', PHYSICAL, 80), 'facade': ('normal', PHYSICAL, 70),
+    'fakeout': ('normal', PHYSICAL, 40), 'quickattack': ('normal', PHYSICAL, 40),
+    'rapidspin': ('normal', PHYSICAL, 50), 'populationbomb': ('normal', PHYSICAL, 120),
+    'explosion': ('normal', PHYSICAL, 250), 'hypervoice': ('normal', SPECIAL, 90),
+    'boomburst': ('normal', SPECIAL, 140), 'terablast': ('normal', SPECIAL, 80),
+    'hyperbeam': ('normal', SPECIAL, 150), 'return': ('normal', PHYSICAL, 102),
+    # fire
+    'flamethrower': ('fire', SPECIAL, 90), 'fireblast': ('fire', SPECIAL, 110),
+    'overheat': ('fire', SPECIAL, 130), 'heatwave': ('fire', SPECIAL, 95),
+    'mysticalfire': ('fire', SPECIAL, 75), 'armorcannon': ('fire', SPECIAL, 120),
+    'torchsong': ('fire', SPECIAL, 80), 'magmastorm': ('fire', SPECIAL, 100),
+    'eruption': ('fire', SPECIAL, 150), 'blueflare': ('fire', SPECIAL, 130),
+    'flareblitz': ('fire', PHYSICAL, 120), 'firepunch': ('fire', PHYSICAL, 75),
+    'firefang': ('fire', PHYSICAL, 65), 'sacredfire': ('fire', PHYSICAL, 100),
+    'pyroball': ('fire', PHYSICAL, 120), 'bitterblade': ('fire', PHYSICAL, 90),
+    'temperflare': ('fire', PHYSICAL, 75),
+    # water
+    'surf': ('water', SPECIAL, 90), 'hydropump': ('water', SPECIAL, 110),
+    'scald': ('water', SPECIAL, 80), 'hydrosteam': ('water', SPECIAL, 80),
+    'waterspout': ('water', SPECIAL, 150), 'muddywater': ('water', SPECIAL, 90),
+    'originpulse': ('water', SPECIAL, 110), 'steameruption': ('water', SPECIAL, 110),
+    'chillingwater': ('water', SPECIAL, 50), 'wavecrash': ('water', PHYSICAL, 120),
+    'aquajet': ('water', PHYSICAL, 40), 'liquidation': ('water', PHYSICAL, 85),
+    'waterfall': ('water', PHYSICAL, 80), 'flipturn': ('water', PHYSICAL, 60),
+    'surgingstrikes': ('water', PHYSICAL, 112), 'jetpunch': ('water', PHYSICAL, 60),
+    'aquastep': ('water', PHYSICAL, 80), 'crabhammer': ('water', PHYSICAL, 100),
+    # electric
+    'thunderbolt': ('electric', SPECIAL, 90), 'thunder': ('electric', SPECIAL, 110),
+    'voltswitch': ('electric', SPECIAL, 70), 'discharge': ('electric', SPECIAL, 80),
+    'risingvoltage': ('electric', SPECIAL, 70), 'thunderclap': ('electric', SPECIAL, 70),
+    'electrodrift': ('electric', SPECIAL, 100), 'wildcharge': ('electric', PHYSICAL, 90),
+    'thunderpunch': ('electric', PHYSICAL, 75), 'supercellslam': ('electric', PHYSICAL, 100),
+    'plasmafists': ('electric', PHYSICAL, 100), 'boltstrike': ('electric', PHYSICAL, 130),
+    'nuzzle': ('electric', PHYSICAL, 20),
+    # grass
+    'gigadrain': ('grass', SPECIAL, 75), 'energyball': ('grass', SPECIAL, 90),
+    'leafstorm': ('grass', SPECIAL, 130), 'grassknot': ('grass', SPECIAL, 80),
+    'appleacid': ('grass', SPECIAL, 80), 'seedflare': ('grass', SPECIAL, 120),
+    'powerwhip': ('grass', PHYSICAL, 120), 'woodhammer': ('grass', PHYSICAL, 120),
+    'seedbomb': ('grass', PHYSICAL, 80), 'leafblade': ('grass', PHYSICAL, 90),
+    'hornleech': ('grass', PHYSICAL, 75), 'trailblaze': ('grass', PHYSICAL, 50),
+    'ivycudgel': ('grass', PHYSICAL, 100), 'bulletseed': ('grass', PHYSICAL, 75),
+    'flowertrick': ('grass', PHYSICAL, 105), 'grassyglide': ('grass', PHYSICAL, 70),
+    # ice
+    'icebeam': ('ice', SPECIAL, 90), 'blizzard': ('ice', SPECIAL, 110),
+    'freezedry': ('ice', SPECIAL, 70), 'icespinner': ('ice', PHYSICAL, 80),
+    'iciclecrash': ('ice', PHYSICAL, 85), 'iceshard': ('ice', PHYSICAL, 40),
+    'tripleaxel': ('ice', PHYSICAL, 120), 'icepunch': ('ice', PHYSICAL, 75),
+    'iciclespear': ('ice', PHYSICAL, 75), 'icefang': ('ice', PHYSICAL, 65),
+    'mountaingale': ('ice', PHYSICAL, 100), 'glaciallance': ('ice', PHYSICAL, 120),
+    # fighting
+    'closecombat': ('fighting', PHYSICAL, 120), 'drainpunch': ('fighting', PHYSICAL, 75),
+    'machpunch': ('fighting', PHYSICAL, 40), 'sacredsword': ('fighting', PHYSICAL, 90),
+    'bodypress': ('fighting', PHYSICAL, 80), 'collisioncourse': ('fighting', PHYSICAL, 100),
+    'axekick': ('fighting', PHYSICAL, 120), 'lowkick': ('fighting', PHYSICAL, 80),
+    'triplearrows': ('fighting', PHYSICAL, 90), 'highjumpkick': ('fighting', PHYSICAL, 130),
+    'superpower': ('fighting', PHYSICAL, 120), 'upperhand': ('fighting', PHYSICAL, 65),
+    'focusblast': ('fighting', SPECIAL, 120), 'aurasphere': ('fighting', SPECIAL, 80),
+    'vacuumwave': ('fighting', SPECIAL, 40),
+    # poison
+    'sludgebomb': ('poison', SPECIAL, 90), 'sludgewave': ('poison', SPECIAL, 95),
+    'malignantchain': ('poison', SPECIAL, 100), 'gunkshot': ('poison', PHYSICAL, 120),
+    'poisonjab': ('poison', PHYSICAL, 80), 'mortalspin': ('poison', PHYSICAL, 30),
+    'direclaw': ('poison', PHYSICAL, 80), 'barbbarrage': ('poison', PHYSICAL, 60),
+    # ground
+    'earthquake': ('ground', PHYSICAL, 100), 'headlongrush': ('ground', PHYSICAL, 120),
+    'highhorsepower': ('ground', PHYSICAL, 95), 'stompingtantrum': ('ground', PHYSICAL, 75),
+    'precipiceblades': ('ground', PHYSICAL, 120), 'thousandarrows': ('ground', PHYSICAL, 90),
+    'bulldoze': ('ground', PHYSICAL, 60), 'earthpower': ('ground', SPECIAL, 90),
+    'scorchingsands': ('ground', SPECIAL, 70), 'sandsearstorm': ('ground', SPECIAL, 100),
+    # flying
+    'bravebird': ('flying', PHYSICAL, 120), 'acrobatics': ('flying', PHYSICAL, 110),
+    'dualwingbeat': ('flying', PHYSICAL, 80), 'dragonascent': ('flying', PHYSICAL, 120),
+    'aerialace': ('flying', PHYSICAL, 60), 'hurricane': ('flying', SPECIAL, 110),
+    'airslash': ('flying', SPECIAL, 75), 'bleakwindstorm': ('flying', SPECIAL, 100),
+    'oblivionwing': ('flying', SPECIAL, 80),
+    # psychic
+    'psychic': ('psychic', SPECIAL, 90), 'psyshock': ('psychic', SPECIAL, 80),
+    'psychicnoise': ('psychic', SPECIAL, 75), 'futuresight': ('psychic', SPECIAL, 120),
+    'expandingforce': ('psychic', SPECIAL, 80), 'esperwing': ('psychic', SPECIAL, 80),
+    'luminacrash': ('psychic', SPECIAL, 80), 'psystrike': ('psychic', SPECIAL, 100),
+    'zenheadbutt': ('psychic', PHYSICAL, 80), 'psychocut': ('psychic', PHYSICAL, 70),
+    # bug
+    'uturn': ('bug', PHYSICAL, 70), 'leechlife': ('bug', PHYSICAL, 80),
+    'firstimpression': ('bug', PHYSICAL, 90), 'lunge': ('bug', PHYSICAL, 80),
+    'pounce': ('bug', PHYSICAL, 50), 'megahorn': ('bug', PHYSICAL, 120),
+    'xscissor': ('bug', PHYSICAL, 80), 'bugbuzz': ('bug', SPECIAL, 90),
+    # rock
+    'stoneedge': ('rock', PHYSICAL, 100), 'rockslide': ('rock', PHYSICAL, 75),
+    'headsmash': ('rock', PHYSICAL, 150), 'accelerock': ('rock', PHYSICAL, 40),
+    'saltcure': ('rock', PHYSICAL, 40), 'stoneaxe': ('rock', PHYSICAL, 65),
+    'rockblast': ('rock', PHYSICAL, 75), 'diamondstorm': ('rock', PHYSICAL, 100),
+    'powergem': ('rock', SPECIAL, 80), 'meteorbeam': ('rock', SPECIAL, 120),
+    # ghost
+    'shadowball': ('ghost', SPECIAL, 80), 'hex': ('ghost', SPECIAL, 65),
+    'astralbarrage': ('ghost', SPECIAL, 120), 'bittermalice': ('ghost', SPECIAL, 75),
+    'infernalparade': ('ghost', SPECIAL, 60), 'moongeistbeam': ('ghost', SPECIAL, 100),
+    'poltergeist': ('ghost', PHYSICAL, 110), 'shadowclaw': ('ghost', PHYSICAL, 70),
+    'shadowsneak': ('ghost', PHYSICAL, 40), 'phantomforce': ('ghost', PHYSICAL, 90),
+    'ragefist': ('ghost', PHYSICAL, 100), 'lastrespects': ('ghost', PHYSICAL, 100),
+    # dragon
+    'dracometeor': ('dragon', SPECIAL, 130), 'dragonpulse': ('dragon', SPECIAL, 85),
+    'dragonenergy': ('dragon', SPECIAL, 150), 'clangingscales': ('dragon', SPECIAL, 110),
+    'dynamaxcannon': ('dragon', SPECIAL, 100), 'corenforcer': ('dragon', SPECIAL, 100),
+    'spacialrend': ('dragon', SPECIAL, 100), 'ficklebeam': ('dragon', SPECIAL, 80),
+    'outrage': ('dragon', PHYSICAL, 120), 'dragonclaw': ('dragon', PHYSICAL, 80),
+    'dragondarts': ('dragon', PHYSICAL, 100), 'scaleshot': ('dragon', PHYSICAL, 75),
+    'dragontail': ('dragon', PHYSICAL, 60), 'glaiverush': ('dragon', PHYSICAL, 120),
+    'dragonhammer': ('dragon', PHYSICAL, 90), 'orderup': ('dragon', PHYSICAL, 80),
+    'breakingswipe': ('dragon', PHYSICAL, 60),
+    # dark
+    'knockoff': ('dark', PHYSICAL, 97), 'crunch': ('dark', PHYSICAL, 80),
+    'suckerpunch': ('dark', PHYSICAL, 70), 'kowtowcleave': ('dark', PHYSICAL, 85),
+    'throatchop': ('dark', PHYSICAL, 80), 'wickedblow': ('dark', PHYSICAL, 112),
+    'ceaselessedge': ('dark', PHYSICAL, 65), 'darkestlariat': ('dark', PHYSICAL, 85),
+    'nightslash': ('dark', PHYSICAL, 70), 'lashout': ('dark', PHYSICAL, 75),
+    'darkpulse': ('dark', SPECIAL, 80), 'fierywrath': ('dark', SPECIAL, 90),
+    'snarl': ('dark', SPECIAL, 55),
+    # steel
+    'ironhead': ('steel', PHYSICAL, 80), 'gigatonhammer': ('steel', PHYSICAL, 160),
+    'bulletpunch': ('steel', PHYSICAL, 40), 'heavyslam': ('steel', PHYSICAL, 80),
+    'meteormash': ('steel', PHYSICAL, 90), 'smartstrike': ('steel', PHYSICAL, 70),
+    'behemothblade': ('steel', PHYSICAL, 100), 'sunsteelstrike': ('steel', PHYSICAL, 100),
+    'spinout': ('steel', PHYSICAL, 100), 'gyroball': ('steel', PHYSICAL, 80),
+    'flashcannon': ('steel', SPECIAL, 80), 'makeitrain': ('steel', SPECIAL, 120),
+    'steelbeam': ('steel', SPECIAL, 140), 'tachyoncutter': ('steel', SPECIAL, 100),
+    # fairy
+    'moonblast': ('fairy', SPECIAL, 95), 'dazzlinggleam': ('fairy', SPECIAL, 80),
+    'alluringvoice': ('fairy', SPECIAL, 80), 'drainingkiss': ('fairy', SPECIAL, 50),
+    'strangesteam': ('fairy', SPECIAL, 90), 'fleurcannon': ('fairy', SPECIAL, 130),
+    'playrough': ('fairy', PHYSICAL, 90), 'spiritbreak': ('fairy', PHYSICAL, 75),
+}
+
+# Moves that use a stat other than the user's Attack / Sp. Atk and the target's Defense / Sp. Def
+ATTACK_WITH_DEFENSE = frozenset({'bodypress'})
+SPECIAL_VS_DEFENSE = frozenset({'psyshock'})
+
+STATS = ('hp', 'atk', 'def', 'spa', 'spd', 'spe')  # Smogon EV/IV keys, in STAT_ORDER order
+
+# nature -> (raised stat, lowered stat); neutral natures raise and lower nothing
+NATURES = {
+    'adamant': ('atk', 'spa'), 'bold': ('def', 'atk'), 'brave': ('atk', 'spe'),
+    'calm': ('spd', 'atk'), 'careful': ('spd', 'spa'), 'gentle': ('spd', 'def'),
+    'hasty': ('spe', 'def'), 'impish': ('def', 'spa'), 'jolly': ('spe', 'spa'),
+    'lax': ('def', 'spd'), 'lonely': ('atk', 'def'), 'mild': ('spa', 'def'),
+    'modest': ('spa', 'atk'), 'naive': ('spe', 'spd'), 'naughty': ('atk', 'spd'),
+    'quiet': ('spa', 'spe'), 'rash': ('spa', 'spd'), 'relaxed': ('def', 'spe'),
+    'sassy': ('spd', 'spe'), 'timid': ('spe', 'atk'),
+    'bashful': (None, None), 'docile': (None, None), 'hardy': (None, None),
+    'quirky': (None, None), 'serious': (None, None),
+}
+
+# item -> (stat, multiplier) applied to the holder's stat
+ITEM_STAT_BOOSTS = {
+    'choiceband': ('atk', 1.5), 'choicespecs': ('spa', 1.5), 'choicescarf': ('spe', 1.5),
+    'assaultvest': ('spd', 1.5),
+}
+# Eviolite boosts both defenses; only not-fully-evolved species hold it, so it is taken at its word
+EVIOLITE = 'eviolite'
+# item -> damage multiplier on every attack
+ITEM_DAMAGE = {'lifeorb': 1.3}
+EXPERT_BELT = 'expertbelt'  # 1.2x on super effective hits only
+# item -> type whose attacks it boosts by 1.2x
+TYPE_BOOST_ITEMS = {
+    'charcoal': 'fire', 'mysticwater': 'water', 'magnet': 'electric', 'miracleseed': 'grass',
+    'nevermeltice': 'ice', 'blackbelt': 'fighting', 'poisonbarb': 'poison', 'softsand': 'ground',
+    'sharpbeak': 'flying', 'twistedspoon': 'psychic', 'silverpowder': 'bug', 'hardstone': 'rock',
+    'spelltag': 'ghost', 'dragonfang': 'dragon', 'blackglasses': 'dark', 'metalcoat': 'steel',
+    'fairyfeather': 'fairy', 'silkscarf': 'normal',
+}
+
+# ability -> (stat, multiplier) applied to the holder's stat
+ABILITY_STAT_BOOSTS = {
+    'hugepower': ('atk', 2.0), 'purepower': ('atk', 2.0), 'gorillatactics': ('atk', 1.5),
+    'hustle': ('atk', 1.5),
+}
+ADAPTABILITY = 'adaptability'  # STAB 2x instead of 1.5x
+TECHNICIAN = 'technician'      # 1.5x for moves of 60 power or less
+# ability -> attacking types the holder takes no damage from
+ABILITY_IMMUNITIES = {
+    'levitate': ('ground',), 'eartheater': ('ground',), 'flashfire': ('fire',),
+    'wellbakedbody': ('fire',), 'waterabsorb': ('water',), 'stormdrain': ('water',),
+    'dryskin': ('water',), 'voltabsorb': ('electric',), 'lightningrod': ('electric',),
+    'motordrive': ('electric',), 'sapsipper': ('grass',),
+}
+
+
+def to_id(name):
+    """Showdown-style id: 'U-turn' -> 'uturn', 'Choice Band' -> 'choiceband'"""
+    return ''.join(c for c in name.lower() if c.isalnum())
@@ -2,29 +2,6 @@
     Authors: Zhengyao Huang, Manhattan Calabro
 */
 
-/*
-const typeChart = {
-    normal: { rock: 0.5, ghost: 0, steel: 0.5 },
-    fire: { fire: 0.5, water: 0.5, grass: 2, ice: 2, bug: 2, rock: 0.5, dragon: 0.5, steel: 2 },
-    water: { fire: 2, water: 0.5, grass: 0.5, ground: 2, rock: 2, dragon: 0.5 },
-    electric: { water: 2, electric: 0.5, grass: 0.5, ground: 0, flying: 2, dragon: 0.5 },
-    grass: { fire: 0.5, water: 2, grass: 0.5, poison: 0.5, ground: 2, flying: 0.5, bug: 0.5, rock: 2, dragon: 0.5, steel: 0.5 },
-    ice: { fire: 0.5, water: 0.5, grass: 2, ice: 0.5, ground: 2, flying: 2, dragon: 2, steel: 0.5 },
-    fighting: { normal: 2, ice: 2, poison: 0.5, flying: 0.5, psychic: 0.5, bug: 0.5, rock: 2, ghost: 0, dark: 2, steel: 2, fairy: 0.5 },
-    poison: { grass: 2, poison: 0.5, ground: 0.5, rock: 0.5, ghost: 0.5, steel: 0, fairy: 2 },
-    ground: { fire: 2, electric: 2, grass: 0.5, poison: 2, flying: 0, bug: 0.5, rock: 2, steel: 2 },
-    flying: { electric: 0.5, grass: 2, fighting: 2, bug: 2, rock: 0.5, steel: 0.5 },
-    psychic: { fighting: 2, poison: 2, psychic: 0.5, dark: 0, steel: 0.5 },
-    bug: { fire: 0.5, grass: 2, fighting: 0.5, poison: 0.5, flying: 0.5, psychic: 2, ghost: 0.5, dark: 2, steel: 0.5, fairy: 0.5 },
-    rock: { fire: 2, ice: 2, fighting: 0.5, ground: 0.5, flying: 2, bug: 2, steel: 0.5 },
-    ghost: { normal: 0, psychic: 2, ghost: 2, dark: 0.5 },
-    dragon: { dragon: 2, steel: 0.5, fairy: 0 },
-    dark: { fighting: 0.5, psychic: 2, ghost: 2, dark: 0.5, fairy: 0.5 },
-    steel: { fire: 0.5, water: 0.5, electric: 0.5, ice: 2, rock: 2, steel: 0.5, fairy: 2 },
-    fairy: { fire: 0.5, fighting: 2, poison: 0.5, dragon: 2, dark: 2, steel: 0.5 }
-};
-*/
-
 let slots = [{ id: 1, pokemon: null }];
 let nextId = 2;
 const maxTeamSize = 6;
@@ -32,6 +9,14 @@ let allPokemonNames = []; // For autocomplete
 
 // Load all Pokemon names for autocomplete
 async function loadPokemonNames() {
+    try {
+        const data = await loadBootstrap();
+        allPokemonNames = data.names;
+        console.log('✓ Loaded', allPokemonNames.length, 'Pokémon names for autocomplete');
+        return;
+    } catch (error) {
+        console.error('Failed to load bootstrap bundle, falling back to PokeAPI:', error);
+    }
     try {
         const response = await fetch('https://pokeapi.co/api/v2/pokemon?limit=1000');
         const data = await response.json();
@@ -88,6 +73,18 @@ function showAutocompleteSuggestions(input, suggestions) {
     input.parentElement.appendChild(suggestionsDiv);
 }
 
+// Ranked, typo-tolerant names from the server; plain prefix filter if it is unreachable
+async function suggestPokemonNames(value) {
+    try {
+        const response = await fetch(`http://127.0.0.1:5000/api/suggest?q=${encodeURIComponent(value)}&limit=10`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        return data.suggestions.map(s => s.name);
+    } catch (error) {
+        return allPokemonNames.filter(name => name.startsWith(value));
+    }
+}
+
 // Helper function to select a suggestion
 function selectSuggestion(input, name, suggestionsDiv) {
     input.value = name;
@@ -510,8 +507,12 @@ function attachSlotEventListeners() {
                 return;
             }
             
-            const matches = allPokemonNames.filter(name => name.startsWith(value));
-            showAutocompleteSuggestions(input, matches);
+            suggestPokemonNames(value).then(matches => {
+                // Drop answers for text the user has already typed past
+                if (input.value.toLowerCase().trim() === value) {
+                    showAutocompleteSuggestions(input, matches);
+                }
+            });
         });
 
         input.addEventListener('keydown', (e) => {
@@ -0,0 +1,209 @@
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get("PROLOG_POOL_SIZE", "4"))
+DEFAULT_CHECKOUT_TIMEOUT = float(os.environ.get("PROLOG_POOL_TIMEOUT", "30"))
+
+# PySwip 0.2.x initializes SWI-Prolog on the thread that imports it and does
+# not attach other Python threads to a Prolog engine, so every PySwip call
+# (the import included) runs on one owner thread. Calls from other threads
+# are handed to it and wait for the result, which also keeps them from ever
+# overlapping. Contexts keep each request's facts apart.
+_owner = None
+_owner_lock = threading.Lock()
+_owner_local = threading.local()
+
+
+def _mark_owner():
+    _owner_local.is_owner = True
+
+
+def _reset_owner():
+    # A forked child inherits the executor but not its thread
+    global _owner, _owner_lock
+    _owner = None
+    _owner_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_owner)
+
+
+def on_engine_thread(func, *args):
+    """func(*args) on the Prolog owner thread (inline when already on it)"""
+    global _owner
+    if getattr(_owner_local, 'is_owner', False):
+        return func(*args)
+    if _owner is None:
+        with _owner_lock:
+            if _owner is None:
+                _owner = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="prolog", initializer=_mark_owner)
+    return _owner.submit(func, *args).result()
+
+
+def run_query(prolog, goal):
+    """Run a goal on the shared engine, on the owner thread"""
+    return on_engine_thread(lambda: list(prolog.query(goal)))
+
+
+class PoolTimeout(Exception):
+    """Raised when no Prolog context becomes free before the checkout timeout"""
+
+
+class PrologContext:
+    """One isolated team context: a Prolog module holding a single team's facts"""
+
+    def __init__(self, prolog, module):
+        self.prolog = prolog
+        self.module = module
+
+    def query(self, goal):
+        """Run a goal inside this context and return all solutions"""
+        return run_query(self.prolog, f"{self.module}:({goal})")
+
+    def _call(self, predicate, build_argument):
+        """Call module:predicate(Arg), with Arg built as a term by build_argument()
+
+        The goal is built through PySwip's foreign interface rather than parsed
+        from a string, so names never need quoting or escaping.
+        """
+        def run():
+            from pyswip.core import PL_discard_foreign_frame, PL_open_foreign_frame
+            from pyswip.easy import Functor, call
+
+            frame = PL_open_foreign_frame()
+            try:
+                goal = Functor(":", 2)(self.module, Functor(predicate, 1)(build_argument()))
+                return bool(call(goal))
+            finally:
+                PL_discard_foreign_frame(frame)
+
+        return on_engine_thread(run)
+
+    @staticmethod
+    def _member_term(member):
+        from pyswip.easy import Functor
+
+        name, types, stats = member
+        pair = Functor("-", 2)
+        return Functor("pokemon", 3)(name, list(types), [pair(stat, int(value)) for stat, value in stats])
+
+    def load_team(self, members):
+        """Replace this context's team with one load_team/1 call
+
+        members is a list of (name, types, [(stat, value), ...]).
+        """
+        return self._call("load_team", lambda: [self._member_term(m) for m in members])
+
+    def add_member(self, member):
+        """Assert one (name, types, stats) member's facts, leaving the rest of the team alone"""
+        return self._call("add_member", lambda: self._member_term(member))
+
+    def remove_member(self, member):
+        """Retract exactly the facts add_member() asserted for this member"""
+        return self._call("remove_member", lambda: self._member_term(member))
+
+    def clear(self):
+        """Retract every team fact held by this context"""
+        self.query(f"user:clear_team_context({self.module})")
+
+
+class SessionContexts:
+    """Long-lived contexts for team sessions; module names are recycled, not leaked"""
+
+    def __init__(self, prolog, prefix="session_ctx"):
+        self.prolog = prolog
+        self.prefix = prefix
+        self._free = []
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            module = f"{self.prefix}_{self._created}"
+            self._created += 1
+        run_query(self.prolog, f"init_team_context({module})")
+        return PrologContext(self.prolog, module)
+
+    def release(self, context):
+        try:
+            context.clear()
+        except Exception as e:
+            log.warning("Prolog session context cleanup error: %s", e)
+            return
+        with self._lock:
+            self._free.append(context)
+
+    def stats(self):
+        with self._lock:
+            return {'created': self._created, 'free': len(self._free)}
+
+
+class PrologEnginePool:
+    """Fixed-size pool of team contexts with checkout/return and wait metrics
+
+    Contexts isolate each request's facts; they do not add parallelism, since
+    every call still runs on the one owner thread (see on_engine_thread).
+    """
+
+    def __init__(self, prolog, size=DEFAULT_POOL_SIZE):
+        self.size = size
+        self._free = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+        for i in range(size):
+            context = PrologContext(prolog, f"team_ctx_{i}")
+            run_query(prolog, f"init_team_context({context.module})")
+            self._free.put(context)
+
+    @contextmanager
+    def checkout(self, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        """Borrow a context for the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            context = self._free.get(timeout=timeout)
+        except queue.Empty:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No Prolog context free after {timeout}s")
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            yield context
+        finally:
+            # Never hand the next request a context that still holds this team
+            try:
+                context.clear()
+            except Exception as e:
+                log.warning("Prolog context cleanup error: %s", e)
+            self._free.put(context)
+
+    def stats(self):
+        """Pool size, availability and time spent waiting for a context"""
+        with self._stats_lock:
+            return {
+                'size': self.size,
+                'available': self._free.qsize(),
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0
+            }
@@ -0,0 +1,195 @@
+import gzip
+import json
+import os
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered
+    brotli = None
+
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+# Bodies smaller than this go out uncompressed: the headers cost more than the saving
+MIN_COMPRESS_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# Fast settings: responses are compressed per request, not once ahead of time
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "4"))
+COMPRESSIBLE = {'application/json', 'text/plain', 'text/html', 'text/css', 'text/javascript',
+                'application/javascript'}
+
+_BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+SERIALIZE_SECONDS = metrics.Histogram(
+    'response_serialize_seconds', 'Time to encode a JSON response body', ['encoder'])
+COMPRESS_SECONDS = metrics.Histogram(
+    'response_compress_seconds', 'Time to compress a response body', ['encoding'])
+RESPONSE_BYTES = metrics.Histogram(
+    'response_bytes', 'Response body bytes on the wire, by Content-Encoding', ['encoding'],
+    buckets=_BYTE_BUCKETS)
+
+
+def _compress_gzip(body):
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_brotli(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+# Preferred first when the client weighs them equally
+COMPRESSORS = {'br': _compress_brotli} if brotli is not None else {}
+COMPRESSORS['gzip'] = _compress_gzip
+
+
+def parse_fields(value):
+    """'a,b.c' (or ['a', 'b.c']) -> {'a': True, 'b': {'c': True}}; None when nothing was asked for
+
+    A key mapped to True is kept whole; a dict keeps only the listed sub-keys.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    tree = {}
+    for field in value:
+        parts = [p for p in str(field).strip().split('.') if p]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break  # already kept whole
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree or None
+
+
+def unknown_fields(fields, known):
+    """Dotted names in a parse_fields() tree that known (the same shape, leaves True) lacks"""
+    unknown = []
+    for key, sub in fields.items():
+        if key not in known:
+            unknown.append(key)
+        elif isinstance(sub, dict) and isinstance(known[key], dict):
+            unknown.extend(f"{key}.{name}" for name in unknown_fields(sub, known[key]))
+    return unknown
+
+
+def project(payload, fields, always=('status',)):
+    """The parts of payload named in a parse_fields() tree, plus the always keys"""
+    if fields is None:
+        return payload
+    result = {key: payload[key] for key in always if key in payload}
+    for key, sub in fields.items():
+        if key not in payload:
+            continue
+        value = payload[key]
+        result[key] = project(value, sub, always=()) if isinstance(sub, dict) and isinstance(value, dict) else value
+    return result
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider on orjson when it is installed, with encode time measured
+
+    Keys are not sorted. Anything orjson cannot encode natively goes through
+    Flask's default() hook, the same as with the standard encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def encode(self, obj, indent=False):
+        """obj as UTF-8 JSON bytes"""
+        if orjson is None:
+            if indent:
+                text = json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii, indent=2)
+            else:
+                text = json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                                  separators=(',', ':'))
+            return text.encode('utf-8')
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        started = time.perf_counter()
+        body = self.encode(obj, indent=indent)
+        elapsed = time.perf_counter() - started
+        SERIALIZE_SECONDS.observe(elapsed, encoder=ENCODER)
+        response = self._app.response_class(body + b'\n', mimetype=self.mimetype)
+        response.headers['Server-Timing'] = f"serialize;dur={elapsed * 1000:.3f}"
+        return response
+
+
+def negotiate(accept_encodings):
+    """The COMPRESSORS key the client accepts with the highest weight, or None for identity"""
+    return accept_encodings.best_match(list(COMPRESSORS))
+
+
+def compress_response(response, accept_encodings):
+    """Compress a buffered response in place for the negotiated encoding; records its size"""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = negotiate(accept_encodings) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        started = time.perf_counter()
+        body = COMPRESSORS[encoding](body)
+        elapsed = time.perf_counter() - started
+        COMPRESS_SECONDS.observe(elapsed, encoding=encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        timing = f"compress;dur={elapsed * 1000:.3f}"
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f"{existing}, {timing}" if existing else timing
+    RESPONSE_BYTES.observe(len(body), encoding=encoding or 'identity')
+    return response
+
+
+def measure(payloads, repeat=20):
+    """Encode time per payload (stdlib vs orjson) and mean body bytes per Content-Encoding"""
+    def mean_seconds(encode):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for payload in payloads:
+                encode(payload)
+        return (time.perf_counter() - started) / (repeat * len(payloads))
+
+    result = {'payloads': len(payloads),
+              'json_encode_us': mean_seconds(lambda p: json.dumps(p, separators=(',', ':')).encode('utf-8')) * 1e6}
+    if orjson is not None:
+        result['orjson_encode_us'] = mean_seconds(
+            lambda p: orjson.dumps(p, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)) * 1e6
+    bodies = [json.dumps(p, separators=(',', ':')).encode('utf-8') for p in payloads]
+    result['identity_bytes'] = sum(len(b) for b in bodies) / len(bodies)
+    for encoding, compress in COMPRESSORS.items():
+        started = time.perf_counter()
+        sizes = [len(compress(b)) for b in bodies]
+        result[f'{encoding}_compress_us'] = (time.perf_counter() - started) / len(bodies) * 1e6
+        result[f'{encoding}_bytes'] = sum(sizes) / len(sizes)
+    return result
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_SIZE", "10000"))
+
+
+def canonical_team(team_data):
+    """The team in a fixed order (by normalized name, then types/stats) so slot order never matters"""
+    def sort_key(pokemon):
+        name = str(pokemon.get('name', '')).lower().replace('-', '_').replace(' ', '_')
+        return (name,
+                sorted(str(t).lower() for t in pokemon.get('types', [])),
+                sorted((str(k), v) for k, v in (pokemon.get('stats') or {}).items()))
+    return sorted(team_data, key=sort_key)
+
+
+def team_fingerprint(team_data):
+    """Order-insensitive key: sorted normalized names plus their types and stats"""
+    members = []
+    for pokemon in canonical_team(team_data):
+        members.append([
+            str(pokemon.get('name', '')).lower().replace('-', '_').replace(' ', '_'),
+            sorted(str(t).lower() for t in pokemon.get('types', [])),
+            sorted((str(k), v) for k, v in (pokemon.get('stats') or {}).items())
+        ])
+    encoded = json.dumps(members, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    """Bounded LRU of analysis results, dropped whenever the data generation changes"""
+
+    def __init__(self, generation, max_entries=DEFAULT_MAX_ENTRIES):
+        # generation() returns something that changes when rules or data change
+        self.generation = generation
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_generation(self):
+        current = self.generation()
+        if current != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = current
+
+    def get(self, key):
+        with self._lock:
+            self._check_generation()
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """Store value; when generation is given (read before computing it), only if the data hasn't changed since"""
+        with self._lock:
+            self._check_generation()
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
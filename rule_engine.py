@@ -0,0 +1,444 @@
+"""Native Python mirror of the team predicates in team_rules.pl
+
+The facts (type relations, static species, viability, important types,
+required roles) are read out of team_rules.pl once per file version and
+turned into dicts, frozensets and per-type/per-role lists, so a request
+only does set lookups. recommend() returns the same list, in the same
+order, as recommend_pokemon/2 does over PySwip; rank() scores every
+candidate in a pool against the same team needs and keeps the best k.
+
+    python rule_engine.py --check [teams] [seed]
+
+runs both engines over generated teams and reports every difference
+(requires SWI-Prolog), and
+
+    python rule_engine.py --record tests/native_answers.json
+
+rewrites the native regression fixtures after an intended rules change.
+"""
+import heapq
+import os
+import random
+import re
+import sys
+
+from static_species import RELATION_FACT, RULES_PATH, load_static_species
+
+_IMPORTANT_FACT = re.compile(r"^important_coverage_type\((\w+)\)\.", re.MULTILINE)
+_REQUIRED_FACT = re.compile(r"^required_count\((\w+),\s*(\d+)\)\.", re.MULTILINE)
+_VIABLE_FACT = re.compile(r"^static_viable\((\w+)\)\.", re.MULTILINE)
+
+# Ranking weights
+W_COVERAGE = 3.0   # per missing important type the candidate brings
+W_RESIST = 1.0     # per team weakness it resists, times that weakness' severity
+W_ROLE = 2.0       # per missing required role it fills
+W_BST = 1.0        # scaled by BST / 600
+
+_cache = {}
+
+
+def name_key(name):
+    """name_key/2: lowercase, '-' read as '_'"""
+    return name.lower().replace('-', '_')
+
+
+def normalize_name(name):
+    """Same spelling PokemonTeamAdvisor asserts as current_pokemon/1"""
+    return name.lower().replace("'", "").replace("-", "_").replace(" ", "_").replace(".", "")
+
+
+def normalize_term(term):
+    """Same spelling PokemonTeamAdvisor asserts for types and stat names"""
+    return term.lower().replace("-", "_")
+
+
+def _has_role(stats):
+    """has_role/2 over one member's base_stat/3 facts ({stat: [values]})"""
+    def any_at_least(stat, minimum):
+        return any(v >= minimum for v in stats.get(stat, ()))
+
+    roles = set()
+    if any_at_least('attack', 100) and any_at_least('speed', 80):
+        roles.add('physical_sweeper')
+    if any_at_least('special_attack', 100) and any_at_least('speed', 80):
+        roles.add('special_sweeper')
+    if any_at_least('hp', 80) and any_at_least('defense', 80) and any_at_least('special_defense', 80):
+        roles.add('wall')
+    if any_at_least('hp', 90) and (any_at_least('defense', 70) or any_at_least('special_defense', 70)):
+        roles.add('tank')
+    return roles
+
+
+class RankedCandidate:
+    """What rank() needs to know about one candidate species"""
+    __slots__ = ('name', 'types', 'roles', 'resists', 'bst')
+
+    def __init__(self, name, types, roles, resists, bst):
+        self.name = name
+        self.types = types
+        self.roles = roles
+        self.resists = resists
+        self.bst = bst
+
+
+def build_pool(species_list, rules=None):
+    """RankedCandidates for species dicts (name, types, stats); first spelling of a name wins"""
+    rules = rules or load_rule_base()
+    return _build_pool(species_list, rules.resisted)
+
+
+def _build_pool(species_list, resisted):
+    seen = set()
+    pool = []
+    for pokemon in species_list:
+        name = normalize_name(pokemon['name'])
+        if name in seen or not pokemon.get('types'):
+            continue
+        seen.add(name)
+        types = frozenset(normalize_term(t) for t in pokemon['types'])
+        stats = pokemon.get('stats') or {}
+        roles = frozenset(_has_role({normalize_term(k): [v] for k, v in stats.items()}))
+        # pokemon_resists_type/2: any of its types resists or is immune
+        resists = frozenset().union(*(resisted.get(t, ()) for t in types))
+        pool.append(RankedCandidate(name, types, roles, resists, sum(stats.values())))
+    return pool
+
+
+class RuleBase:
+    """The static side of team_rules.pl, precomputed for lookups"""
+
+    def __init__(self, source, species):
+        self.important_types = tuple(_IMPORTANT_FACT.findall(source))
+        self.required_roles = tuple((role, int(count)) for role, count in _REQUIRED_FACT.findall(source))
+
+        super_effective = {}
+        resisted = {}
+        for relation, first, second in RELATION_FACT.findall(source):
+            if relation == 'super_effective':
+                super_effective.setdefault(first, set()).add(second)
+            else:
+                # resists(Defense, Attack) and immune(Defense, Attack) both count as resisting
+                resisted.setdefault(first, set()).add(second)
+        self.super_effective = {t: frozenset(d) for t, d in super_effective.items()}
+        self.resisted = {t: frozenset(a) for t, a in resisted.items()}
+
+        # static_viable/1 in file order; type_index/role_index keep that order per key
+        viable = []
+        for name in _VIABLE_FACT.findall(source):
+            if name in species and name not in viable:
+                viable.append(name)
+        self.viable = tuple(viable)
+        self.type_index = {}
+        self.role_index = {}
+        self.static_roles = {}
+        important = set(self.important_types)
+        self.important_viable = []
+        for name in viable:
+            types = species[name]['types']
+            for t in types:
+                self.type_index.setdefault(t, []).append(name)
+            stats = species[name]['stats']
+            roles = _has_role({normalize_term(k): [v] for k, v in stats.items()}) if stats else set()
+            self.static_roles[name] = frozenset(roles)
+            for role in roles:
+                self.role_index.setdefault(role, []).append(name)
+            if important.intersection(types):
+                self.important_viable.append(name)
+
+        # Default rank() pool: the static viable species
+        self.pool = _build_pool((species[name] for name in viable), self.resisted)
+
+
+def load_rule_base(path=RULES_PATH):
+    """RuleBase for the current version of team_rules.pl"""
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    rules = RuleBase(source, load_static_species(path))
+    _cache[path] = (mtime, rules)
+    return rules
+
+
+class TeamFacts:
+    """What load_team/1 would assert for a team: current_pokemon, has_type, base_stat"""
+    __slots__ = ('members', 'types', 'stats', 'keys')
+
+    def __init__(self, team_data):
+        self.members = []  # current_pokemon/1, duplicates kept
+        self.types = {}    # name -> [has_type/2 values]
+        self.stats = {}    # name -> {stat: [base_stat/3 values]}
+        for pokemon in team_data:
+            name = normalize_name(pokemon['name'])
+            self.members.append(name)
+            self.types.setdefault(name, []).extend(normalize_term(t) for t in pokemon.get('types', []))
+            stats = self.stats.setdefault(name, {})
+            for stat, value in (pokemon.get('stats') or {}).items():
+                stats.setdefault(normalize_term(stat), []).append(int(value))
+        self.keys = {name_key(name) for name in self.members}
+
+    def covered_types(self):
+        return {t for name in self.members for t in self.types[name]}
+
+    def already_on_team(self, name):
+        return name_key(name) in self.keys
+
+
+def needs_offensive_coverage(team, rules=None):
+    """Important types no member has, in important_coverage_type/1 order"""
+    rules = rules or load_rule_base()
+    covered = team.covered_types()
+    return [t for t in rules.important_types if t not in covered]
+
+
+def _weak_count(team, name, attack, rules):
+    """Solutions of pokemon_weak_to(name, attack): one per super-effective has_type fact"""
+    types = team.types[name]
+    if any(attack in rules.resisted.get(t, ()) for t in types):
+        return 0
+    hits = rules.super_effective.get(attack, ())
+    return sum(1 for t in types if t in hits)
+
+
+def team_weak_against(team, rules=None):
+    """[(attack_type, severity)] for important types with WeakCount > 0, as team_weak_against/2"""
+    rules = rules or load_rule_base()
+    total = len(team.members)
+    if total == 0:
+        return []
+    result = []
+    for attack in rules.important_types:
+        weak = sum(_weak_count(team, name, attack, rules) for name in team.members)
+        if weak > 0:
+            result.append((attack, weak / total * 4))
+    return result
+
+
+def needs_role(team, rules=None):
+    """Required roles the team has fewer than required_count/2 of"""
+    rules = rules or load_rule_base()
+    counts = {}
+    for name in team.members:
+        for role in _has_role(team.stats[name]):
+            counts[role] = counts.get(role, 0) + 1
+    return [role for role, minimum in rules.required_roles if counts.get(role, 0) < minimum]
+
+
+def static_recommend(team, rules=None):
+    """Yield (pokemon, explanation) in the order static_recommend/2 produces them"""
+    rules = rules or load_rule_base()
+    for t in needs_offensive_coverage(team, rules):
+        for name in rules.type_index.get(t, ()):
+            if not team.already_on_team(name):
+                yield name, f'Provides missing {t}-type coverage'
+    for role in needs_role(team, rules):
+        for name in rules.role_index.get(role, ()):
+            if not team.already_on_team(name):
+                yield name, f'Fills the missing {role} role'
+    for name in rules.important_viable:
+        if not team.already_on_team(name):
+            yield name, 'Strong competitive pick with good type coverage'
+
+
+def recommend(team_data, limit=5, rules=None):
+    """First `limit` distinct recommendations, shaped like query_recommendations' result"""
+    team = TeamFacts(team_data)
+    recommendations = []
+    seen = set()
+    for name, explanation in static_recommend(team, rules):
+        if name not in seen:
+            seen.add(name)
+            recommendations.append({'pokemon': name, 'explanation': explanation})
+            if len(recommendations) >= limit:
+                break
+    return recommendations
+
+
+def _explain(types, resisted, roles, bst):
+    parts = []
+    if types:
+        parts.append(f"Provides missing {', '.join(types)}-type coverage")
+    for attack, severity in resisted:
+        parts.append(f"Helps resist team weakness to {attack}-type attacks (severity: {severity:.1f})")
+    for role in roles:
+        parts.append(f"Fills the missing {role} role")
+    if not parts:
+        parts.append(f"Strong competitive pick (base stat total {bst})")
+    return '; '.join(parts)
+
+
+def rank(team_data, k=5, pool=None, rules=None, needs=None):
+    """Score every candidate in pool and return the k best, each with its breakdown
+
+    score = W_COVERAGE * missing important types it brings
+          + W_RESIST * severity of each team weakness it resists
+          + W_ROLE * missing roles it fills
+          + W_BST * BST / 600
+
+    needs is (needs_offensive_coverage, team_weak_against, needs_role) when the
+    caller already has them (e.g. from Prolog); otherwise they are derived here.
+    One pass over the pool plus a k-sized heap, so the cost is linear in the pool.
+    """
+    rules = rules or load_rule_base()
+    team = TeamFacts(team_data)
+    if needs is None:
+        needs = (needs_offensive_coverage(team, rules), team_weak_against(team, rules), needs_role(team, rules))
+    coverage, weak, roles = needs
+    coverage = frozenset(coverage)
+    weak = tuple(weak)
+    roles = frozenset(roles)
+    pool = rules.pool if pool is None else pool
+
+    def scores():
+        for index, c in enumerate(pool):
+            if team.already_on_team(c.name):
+                continue
+            score = (W_COVERAGE * len(coverage & c.types)
+                     + W_RESIST * sum(severity for attack, severity in weak if attack in c.resists)
+                     + W_ROLE * len(roles & c.roles)
+                     + W_BST * c.bst / 600)
+            yield score, index
+
+    # nlargest keeps pool order among equal scores
+    results = []
+    for score, index in heapq.nlargest(k, scores(), key=lambda entry: entry[0]):
+        c = pool[index]
+        types = [t for t in rules.important_types if t in coverage and t in c.types]
+        resisted = [(attack, severity) for attack, severity in weak if attack in c.resists]
+        filled = [role for role, _ in rules.required_roles if role in roles and role in c.roles]
+        results.append({
+            'pokemon': c.name,
+            'explanation': _explain(types, resisted, filled, c.bst),
+            'score': round(score, 3),
+            'breakdown': {
+                'coverage': round(W_COVERAGE * len(types), 3),
+                'weaknesses': round(W_RESIST * sum(severity for _, severity in resisted), 3),
+                'roles': round(W_ROLE * len(filled), 3),
+                'bst': round(W_BST * c.bst / 600, 3),
+                'types_filled': types,
+                'weaknesses_resisted': {attack: round(severity, 3) for attack, severity in resisted},
+                'roles_filled': filled,
+                'base_stat_total': c.bst
+            }
+        })
+    return results
+
+
+# ----- equivalence check against Prolog -----
+
+def generate_teams(count, seed=0):
+    """Teams of 1-6 members: static species plus off-table names with random types and stats"""
+    rng = random.Random(seed)
+    species = [s for s in load_static_species().values() if s['types'] and s['stats']]
+    type_names = sorted({t for s in species for t in s['types']})
+    stat_names = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+    teams = []
+    for i in range(count):
+        team = []
+        for j in range(rng.randint(1, 6)):
+            if rng.random() < 0.7:
+                s = rng.choice(species)
+                team.append({'name': s['name'].replace('_', '-'), 'types': list(s['types']),
+                             'stats': dict(s['stats'])})
+            else:
+                team.append({'name': f'synthetic-{i}-{j}',
+                             'types': rng.sample(type_names, rng.randint(1, 2)),
+                             'stats': {stat: rng.randint(40, 150) for stat in stat_names}})
+        teams.append(team)
+    return teams
+
+
+def _start_prolog():
+    import inference_system
+
+    if not inference_system.init_prolog():
+        raise RuntimeError("SWI-Prolog is not available")
+    return inference_system.PokemonTeamAdvisor()
+
+
+def prolog_answers(advisor, team_data):
+    """Prolog's answers for one team: recommend_pokemon/2 (first 5 distinct) and the helper predicates"""
+    import inference_system
+
+    with inference_system.PROLOG_POOL.checkout() as context:
+        advisor.add_team_to_prolog(team_data, context)
+        recommendations = []
+        for r in context.query("recommend_pokemon(P, E)"):
+            entry = {'pokemon': str(r['P']), 'explanation': str(r['E'])}
+            if len(recommendations) < 5 and all(e['pokemon'] != entry['pokemon'] for e in recommendations):
+                recommendations.append(entry)
+        return {
+            'recommend': recommendations,
+            'needs_offensive_coverage': [str(r['T']) for r in context.query("needs_offensive_coverage(T)")],
+            'needs_role': [str(r['R']) for r in context.query("needs_role(R)")],
+            'team_weak_against': sorted([str(r['A']), round(float(r['S']), 6)]
+                                        for r in context.query("team_weak_against(A, S)"))
+        }
+
+
+def native_answers(team_data, rules=None):
+    """The same answers as prolog_answers(), from this module"""
+    rules = rules or load_rule_base()
+    team = TeamFacts(team_data)
+    return {
+        'recommend': recommend(team_data, rules=rules),
+        'needs_offensive_coverage': needs_offensive_coverage(team, rules),
+        'needs_role': needs_role(team, rules),
+        'team_weak_against': sorted([a, round(s, 6)] for a, s in team_weak_against(team, rules))
+    }
+
+
+def check_against_prolog(count=2000, seed=0):
+    """Compare recommend() and the helper predicates with Prolog; returns the mismatches
+
+    rank() only consumes the helper predicates, so matching them means the
+    ranked lists match as well.
+    """
+    advisor = _start_prolog()
+    rules = load_rule_base()
+    mismatches = []
+    for team_data in generate_teams(count, seed):
+        expected = prolog_answers(advisor, team_data)
+        actual = native_answers(team_data, rules)
+        for predicate, prolog_answer in expected.items():
+            if prolog_answer != actual[predicate]:
+                mismatches.append({'team': team_data, 'predicate': predicate,
+                                   'prolog': prolog_answer, 'native': actual[predicate]})
+    return mismatches
+
+
+def record_native_answers(path):
+    """Re-run the teams in a regression fixtures file (tests/native_answers.json) through native_answers()"""
+    import json
+
+    rules = load_rule_base()
+    with open(path, 'r', encoding='utf-8') as f:
+        fixtures = json.load(f)
+    for case in fixtures['cases']:
+        case['answers'] = native_answers(case['team'], rules)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fixtures, f, indent=2)
+        f.write('\n')
+    return len(fixtures['cases'])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--record':
+        print(f"✓ Recorded native answers for {record_native_answers(sys.argv[2])} teams")
+        sys.exit(0)
+    if len(sys.argv) < 2 or sys.argv[1] != '--check':
+        print("Usage: python rule_engine.py --check [teams] [seed] | --record answers.json")
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    try:
+        mismatches = check_against_prolog(count, seed)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(2)
+    for m in mismatches[:20]:
+        print(f"✗ {m['predicate']}: prolog={m['prolog']} native={m['native']}\n  team={m['team']}")
+    print(f"{'✓' if not mismatches else '✗'} {count} teams, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,153 @@
+"""Pre-fork multi-process server
+
+    python serve.py                      # one worker per CPU on 127.0.0.1:5000
+    python serve.py --workers 4 --port 8000
+    python serve.py --workers 1          # single process (also the default without os.fork)
+
+The parent loads the read-only data (rules, species snapshot and table, Smogon
+sets and every index built from them) and binds the socket, then forks. Workers
+share that data copy-on-write. Each worker starts its own SWI-Prolog engine and
+Smogon refresh thread after the fork, since neither survives one, and answers a
+few warm-up requests before it starts accepting connections. Workers that die
+are replaced.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import inference_system
+
+DEFAULT_WORKERS = int(os.environ.get("WEB_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+# A worker that dies sooner than this after starting is respawned only after a pause
+RESPAWN_BACKOFF_SECONDS = 1.0
+
+# Requests each worker answers before it accepts traffic: every route's first call
+# imports modules and fills per-process caches that the parent did not
+WARM_REQUESTS = (
+    ('POST', '/api/analyze', {'team': [{'name': 'garchomp'}, {'name': 'corviknight'}, {'name': 'gholdengo'}]}),
+    ('POST', '/api/threats', {'team': [{'name': 'garchomp'}]}),
+    ('GET', '/api/suggest?q=gar', None),
+    ('GET', '/api/bootstrap', None),
+)
+
+
+def bind(host, port, backlog=1024):
+    """The listening socket every worker accepts on"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def warm_worker(app):
+    """Start this process's Prolog engine and send WARM_REQUESTS through the app"""
+    inference_system.warm_up()
+    client = app.test_client()
+    for method, path, body in WARM_REQUESTS:
+        response = client.open(path, method=method, json=body)
+        if response.status_code >= 500:
+            print(f"  ✗ Warm-up request {method} {path} failed ({response.status_code})")
+
+
+def run_worker(app, sock, threads):
+    """Warm up, then serve on the inherited socket until SIGTERM"""
+    from werkzeug.serving import make_server
+
+    # Ctrl+C reaches the whole process group; the parent decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warm_worker(app)
+    server = make_server(*sock.getsockname()[:2], app, threaded=threads > 1, fd=sock.fileno())
+    # shutdown() waits for serve_forever() to return, so it cannot run on the serving thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"✓ Worker {os.getpid()} ready")
+    server.serve_forever()
+    inference_system.get_species_cache().flush()
+
+
+def serve_single(host, port):
+    """The old single-process server, warmed before it binds"""
+    app = inference_system.create_app(warm='blocking')
+    app.run(debug=False, port=port, host=host, threaded=True)
+
+
+def serve(host, port, workers, threads=DEFAULT_THREADS):
+    if workers <= 1 or not hasattr(os, 'fork'):
+        serve_single(host, port)
+        return
+
+    app = inference_system.create_app(warm=None)
+    started = time.perf_counter()
+    inference_system.warm_shared()
+    print(f"✓ Shared data loaded in {time.perf_counter() - started:.2f}s; starting {workers} workers")
+    sock = bind(host, port)
+
+    children = {}  # pid -> start time
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(app, sock, threads)
+            except BaseException as e:
+                print(f"✗ Worker {os.getpid()} failed: {e}")
+                status = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"✓ Serving on http://{host}:{port}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started_at = children.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        print(f"✗ Worker {pid} exited ({os.waitstatus_to_exitcode(status)}); starting a replacement")
+        if time.monotonic() - started_at < RESPAWN_BACKOFF_SECONDS:
+            time.sleep(RESPAWN_BACKOFF_SECONDS)
+        spawn()
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='worker processes (default: WEB_WORKERS or the CPU count)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help='request threads per worker (default: WEB_THREADS or 8)')
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == '__main__':
+    main()
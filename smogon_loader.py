@@ -1,79 +1,378 @@
 import requests
+import itertools
 import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from species_cache import DATA_DIR
+from team_completion import species_roles
+
+log = logging.getLogger(__name__)
+
+SMOGON_URL_TEMPLATE = "https://pkmn.github.io/smogon/data/sets/{format}.json"
+DEFAULT_FORMAT = os.environ.get("SMOGON_FORMAT", "gen9ou")
+SMOGON_URL = SMOGON_URL_TEMPLATE.format(format=DEFAULT_FORMAT)
+DEFAULT_SNAPSHOT_DIR = os.environ.get("SMOGON_SNAPSHOT_DIR", os.path.join(DATA_DIR, "smogon_snapshots"))
+DEFAULT_REFRESH_INTERVAL = int(os.environ.get("SMOGON_REFRESH_INTERVAL", str(6 * 3600)))
+# Parsed formats kept in memory at once (estimated), default format included
+DEFAULT_MEMORY_BUDGET = int(float(os.environ.get("SMOGON_MEMORY_BUDGET_MB", "64")) * 1024 * 1024)
+# A format that failed to load is not tried again for this many seconds
+DEFAULT_FAILURE_TTL = float(os.environ.get("SMOGON_FORMAT_RETRY_SECONDS", "300"))
+
+# Tiers Smogon publishes sets for, in every generation; SMOGON_EXTRA_FORMATS adds
+# full format ids (comma separated), and formats with a local snapshot are known too
+KNOWN_TIERS = ('ubers', 'ou', 'uu', 'ru', 'nu', 'pu', 'zu', 'lc', 'monotype', 'cap', '1v1', 'anythinggoes',
+               'doublesou', 'doublesubers', 'doublesuu', 'nationaldex', 'nationaldexubers',
+               'nationaldexuu', 'nationaldexmonotype')
+EXTRA_FORMATS = tuple(f.strip().lower() for f in os.environ.get("SMOGON_EXTRA_FORMATS", "").split(',')
+                      if f.strip())
+
+_FORMAT_ID = re.compile(r"^gen([1-9])([a-z0-9]{1,40})$")
+# Versions are unique across loaders, so a reloaded format never reuses an old version
+_versions = itertools.count(1)
+
+
+class UnknownFormat(ValueError):
+    """A format id that is malformed or has no sets locally or upstream"""
+
+
+def normalize_format(format_id):
+    """'Gen9 UU' / 'gen9uu' -> 'gen9uu'; raises UnknownFormat for anything that is not a format id"""
+    normalized = ''.join(c for c in str(format_id).lower() if c.isalnum())
+    if not _FORMAT_ID.match(normalized):
+        raise UnknownFormat(f"Not a Smogon format id: {format_id!r}")
+    return normalized
+
+
+def estimate_size(obj):
+    """Approximate bytes held by a parsed JSON tree (containers, keys and leaves)"""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+
+# Keyword -> role, matched against Smogon set names (get_pokemon_roles)
+SET_NAME_ROLES = (
+    (('offensive', 'sweeper', 'attacker', 'wallbreaker'), 'sweeper'),
+    (('defensive', 'wall', 'tank', 'support'), 'wall'),
+    (('pivot', 'utility', 'cleric'), 'support'),
+    (('setup', 'dd', 'swords dance', 'nasty plot'), 'setup_sweeper'),
+    (('choice', 'scarf', 'band', 'specs'), 'revenge_killer'),
+)
+# The role index uses the stat-derived roles (team_completion.ROLE_NAMES);
+# get_viable_recommendations still accepts the set-name roles as these aliases
+SET_ROLE_ALIASES = {
+    'sweeper': ('physical_sweeper', 'special_sweeper'),
+    'setup_sweeper': ('physical_sweeper', 'special_sweeper'),
+    'revenge_killer': ('physical_sweeper', 'special_sweeper'),
+    'wall': ('wall',),
+    'support': ('wall', 'tank'),
+}
+
+
+def set_name_roles(sets):
+    """Roles implied by the names of a species' Smogon sets"""
+    roles = set()
+    for set_name in sets:
+        set_lower = set_name.lower()
+        for keywords, role in SET_NAME_ROLES:
+            if any(x in set_lower for x in keywords):
+                roles.add(role)
+    return roles
+
+
+def iter_bits(bits):
+    """Yield the positions of the set bits in an int bitset"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def normalize_smogon_name(name):
+    """Lookup key shared by Smogon ('Great Tusk'), PokeAPI ('great-tusk') and Prolog ('great_tusk') names"""
+    return (name.lower().replace('-', '').replace('_', '').replace(' ', '')
+            .replace("'", '').replace('.', '').replace(':', ''))
+
+
+class _SmogonState:
+    """One loaded copy of the data plus its name index; replaced whole, never mutated"""
+    __slots__ = ('smogon_sets', 'viable_pokemon', 'name_index', 'set_roles', 'etag', 'last_modified',
+                 'fetched_at', 'derived')
+
+    def __init__(self, smogon_sets=None, etag=None, last_modified=None, fetched_at=None):
+        self.smogon_sets = smogon_sets or {}
+        self.viable_pokemon = set(self.smogon_sets.keys())
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+        # Exact normalized names first; the base species ("landorus" for
+        # "Landorus-Therian") only fills keys that are not already taken
+        index = {normalize_smogon_name(name): name for name in self.smogon_sets}
+        for name in self.smogon_sets:
+            base = normalize_smogon_name(name.split('-')[0])
+            index.setdefault(base, name)
+        self.name_index = index
+        self.set_roles = {name: frozenset(set_name_roles(sets)) for name, sets in self.smogon_sets.items()}
+        self.derived = {}  # SmogonDataLoader.derived() results for this data
+
+
+class SpeciesIndex:
+    """role -> species and type -> species bitsets over one format's species, one bit per ordinal
+
+    Types and base-stat roles (team_completion.ROLE_NAMES) come from species
+    data, so SmogonDataLoader.species_index() rebuilds this whenever the sets
+    or the species data change. Species without data are in neither index.
+    """
+
+    def __init__(self, smogon_sets, species_lookup=None):
+        self.species = sorted(smogon_sets)
+        self.set_counts = [len(smogon_sets[name]) for name in self.species]
+        self.species_roles = []
+        self.species_types = []
+        role_index = {}
+        type_index = {}
+
+        for ordinal, name in enumerate(self.species):
+            bit = 1 << ordinal
+            data = species_lookup(name) if species_lookup else None
+            types = frozenset(data.get('types') or ()) if data else frozenset()
+            roles = frozenset(species_roles(data['stats'])) if data and data.get('stats') else frozenset()
+            self.species_roles.append(roles)
+            self.species_types.append(types)
+            for role in roles:
+                role_index[role] = role_index.get(role, 0) | bit
+            for t in types:
+                type_index[t] = type_index.get(t, 0) | bit
+
+        self.role_index = role_index
+        self.type_index = type_index
+
+    def query(self, missing_types=None, missing_roles=None, limit=10):
+        """Species with any of missing_types AND any of missing_roles, best matches first
+
+        Either filter is skipped when not given. Ranked by how many of the
+        requested types and roles each one matches, then by how many sets
+        Smogon lists.
+        """
+        missing_types = set(missing_types or ())
+        missing_roles = set(missing_roles or ())
+        candidates = (1 << len(self.species)) - 1
+        if missing_types:
+            type_bits = 0
+            for t in missing_types:
+                type_bits |= self.type_index.get(t, 0)
+            candidates &= type_bits
+        if missing_roles:
+            role_bits = 0
+            for role in missing_roles:
+                role_bits |= self.role_index.get(role, 0)
+            candidates &= role_bits
+
+        ranked = []
+        for ordinal in iter_bits(candidates):
+            hits = (len(self.species_types[ordinal] & missing_types)
+                    + len(self.species_roles[ordinal] & missing_roles))
+            ranked.append((-hits, -self.set_counts[ordinal], self.species[ordinal]))
+        ranked.sort()
+        return [name for _, _, name in ranked[:limit]]
+
 
 class SmogonDataLoader:
-    def __init__(self):
-        self.smogon_url = "https://pkmn.github.io/smogon/data/sets/gen9ou.json"
-        self.smogon_sets = {}
-        self.viable_pokemon = set()
-        
-    def load_smogon_data(self):
-        """Load Smogon Gen9 OU competitive sets"""
+    def __init__(self, smogon_url=None, snapshot_dir=DEFAULT_SNAPSHOT_DIR, offline=None,
+                 format_id=DEFAULT_FORMAT, species_lookup=None, species_version=None):
+        self.format_id = format_id
+        self.smogon_url = smogon_url or SMOGON_URL_TEMPLATE.format(format=format_id)
+        self.snapshot_dir = snapshot_dir
+        # name -> {'types': [...], 'stats': {...}} or None, and a callable returning a
+        # number that changes with that data; they feed species_index()
+        self.species_lookup = species_lookup
+        self.species_version = species_version
+        if offline is None:
+            offline = os.environ.get("POKEMON_OFFLINE", "0") == "1"
+        self.offline = offline
+        self._state = _SmogonState()
+        self.version = 0  # bumped on every state swap so dependents can tell the data changed
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._stop_refresh = threading.Event()
+
+    # Readers always see one consistent state object
+    @property
+    def smogon_sets(self):
+        return self._state.smogon_sets
+
+    @property
+    def viable_pokemon(self):
+        return self._state.viable_pokemon
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.snapshot_dir, os.path.basename(self.smogon_url))
+
+    def _publish(self, state):
+        # Atomic swap: readers keep whichever state they already hold
+        self._state = state
+        self.version = next(_versions)
+
+    def derived(self, name, version, build):
+        """build(self), memoized on the current data and version
+
+        Pools and arrays computed from the sets live here, so they are dropped
+        with the data when it is refreshed or the format is evicted. version is
+        whatever else the result depends on (compared with ==); a new version
+        replaces the entry kept under name.
+        """
+        cache = self._state.derived
+        entry = cache.get(name)
+        if entry is None or entry[0] != version:
+            entry = (version, build(self))
+            cache[name] = entry
+        return entry[1]
+
+    def load_snapshot(self):
+        """Load the last downloaded copy from disk"""
+        path = self.snapshot_path
+        if not os.path.exists(path):
+            return False
         try:
-            print("Loading Smogon Gen9 OU data...")
-            response = requests.get(self.smogon_url)
-            if response.status_code == 200:
-                self.smogon_sets = response.json()
-                self.viable_pokemon = set(self.smogon_sets.keys())
-                print(f"✓ Loaded {len(self.viable_pokemon)} viable Pokemon from Smogon Gen9 OU")
-                return True
-            else:
-                print(f"✗ Failed to load Smogon data: {response.status_code}")
-                return False
+            with open(path, 'r', encoding='utf-8') as f:
+                sets = json.load(f)
+            meta = {}
+            if os.path.exists(path + ".meta"):
+                with open(path + ".meta", 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+        except Exception as e:
+            log.warning("Could not read Smogon snapshot %s: %s", path, e)
+            return False
+        self._publish(_SmogonState(sets, meta.get('etag'), meta.get('last_modified'), meta.get('fetched_at')))
+        log.info("Loaded %d viable Pokemon from snapshot %s", len(self.viable_pokemon), os.path.basename(path))
+        return True
+
+    def _save_snapshot(self, raw, state):
+        """Write the raw download and its validators next to each other, atomically"""
+        path = self.snapshot_path
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(path + ".tmp", 'wb') as f:
+                f.write(raw)
+            os.replace(path + ".tmp", path)
+            with open(path + ".meta.tmp", 'w', encoding='utf-8') as f:
+                json.dump({'etag': state.etag, 'last_modified': state.last_modified,
+                           'fetched_at': state.fetched_at, 'url': self.smogon_url}, f)
+            os.replace(path + ".meta.tmp", path + ".meta")
         except Exception as e:
-            print(f"✗ Error loading Smogon data: {e}")
+            log.warning("Could not write Smogon snapshot %s: %s", path, e)
+
+    def refresh(self):
+        """Conditionally re-download the sets; returns True if new data was swapped in"""
+        if self.offline:
             return False
-    
+        with self._refresh_lock:
+            current = self._state
+            headers = {}
+            if current.etag:
+                headers['If-None-Match'] = current.etag
+            if current.last_modified:
+                headers['If-Modified-Since'] = current.last_modified
+            try:
+                response = requests.get(self.smogon_url, headers=headers, timeout=10)
+            except Exception as e:
+                log.warning("Error refreshing Smogon %s data: %s", self.format_id, e)
+                return False
+
+            if response.status_code == 304:
+                log.debug("Smogon %s data unchanged (304)", self.format_id)
+                return False
+            if response.status_code != 200:
+                log.warning("Failed to load Smogon %s data: HTTP %d", self.format_id, response.status_code)
+                return False
+
+            state = _SmogonState(response.json(),
+                                 response.headers.get('ETag'),
+                                 response.headers.get('Last-Modified'),
+                                 time.time())
+            self._publish(state)
+            self._save_snapshot(response.content, state)
+            log.info("Loaded %d viable Pokemon from Smogon %s", len(state.viable_pokemon), self.format_id)
+            return True
+
+    def load_smogon_data(self):
+        """Load this format's competitive sets (snapshot first, then a conditional refresh)"""
+        log.debug("Loading Smogon %s data...", self.format_id)
+        had_snapshot = self.load_snapshot()
+        refreshed = self.refresh()
+        return had_snapshot or refreshed
+
+    def start_background_refresh(self, interval=DEFAULT_REFRESH_INTERVAL):
+        """Re-check upstream every interval seconds on a daemon thread"""
+        if self.offline or self._refresh_thread is not None:
+            return
+
+        def loop():
+            while not self._stop_refresh.wait(interval):
+                self.refresh()
+
+        self._refresh_thread = threading.Thread(target=loop, name="smogon-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_refresh.set()
+
+    def find_smogon_name(self, pokemon_name):
+        """Smogon's spelling of a name (exact or base species match), or None"""
+        return self._state.name_index.get(normalize_smogon_name(pokemon_name))
+
     def is_viable(self, pokemon_name):
-        """Check if a Pokemon is in Gen9 OU"""
-        # Normalize name (Smogon uses different formatting)
-        normalized = pokemon_name.lower().replace('-', '').replace(' ', '')
-        
-        for smogon_name in self.viable_pokemon:
-            if normalized in smogon_name.lower().replace('-', ''):
-                return True
-        return False
-    
+        """Check if a Pokemon has sets in this format"""
+        return normalize_smogon_name(pokemon_name) in self._state.name_index
+
+    def species_index(self):
+        """SpeciesIndex of the current sets, rebuilt when they or the species data change"""
+        version = self.species_version() if self.species_version else 0
+        return self.derived('species_index', version,
+                            lambda loader: SpeciesIndex(loader.smogon_sets, loader.species_lookup))
+
     def get_pokemon_roles(self, pokemon_name):
         """Get roles for a specific Pokemon from Smogon sets"""
+        state = self._state
+        name = pokemon_name if pokemon_name in state.set_roles else self.find_smogon_name(pokemon_name)
+        roles = state.set_roles.get(name)
+        return sorted(roles) if roles else ['balanced']
+
+    def get_viable_recommendations(self, missing_types=None, missing_roles=None, limit=10, index=None):
+        """Get Pokemon recommendations from Smogon OU that fit criteria
+
+        Species with any of missing_types AND any of missing_roles, ranked (see
+        SpeciesIndex.query). Roles are team_completion.ROLE_NAMES; the older
+        set-name roles ('sweeper', 'support', ...) are read as SET_ROLE_ALIASES.
+        index defaults to species_index().
+        """
         roles = set()
-        
-        if pokemon_name in self.smogon_sets:
-            sets = self.smogon_sets[pokemon_name]
-            
-            for set_name, set_data in sets.items():
-                set_lower = set_name.lower()
-                
-                # Identify roles from set names
-                if any(x in set_lower for x in ['offensive', 'sweeper', 'attacker', 'wallbreaker']):
-                    roles.add('sweeper')
-                if any(x in set_lower for x in ['defensive', 'wall', 'tank', 'support']):
-                    roles.add('wall')
-                if any(x in set_lower for x in ['pivot', 'utility', 'cleric']):
-                    roles.add('support')
-                if any(x in set_lower for x in ['setup', 'dd', 'swords dance', 'nasty plot']):
-                    roles.add('setup_sweeper')
-                if any(x in set_lower for x in ['choice', 'scarf', 'band', 'specs']):
-                    roles.add('revenge_killer')
-        
-        return list(roles) if roles else ['balanced']
-    
-    def get_viable_recommendations(self, missing_types=None, missing_roles=None):
-        """Get Pokemon recommendations from Smogon OU that fit criteria"""
-        recommendations = []
-        
-        for pokemon_name in self.viable_pokemon:
-            # This would need Pokemon type data - integrate with your PokeAPI calls
-            # For now, just return viable Pokemon names
-            recommendations.append(pokemon_name)
-        
-        return recommendations[:10]  # Return top 10
-    
+        for role in missing_roles or ():
+            roles.update(SET_ROLE_ALIASES.get(role, (role,)))
+        index = index or self.species_index()
+        return index.query(missing_types, roles, limit)
+
     def get_pokemon_set_info(self, pokemon_name):
         """Get detailed set information for a Pokemon"""
         if pokemon_name not in self.smogon_sets:
             return None
-        
+
         sets = self.smogon_sets[pokemon_name]
         set_info = {
             'name': pokemon_name,
@@ -81,7 +380,7 @@ class SmogonDataLoader:
             'roles': self.get_pokemon_roles(pokemon_name),
             'sets': {}
         }
-        
+
         for set_name, set_data in sets.items():
             set_info['sets'][set_name] = {
                 'item': set_data.get('item'),
@@ -90,5 +389,123 @@ class SmogonDataLoader:
                 'evs': set_data.get('evs'),
                 'moves': set_data.get('moves', [])
             }
-        
-        return set_info
\ No newline at end of file
+
+        return set_info
+
+
+class SmogonFormats:
+    """Loaders by format id: the default one pinned, the rest loaded on first use
+
+    Other formats load from their snapshot in the snapshot dir (downloaded once if
+    there is none) and are kept least recently used first; when the estimated size
+    of everything loaded passes budget_bytes, the oldest are dropped.
+    """
+
+    def __init__(self, default, factory, budget_bytes=DEFAULT_MEMORY_BUDGET, failure_ttl=DEFAULT_FAILURE_TTL):
+        self.default = default
+        self.factory = factory  # format id -> unloaded SmogonDataLoader
+        self.budget_bytes = budget_bytes
+        self.failure_ttl = failure_ttl
+        self._loaded = OrderedDict()  # format id -> (loader, estimated bytes), least recently used first
+        self._loading = {}  # format id -> lock held while it loads
+        self._failed = {}  # format id -> time its last load failed
+        self._lock = threading.Lock()
+        self._default_size = (None, 0)  # (version, estimated bytes)
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _default_bytes(self):
+        version, size = self._default_size
+        if version != self.default.version:
+            size = estimate_size(self.default.smogon_sets)
+            self._default_size = (self.default.version, size)
+        return size
+
+    def is_known(self, fmt):
+        """Whether a normalized format id is one Smogon publishes (or one we have a snapshot of)"""
+        match = _FORMAT_ID.match(fmt)
+        if match and match.group(2) in KNOWN_TIERS:
+            return True
+        if fmt in EXTRA_FORMATS:
+            return True
+        return os.path.exists(self.factory(fmt).snapshot_path)
+
+    def _reject(self, fmt):
+        """Raise UnknownFormat without loading if fmt is not a known format or failed recently"""
+        failed_at = self._failed.get(fmt)
+        if failed_at is not None:
+            if time.time() - failed_at < self.failure_ttl:
+                self.rejected += 1
+                raise UnknownFormat(f"No Smogon sets for format {fmt}")
+            del self._failed[fmt]
+        if not self.is_known(fmt):
+            self.rejected += 1
+            raise UnknownFormat(f"Not a known Smogon format: {fmt}")
+
+    def get(self, format_id=None):
+        """The loaded SmogonDataLoader for a format (None = default); raises UnknownFormat"""
+        fmt = normalize_format(format_id) if format_id else self.default.format_id
+        if fmt == self.default.format_id:
+            return self.default
+        with self._lock:
+            entry = self._loaded.get(fmt)
+            if entry is not None:
+                self._loaded.move_to_end(fmt)
+                self.hits += 1
+                return entry[0]
+            self._reject(fmt)
+            loading = self._loading.setdefault(fmt, threading.Lock())
+
+        # One thread loads a format; the others wait for it instead of parsing it again
+        with loading:
+            with self._lock:
+                entry = self._loaded.get(fmt)
+                if entry is not None:
+                    self._loaded.move_to_end(fmt)
+                    self.hits += 1
+                    return entry[0]
+                # The thread that loaded before us may have just failed
+                self._reject(fmt)
+            loader = self.factory(fmt)
+            loaded = loader.load_snapshot() or loader.refresh()
+            with self._lock:
+                self._loading.pop(fmt, None)
+                if not loaded:
+                    self.failures += 1
+                    self._failed[fmt] = time.time()
+                    raise UnknownFormat(f"No Smogon sets for format {fmt}")
+                self._loaded[fmt] = (loader, estimate_size(loader.smogon_sets))
+                self.loads += 1
+                self._evict()
+        return loader
+
+    def _evict(self):
+        used = self._default_bytes() + sum(size for _, size in self._loaded.values())
+        # The format just loaded stays even if it alone is over budget
+        while used > self.budget_bytes and len(self._loaded) > 1:
+            fmt, (_, size) = self._loaded.popitem(last=False)
+            used -= size
+            self.evictions += 1
+            log.debug("Evicted Smogon %s data (%d KB)", fmt, size // 1024)
+
+    def stats(self):
+        with self._lock:
+            loaded = {fmt: size for fmt, (_, size) in self._loaded.items()}
+            default_bytes = self._default_bytes()
+            return {
+                'default': self.default.format_id,
+                'default_bytes': default_bytes,
+                'loaded': loaded,
+                'used_bytes': default_bytes + sum(loaded.values()),
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'failed_recently': sorted(fmt for fmt, failed_at in self._failed.items()
+                                          if time.time() - failed_at < self.failure_ttl)
+            }
@@ -0,0 +1,372 @@
+import atexit
+import json
+import concurrent.futures
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+POKEAPI_BASE = os.environ.get("POKEAPI_BASE", "https://pokeapi.co/api/v2/")
+SMOGON_OU_URL = "https://pkmn.github.io/smogon/data/sets/gen9ou.json"
+
+# Generated files (snapshots, species tables, benchmark baselines) go here, out of the
+# source tree; copy the directory to ship an offline deployment
+DATA_DIR = os.environ.get(
+    "POKEMON_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+DEFAULT_SNAPSHOT_PATH = os.environ.get("SPECIES_SNAPSHOT", os.path.join(DATA_DIR, "species_snapshot.json"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SPECIES_CACHE_SIZE", "4096"))
+DEFAULT_TTL = int(os.environ.get("SPECIES_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_TIMEOUT = float(os.environ.get("POKEAPI_TIMEOUT", "5"))
+# Outbound requests in flight at once (shared by every caller), and how hard to retry
+DEFAULT_CONCURRENCY = int(os.environ.get("POKEAPI_CONCURRENCY", "8"))
+DEFAULT_RETRIES = int(os.environ.get("POKEAPI_RETRIES", "2"))
+DEFAULT_BACKOFF = float(os.environ.get("POKEAPI_BACKOFF", "0.25"))
+
+
+def to_pokeapi_name(name):
+    """Convert a display, Smogon or Prolog-normalized name to a PokeAPI slug"""
+    return (name.strip().lower()
+            .replace("_", "-").replace(" ", "-")
+            .replace("'", "").replace(".", "").replace(":", ""))
+
+
+def parse_pokeapi_species(data):
+    """Reduce a PokeAPI /pokemon payload to the fields the advisor uses"""
+    return {
+        'name': data['name'],
+        'types': [t['type']['name'] for t in data['types']],
+        'stats': {s['stat']['name']: s['base_stat'] for s in data['stats']}
+    }
+
+
+class SpeciesCache:
+    """In-memory LRU of species data backed by an on-disk JSON snapshot"""
+
+    def __init__(self, snapshot_path=DEFAULT_SNAPSHOT_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT, offline=None, base_url=POKEAPI_BASE,
+                 concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.snapshot_path = snapshot_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.timeout = timeout
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        if offline is None:
+            offline = os.environ.get("POKEMON_OFFLINE", "0") == "1"
+        self.offline = offline
+
+        self._entries = OrderedDict()  # slug -> (fetched_at, data)
+        self._lock = threading.Lock()
+        # One keep-alive session for every thread; its pool holds a connection per fetch slot
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.concurrency)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._inflight = {}  # slug -> Future shared by every caller waiting on that fetch
+        self._executor = None
+        self._dirty = False
+        # Bumped on every insert and eviction; len() alone stops changing once the LRU is full
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.upstream_errors = 0
+        self.coalesced = 0
+        self.retried = 0
+
+        self.load_snapshot()
+        atexit.register(self.flush)
+
+    # ----- snapshot persistence -----
+
+    def load_snapshot(self):
+        """Load the on-disk snapshot into memory (most recent entries win the LRU)"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            log.warning("Could not read species snapshot %s: %s", self.snapshot_path, e)
+            return 0
+
+        entries = sorted(snapshot.get('species', {}).items(), key=lambda kv: kv[1]['fetched_at'])
+        with self._lock:
+            for slug, entry in entries:
+                self._store(slug, entry['fetched_at'], entry['data'])
+        log.info("Loaded %d species from snapshot", len(entries))
+        return len(entries)
+
+    def save_snapshot(self):
+        """Atomically write the in-memory entries to the snapshot file"""
+        if not self.snapshot_path:
+            return False
+        with self._lock:
+            species = {slug: {'fetched_at': fetched_at, 'data': data}
+                       for slug, (fetched_at, data) in self._entries.items()}
+            self._dirty = False
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'species': species}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except Exception as e:
+            log.warning("Could not write species snapshot %s: %s", self.snapshot_path, e)
+            return False
+
+    def flush(self):
+        """Write the snapshot only if lookups added entries since the last save"""
+        if self._dirty:
+            return self.save_snapshot()
+        return False
+
+    # ----- lookups -----
+
+    def _store(self, slug, fetched_at, data):
+        self._entries[slug] = (fetched_at, data)
+        self._entries.move_to_end(slug)
+        self.version += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.version += 1
+
+    def get(self, name):
+        """Return species data for a name, fetching from PokeAPI on a miss"""
+        slug = to_pokeapi_name(name)
+        if not slug:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None:
+                self._entries.move_to_end(slug)
+                fresh = self.offline or (time.time() - entry[0]) < self.ttl
+                if fresh:
+                    self.hits += 1
+                    return entry[1]
+            self.misses += 1
+
+        data = self._fetch_shared(slug)
+        if data is not None:
+            return data
+
+        # Upstream unavailable: serve the expired copy rather than nothing
+        if entry is not None:
+            with self._lock:
+                self.stale_hits += 1
+            return entry[1]
+        return None
+
+    def _fetch_shared(self, slug):
+        """Fetch and cache a slug, joining a fetch of the same slug already in flight"""
+        with self._lock:
+            future = self._inflight.get(slug)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self._inflight[slug] = future
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            data = self.fetch(slug)
+            if data is not None:
+                self.put(slug, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(slug, None)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.concurrency, thread_name_prefix="pokeapi")
+        return self._executor
+
+    def get_many(self, names):
+        """get() for several names at once; misses are fetched concurrently
+
+        Returns a list in the same order as names. Cached entries are served
+        directly; the rest share the fetch pool, so a team of six costs about
+        one round trip instead of six.
+        """
+        names = list(names)
+        results = [None] * len(names)
+        pending = {}
+        for i, name in enumerate(names):
+            if not self._expired(name):
+                results[i] = self.get(name)
+            else:
+                pending[i] = name
+        if len(pending) == 1:
+            i, name = pending.popitem()
+            results[i] = self.get(name)
+        elif pending:
+            executor = self._get_executor()
+            futures = {i: executor.submit(self.get, name) for i, name in pending.items()}
+            for i, future in futures.items():
+                results[i] = future.result()
+        return results
+
+    def _expired(self, name):
+        with self._lock:
+            entry = self._entries.get(to_pokeapi_name(name))
+        return entry is None or not (self.offline or (time.time() - entry[0]) < self.ttl)
+
+    def peek(self, name):
+        """Cached data for a name without fetching, counting or touching the LRU order"""
+        with self._lock:
+            entry = self._entries.get(to_pokeapi_name(name))
+        return entry[1] if entry is not None else None
+
+    def put(self, name, data, fetched_at=None):
+        """Insert species data into the cache"""
+        with self._lock:
+            self._store(to_pokeapi_name(name), fetched_at or time.time(), data)
+            self._dirty = True
+
+    def fetch(self, slug):
+        """Fetch one species from PokeAPI (None when offline or on failure)
+
+        Connection errors, 429s and 5xx responses are retried up to
+        self.retries times with exponential backoff; a 404 is final.
+        """
+        if self.offline:
+            return None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                with self._slots:
+                    response = self._session.get(f"{self.base_url}pokemon/{slug}", timeout=self.timeout)
+                if response.status_code == 200:
+                    return parse_pokeapi_species(response.json())
+                if response.status_code == 404:
+                    return None
+                error = f"HTTP {response.status_code}"
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+            except Exception as e:
+                error = e
+        log.warning("Error fetching %s: %s", slug, error)
+        with self._lock:
+            self.upstream_errors += 1
+        return None
+
+    def items(self):
+        """(slug, data) for every cached species, without touching the LRU order"""
+        with self._lock:
+            return [(slug, data) for slug, (_, data) in self._entries.items()]
+
+    def __contains__(self, name):
+        with self._lock:
+            return to_pokeapi_name(name) in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters for the admin endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'version': self.version,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'offline': self.offline,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'upstream_errors': self.upstream_errors,
+                'coalesced': self.coalesced,
+                'retried': self.retried,
+                'in_flight': len(self._inflight),
+                'concurrency': self.concurrency,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
+
+    # ----- bulk prefetch -----
+
+    def prefetch(self, names, save=True, progress_every=50):
+        """Fill the cache for every name that is missing or expired (fetched concurrently)"""
+        now = time.time()
+        stale = []
+        for name in names:
+            with self._lock:
+                entry = self._entries.get(to_pokeapi_name(name))
+            if entry is None or (now - entry[0]) >= self.ttl:
+                stale.append(name)
+
+        fetched, failed = 0, []
+        executor = self._get_executor()
+        futures = [(name, executor.submit(self._fetch_shared, to_pokeapi_name(name))) for name in stale]
+        for i, (name, future) in enumerate(futures, 1):
+            if future.result() is None:
+                failed.append(name)
+            else:
+                fetched += 1
+            if progress_every and i % progress_every == 0:
+                log.debug("...%d/%d species processed", i, len(stale))
+        if save and self._dirty:
+            self.save_snapshot()
+        log.info("Prefetched %d species (%d failed)", fetched, len(failed))
+        return {'fetched': fetched, 'failed': failed}
+
+    def list_dex(self):
+        """List every species/form slug known to PokeAPI"""
+        response = self._session.get(f"{self.base_url}pokemon?limit=100000", timeout=self.timeout * 4)
+        response.raise_for_status()
+        return [p['name'] for p in response.json()['results']]
+
+    def prefetch_dex(self):
+        """Prefetch every species and form in the national dex"""
+        return self.prefetch(self.list_dex())
+
+    def prefetch_smogon(self, smogon_url=SMOGON_OU_URL):
+        """Prefetch every species that has a Smogon set in the given format"""
+        response = self._session.get(smogon_url, timeout=self.timeout * 4)
+        response.raise_for_status()
+        return self.prefetch(list(response.json().keys()))
+
+
+if __name__ == '__main__':
+    # python species_cache.py prefetch [dex|smogon] [snapshot_path]
+    if len(sys.argv) < 2 or sys.argv[1] != 'prefetch':
+        print("Usage: python species_cache.py prefetch [dex|smogon] [snapshot_path]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    scope = sys.argv[2] if len(sys.argv) > 2 else 'smogon'
+    path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_SNAPSHOT_PATH
+    cache = SpeciesCache(snapshot_path=path, offline=False)
+    if scope == 'dex':
+        cache.prefetch_dex()
+    else:
+        cache.prefetch_smogon()
+    print(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,452 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a mapped file cannot be removed there anyway
+    fcntl = None
+
+import type_chart
+from species_cache import DATA_DIR, to_pokeapi_name
+from static_species import STAT_ORDER
+from team_completion import ROLE_BIT, ROLE_NAMES, species_roles
+
+DEFAULT_TABLE_PATH = os.environ.get("SPECIES_TABLE", os.path.join(DATA_DIR, "species_table.bin"))
+
+MAGIC = b'PKST'
+TABLE_FORMAT = 1
+# magic, format, stat count, species count, name blob bytes, source digest
+_HEADER = struct.Struct('<4sHHII16s')
+NO_TYPE = 0xFF
+VIABLE_BIT = 0x80  # in the flags column, above the role bits
+OPEN_ATTEMPTS = 3
+
+
+def source_digest(species, viable=()):
+    """16-byte digest of the data a table is built from, stored in its header"""
+    canonical = json.dumps([species, sorted(viable)], sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+def _layout(count, blob_size):
+    """Byte offset of each column; the 4-byte columns come first so they stay aligned"""
+    offsets = {}
+    position = _HEADER.size
+    for column, size in (('name_offsets', 4 * (count + 1)), ('type_mask', 4 * count),
+                         ('stats', len(STAT_ORDER) * count), ('types', 2 * count),
+                         ('flags', count), ('names', blob_size)):
+        offsets[column] = position
+        position += size
+    offsets['end'] = position
+    return offsets
+
+
+def write_table(path, species, viable=()):
+    """Encode {slug: {'types', 'stats'}} (plus the viable slugs) to path, atomically
+
+    Species without types are left out. Returns the source digest.
+    """
+    digest = source_digest(species, viable)
+    viable = set(viable)
+    names = sorted(name for name, data in species.items() if data and data.get('types'))
+    count = len(names)
+
+    encoded = [name.encode('utf-8') for name in names]
+    name_offsets = np.zeros(count + 1, dtype='<u4')
+    name_offsets[1:] = np.cumsum([len(e) for e in encoded])
+    type_mask = np.zeros(count, dtype='<u4')
+    stats = np.zeros((count, len(STAT_ORDER)), dtype=np.uint8)
+    types = np.full((count, 2), NO_TYPE, dtype=np.uint8)
+    flags = np.zeros(count, dtype=np.uint8)
+    for i, name in enumerate(names):
+        data = species[name]
+        indexes = [type_chart.TYPE_INDEX[t] for t in data['types'] if t in type_chart.TYPE_INDEX][:2]
+        types[i, :len(indexes)] = indexes
+        for t in indexes:
+            type_mask[i] |= 1 << t
+        values = data.get('stats') or {}
+        # Base stats top out at 255
+        stats[i] = [min(values.get(stat, 0), 255) for stat in STAT_ORDER]
+        role_bits = sum(ROLE_BIT[role] for role in species_roles(values))
+        flags[i] = role_bits | (VIABLE_BIT if name in viable else 0)
+
+    blob = b''.join(encoded)
+    header = _HEADER.pack(MAGIC, TABLE_FORMAT, len(STAT_ORDER), count, len(blob), digest)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        for part in (header, name_offsets, type_mask, stats, types, flags, blob):
+            f.write(part if isinstance(part, bytes) else part.tobytes())
+    os.replace(tmp, path)
+    return digest
+
+
+def read_digest(path):
+    """Source digest of the table at path, or None if it is missing or not a table"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+    magic, fmt, stat_count, _, _, digest = _HEADER.unpack(header)
+    if magic != MAGIC or fmt != TABLE_FORMAT or stat_count != len(STAT_ORDER):
+        return None
+    return digest
+
+
+class _Names:
+    """Read-only sequence of the interned names, decoded on access (for bisect)"""
+    __slots__ = ('_offsets', '_blob')
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[int(self._offsets[i]):int(self._offsets[i + 1])], 'utf-8')
+
+
+class SpeciesView:
+    """One species row of a SpeciesTable; holds only the table and the row number"""
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def types(self):
+        return [type_chart.TYPES[t] for t in self.table.types[self.index] if t != NO_TYPE]
+
+    @property
+    def type_mask(self):
+        return int(self.table.type_mask[self.index])
+
+    @property
+    def stats(self):
+        return dict(zip(STAT_ORDER, self.table.stats[self.index].tolist()))
+
+    @property
+    def bst(self):
+        return int(self.table.stats[self.index].sum())
+
+    @property
+    def roles(self):
+        flags = int(self.table.flags[self.index])
+        return [role for role in ROLE_NAMES if flags & ROLE_BIT[role]]
+
+    @property
+    def viable(self):
+        return bool(self.table.flags[self.index] & VIABLE_BIT)
+
+    def to_dict(self):
+        """The {'name', 'types', 'stats'} dict the rest of the advisor takes"""
+        return {'name': self.name, 'types': self.types, 'stats': self.stats}
+
+    def __repr__(self):
+        return f"SpeciesView({self.name!r})"
+
+
+def _lock_path(path):
+    return f"{path}.lock"
+
+
+def _hold(path):
+    """Shared lock on path's lock file, marking the table in use; None without fcntl"""
+    if fcntl is None:
+        return None
+    lock = _lock_path(path)
+    while True:
+        fd = os.open(lock, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        try:
+            # open_table() may have removed the lock file before we locked it
+            if os.stat(lock).st_ino == os.fstat(fd).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _remove_unused(path):
+    """Remove the table at path and its lock file unless some process holds the table"""
+    if fcntl is None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # still mapped by another process, or already gone
+        return
+    lock = _lock_path(path)
+    try:
+        fd = os.open(lock, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return  # in use
+    try:
+        for stale in (path, lock):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    finally:
+        os.close(fd)
+
+
+class SpeciesTable:
+    """Columnar species data memory-mapped read-only from a write_table() file
+
+    Every process mapping the same file shares its physical pages; the columns are
+    numpy views straight onto the mapping and names are decoded only when read.
+    The table holds a shared lock on <path>.lock until close(), so open_table()
+    in other processes leaves the file alone.
+    """
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        self._lock = _hold(path)
+        try:
+            with open(path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._release()
+            raise
+        magic, fmt, stat_count, count, blob_size, self.digest = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or fmt != TABLE_FORMAT or stat_count != len(STAT_ORDER):
+            self._map.close()
+            self._release()
+            raise ValueError(f"{path} is not a format {TABLE_FORMAT} species table")
+        offsets = _layout(count, blob_size)
+        if len(self._map) < offsets['end']:
+            self._map.close()
+            self._release()
+            raise ValueError(f"{path} is truncated")
+
+        def column(name, dtype, length):
+            return np.frombuffer(self._map, dtype=dtype, count=length, offset=offsets[name])
+
+        self.type_mask = column('type_mask', '<u4', count)
+        self.stats = column('stats', np.uint8, count * len(STAT_ORDER)).reshape(count, len(STAT_ORDER))
+        self.types = column('types', np.uint8, count * 2).reshape(count, 2)
+        self.flags = column('flags', np.uint8, count)
+        names_start = offsets['names']
+        self.names = _Names(column('name_offsets', '<u4', count + 1),
+                            memoryview(self._map)[names_start:names_start + blob_size])
+
+    def __len__(self):
+        return len(self.names)
+
+    def index_of(self, name):
+        """Row of a species (any spelling to_pokeapi_name accepts), or None"""
+        slug = to_pokeapi_name(name)
+        i = bisect.bisect_left(self.names, slug)
+        if i < len(self.names) and self.names[i] == slug:
+            return i
+        return None
+
+    def get(self, name):
+        i = self.index_of(name)
+        return None if i is None else SpeciesView(self, i)
+
+    def __contains__(self, name):
+        return self.index_of(name) is not None
+
+    def __iter__(self):
+        return (SpeciesView(self, i) for i in range(len(self)))
+
+    def viable(self):
+        """Views of the species flagged viable"""
+        return [SpeciesView(self, int(i)) for i in np.flatnonzero(self.flags & VIABLE_BIT)]
+
+    def close(self):
+        """Unmap the file; views and columns from this table must not be used afterwards"""
+        self.names = self.type_mask = self.stats = self.types = self.flags = None
+        self._map.close()
+        self._release()
+
+    def _release(self):
+        if self._lock is not None:
+            os.close(self._lock)
+            self._lock = None
+
+    def __del__(self):
+        # A replaced table that nobody closed stops marking its file in use once it is collected
+        if getattr(self, '_lock', None) is not None:
+            self._release()
+
+    def stats_summary(self):
+        return {
+            'path': self.path,
+            'species': len(self),
+            'viable': int(np.count_nonzero(self.flags & VIABLE_BIT)),
+            'bytes': len(self._map),
+            'digest': self.digest.hex()
+        }
+
+
+def table_path(digest, path=DEFAULT_TABLE_PATH):
+    """Where the table for one source digest lives: path with the digest before the extension"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{digest.hex()[:12]}{ext}"
+
+
+def open_table(species, viable=(), path=DEFAULT_TABLE_PATH):
+    """Map the table for this data, writing it first only if it is not on disk yet
+
+    Files are named by their source digest, so processes building from the same data
+    map one file (and share its pages), and a file that is mapped is never rewritten.
+    Tables older than this one are removed unless a process still holds them (its
+    shared lock on the .lock file); one removed while we were opening it is
+    written again.
+    """
+    digest = source_digest(species, viable)
+    current = table_path(digest, path)
+    os.makedirs(os.path.dirname(os.path.abspath(current)), exist_ok=True)
+    for attempt in range(OPEN_ATTEMPTS):
+        if read_digest(current) != digest:
+            write_table(current, species, viable)
+        try:
+            table = SpeciesTable(current)
+            break
+        except FileNotFoundError:
+            # Another process pruned it between the digest check and the open
+            if attempt == OPEN_ATTEMPTS - 1:
+                raise
+    _remove_older(path, current)
+    return table
+
+
+def _remove_older(path, current):
+    """Remove the unused tables for path that are older than current"""
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(root) or '.'
+    prefix = os.path.basename(root) + '-'
+    try:
+        newest = os.stat(current).st_mtime
+    except FileNotFoundError:
+        return
+    for entry in os.listdir(directory):
+        stale = os.path.join(directory, entry)
+        if not entry.startswith(prefix) or not entry.endswith(ext) or stale == current:
+            continue
+        try:
+            if os.stat(stale).st_mtime >= newest:
+                continue  # another process's newer data
+        except FileNotFoundError:
+            continue
+        _remove_unused(stale)
+
+
+def synthetic_species(count, seed=0):
+    """count made-up species with PokeAPI-shaped types and stats, for measuring"""
+    rng = np.random.default_rng(seed)
+    species = {}
+    for i in range(count):
+        picked = rng.choice(type_chart.NUM_TYPES, size=int(rng.integers(1, 3)), replace=False)
+        species[f"species-{i:04d}"] = {
+            'name': f"species-{i:04d}",
+            'types': [type_chart.TYPES[t] for t in picked],
+            'stats': dict(zip(STAT_ORDER, (int(v) for v in rng.integers(20, 160, size=len(STAT_ORDER)))))
+        }
+    return species
+
+
+def _memory_bytes():
+    """(RSS, PSS) of this process from /proc; PSS splits shared pages between the processes mapping them"""
+    sizes = {}
+    for path in ('/proc/self/status', '/proc/self/smaps_rollup'):
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in ('VmRSS', 'Pss'):
+                        sizes[key] = int(value.split()[0]) * 1024
+        except OSError:
+            pass
+    return sizes.get('VmRSS'), sizes.get('Pss')
+
+
+def _measure_worker(kind, count, path, barrier, results):
+    """One worker: load the species one way, hold them while every worker has loaded, report memory"""
+    before = _memory_bytes()
+    if kind == 'dicts':
+        held = synthetic_species(count)
+        touched = sum(len(data['types']) for data in held.values())
+    else:
+        held = SpeciesTable(path)
+        # Fault in every page of the mapping, as serving requests eventually does
+        touched = int(held.stats.sum()) + sum(len(name) for name in held.names)
+    barrier.wait()
+    after = _memory_bytes()
+    barrier.wait()
+    results.put((kind, before, after, touched))
+
+
+def measure(count=1025, workers=4, path=None):
+    """Per-worker memory for count species held as nested dicts vs as one mapped table
+
+    Each of workers processes loads the data, then reports its RSS and PSS growth
+    while every worker holds its copy: the dicts are private to each process,
+    while the table's pages are shared, which PSS (Linux only) shows.
+    """
+    import multiprocessing
+
+    path = path or f"{DEFAULT_TABLE_PATH}.measure"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    species = synthetic_species(count)
+    write_table(path, species, viable=list(species)[::2])
+    del species
+
+    context = multiprocessing.get_context('spawn')
+    result = {'species': count, 'workers': workers, 'table_file_bytes': os.path.getsize(path)}
+    try:
+        for kind in ('dicts', 'table'):
+            barrier = context.Barrier(workers)
+            results = context.Queue()
+            processes = [context.Process(target=_measure_worker, args=(kind, count, path, barrier, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            reports = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+            for index, name in enumerate(('rss', 'pss')):
+                grown = [after[index] - before[index] for _, before, after, _ in reports
+                         if before[index] is not None and after[index] is not None]
+                if grown:
+                    result[f'{kind}_{name}_per_worker_bytes'] = sorted(grown)
+                    result[f'{kind}_{name}_total_bytes'] = sum(grown)
+    finally:
+        os.remove(path)
+        if os.path.exists(_lock_path(path)):
+            os.remove(_lock_path(path))
+    return result
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 1025
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        for key, value in measure(count, workers).items():
+            print(f"{key:>28}: {value}")
+    else:
+        print(f"usage: python {sys.argv[0]} --measure [species] [workers]")
+        sys.exit(2)
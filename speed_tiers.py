@@ -0,0 +1,71 @@
+import bisect
+
+import numpy as np
+
+from damage_calc import compute_stats, nature_multipliers
+from move_data import ITEM_STAT_BOOSTS, STATS, to_id
+
+_SPE = STATS.index('spe')
+# Members are sent without spreads: assume max Speed (252 EVs, +Spe nature) unless they carry one
+DEFAULT_SPEED_EVS = 252
+DEFAULT_SPEED_NATURE = 'jolly'
+NEIGHBOURS = 3  # closest faster / slower sets listed per member
+
+
+def member_speed(member):
+    """In-battle Speed of a team member from its base Speed, 'evs', 'nature' and 'item'"""
+    base = np.zeros((1, len(STATS)))
+    base[0, _SPE] = member.get('stats', {}).get('speed', 0)
+    evs = np.zeros((1, len(STATS)))
+    evs[0, _SPE] = (member.get('evs') or {}).get('spe', DEFAULT_SPEED_EVS)
+    natures = nature_multipliers(member.get('nature') or DEFAULT_SPEED_NATURE)[None, :]
+    speed = compute_stats(base, evs, np.full((1, len(STATS)), 31.0), natures)[0, _SPE]
+    boost = ITEM_STAT_BOOSTS.get(to_id(member.get('item') or ''))
+    if boost and boost[0] == 'spe':
+        speed = np.floor(speed * boost[1])
+    return int(speed)
+
+
+class SpeedTiers:
+    """Every Smogon set's in-battle Speed, sorted once, queried with bisect"""
+
+    def __init__(self, meta):
+        """meta: damage_calc.MetaSets; its battle stats already include nature, EVs and Choice Scarf"""
+        speeds = meta.battle_stats[:, _SPE].astype(int).tolist()
+        order = sorted(range(len(speeds)), key=speeds.__getitem__)
+        self.speeds = [speeds[i] for i in order]
+        self.labels = [meta.labels[i] for i in order]
+        self.items = [meta.items[i] for i in order]
+
+    def __len__(self):
+        return len(self.speeds)
+
+    def _describe(self, i):
+        species, set_name = self.labels[i]
+        return {'pokemon': species, 'set': set_name, 'item': self.items[i], 'speed': self.speeds[i]}
+
+    def query(self, speed):
+        """Sets this Speed outspeeds, ties and is outsped by, plus the nearest on each side"""
+        low = bisect.bisect_left(self.speeds, speed)
+        high = bisect.bisect_right(self.speeds, speed)
+        total = len(self.speeds)
+        return {
+            'speed': speed,
+            'outspeeds': low,
+            'ties': high - low,
+            'outsped_by': total - high,
+            'percentile': round(100 * low / total, 1) if total else None,
+            'next_faster': [self._describe(i) for i in range(high, min(high + NEIGHBOURS, total))],
+            'next_slower': [self._describe(i) for i in range(low - 1, max(low - NEIGHBOURS, 0) - 1, -1)]
+        }
+
+    def team_report(self, team_data):
+        """query() for every member with a known base Speed, by member name"""
+        report = {}
+        for member in team_data:
+            if not member.get('stats', {}).get('speed'):
+                continue
+            entry = self.query(member_speed(member))
+            entry['assumed_spread'] = not member.get('evs') and not member.get('nature')
+            report[member['name']] = entry
+        return report
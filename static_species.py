@@ -0,0 +1,69 @@
+import os
+import re
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "team_rules.pl")
+
+# Stat names in pokemon_stats/7 argument order, spelled the way PokeAPI spells them
+STAT_ORDER = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+
+_TYPE_FACT = re.compile(r"^pokemon_type\((\w+),\s*(\w+),\s*(\w+)\)\.", re.MULTILINE)
+_STATS_FACT = re.compile(r"^pokemon_stats\((\w+),\s*" + r",\s*".join([r"(\d+)"] * 6) + r"\)\.", re.MULTILINE)
+_VIABLE_FACT = re.compile(r"^static_viable\((\w+)\)\.", re.MULTILINE)
+# super_effective(Attack, Defense), resists(Defense, Attack), immune(Defense, Attack)
+RELATION_FACT = re.compile(r"^(super_effective|resists|immune)\((\w+),\s*(\w+)\)\.", re.MULTILINE)
+_MULTIPLIERS = {'super_effective': 2, 'resists': 0.5, 'immune': 0}
+
+_cache = {}
+
+
+def load_static_species(path=RULES_PATH):
+    """Read the static species table (types, stats, viability) out of team_rules.pl"""
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    species = {}
+    for name, t1, t2 in _TYPE_FACT.findall(source):
+        # The first fact wins, matching get_pokemon_types/2's if-then-else
+        if name not in species:
+            species[name] = {
+                'name': name,
+                'types': [t1] if t2 == 'none' else [t1, t2],
+                'stats': {},
+                'viable': False
+            }
+    for match in _STATS_FACT.findall(source):
+        name, values = match[0], [int(v) for v in match[1:]]
+        entry = species.setdefault(name, {'name': name, 'types': [], 'stats': {}, 'viable': False})
+        entry['stats'] = dict(zip(STAT_ORDER, values))
+    for name in _VIABLE_FACT.findall(source):
+        if name in species:
+            species[name]['viable'] = True
+
+    _cache[path] = (mtime, species)
+    return species
+
+
+def load_type_matchups(path=RULES_PATH):
+    """Non-neutral matchups from team_rules.pl's type facts: attacking type -> {defending type: multiplier}
+
+    An immunity also listed as a resistance (resists(normal, ghost)) counts as
+    the immunity; a pair that is both super effective and resisted is an error.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    matchups = {}
+    for relation, first, second in RELATION_FACT.findall(source):
+        attack, defense = (first, second) if relation == 'super_effective' else (second, first)
+        mult = _MULTIPLIERS[relation]
+        row = matchups.setdefault(attack, {})
+        previous = row.get(defense, mult)
+        if (previous > 1) != (mult > 1):
+            raise ValueError(f"{path}: {attack} against {defense} is both super effective and resisted")
+        row[defense] = min(previous, mult)
+    return matchups
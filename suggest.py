@@ -0,0 +1,119 @@
+import bisect
+import heapq
+
+
+def normalize_query(text):
+    """Same slug rules as species_cache.to_pokeapi_name"""
+    return (text.strip().lower()
+            .replace("_", "-").replace(" ", "-")
+            .replace("'", "").replace(".", "").replace(":", ""))
+
+
+def _trigrams(text):
+    padded = f"^{text}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_edit_distance(query, name, limit):
+    """Edit distance from query to the closest prefix of name, or limit + 1 once it must exceed limit
+
+    Only the diagonal band |i - j| <= limit of the DP table is filled.
+    """
+    m, n = len(query), len(name)
+    over = limit + 1
+    previous = list(range(n + 1))
+    for i in range(1, m + 1):
+        lo, hi = max(1, i - limit), min(n, i + limit)
+        current = [over] * (n + 1)
+        current[0] = i
+        best = i
+        qc = query[i - 1]
+        for j in range(lo, hi + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (qc != name[j - 1]))
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return min(min(previous[max(0, m - limit):min(n, m + limit) + 1], default=over), over)
+
+
+class SuggestIndex:
+    """Prefix and typo-tolerant lookup over species names, built once and read-only after
+
+    Every name is indexed under its full slug and under each later hyphen-separated
+    word ("great-tusk" also as "tusk"), in one sorted array searched with bisect.
+    Misses fall back to trigram candidates checked with a bounded edit distance.
+    Results are ranked by Smogon viability (number of sets), then by length.
+    """
+
+    def __init__(self, names, weights=None):
+        weights = weights or {}
+        self.names = sorted(set(names))
+        self.weights = [weights.get(name, 0) for name in self.names]
+        # Higher rank sorts first: more Smogon sets (0 = not viable), then shorter names
+        self.rank = [(weight, -len(name)) for weight, name in zip(self.weights, self.names)]
+
+        entries = []
+        for i, name in enumerate(self.names):
+            entries.append((name, i))
+            words = name.split('-')
+            for w in range(1, len(words)):
+                entries.append(('-'.join(words[w:]), i))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = [i for _, i in entries]
+
+        self._grams = {}
+        for i, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self._grams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix(self, query):
+        """ids of every name with a word starting with query"""
+        start = bisect.bisect_left(self._keys, query)
+        # Everything with the prefix sorts before query + a char above any slug char
+        end = bisect.bisect_left(self._keys, query + '\x7f', start)
+        return set(self._ids[start:end])
+
+    def fuzzy(self, query, exclude=(), candidates=16):
+        """ids of names whose closest prefix is a small edit distance from query
+
+        A name can only be within k edits if it shares enough of the query's
+        trigrams (each edit breaks at most three), so most names are never
+        compared; the best-sharing few are checked with the banded DP.
+        """
+        grams = _trigrams(query)
+        limit = 1 if len(query) <= 4 else 2
+        # The query's trailing '$' gram cannot match a longer name's prefix, so allow one more miss
+        needed = max(1, len(grams) - 3 * limit - 1)
+        counts = {}
+        for gram in grams:
+            for i in self._grams.get(gram, ()):
+                counts[i] = counts.get(i, 0) + 1
+        shortlist = heapq.nlargest(candidates, (i for i, c in counts.items() if c >= needed and i not in exclude),
+                                   key=counts.__getitem__)
+        matches = {}
+        for i in shortlist:
+            distance = prefix_edit_distance(query, self.names[i], limit)
+            if distance <= limit:
+                matches[i] = distance
+        return matches
+
+    def suggest(self, text, limit=10):
+        """[{'name', 'sets', 'match'}] best first; prefix matches before fuzzy ones"""
+        query = normalize_query(text)
+        if not query:
+            return []
+        found = self.prefix(query)
+        results = [(i, 'prefix') for i in heapq.nlargest(limit, found, key=self.rank.__getitem__)]
+        if len(results) < limit and len(query) >= 3:
+            fuzzy = self.fuzzy(query, exclude=found)
+            best = heapq.nsmallest(limit - len(results), fuzzy,
+                                   key=lambda i: (fuzzy[i], -self.weights[i], len(self.names[i])))
+            results.extend((i, 'fuzzy') for i in best)
+        return [{'name': self.names[i], 'sets': self.weights[i], 'match': match} for i, match in results]
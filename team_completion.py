@@ -0,0 +1,184 @@
+import heapq
+
+import type_chart
+
+TEAM_SIZE = 6
+
+# Role bits (same thresholds as PokemonTeamAdvisor.calculate_roles)
+ROLE_NAMES = ('physical_sweeper', 'special_sweeper', 'wall', 'tank')
+ROLE_BIT = {role: 1 << i for i, role in enumerate(ROLE_NAMES)}
+REQUIRED_ROLES = ('physical_sweeper', 'special_sweeper', 'wall')
+
+IMPORTANT_TYPES = ('fighting', 'ground', 'steel', 'fairy', 'fire', 'water', 'ice', 'dragon')
+IMPORTANT_MASK = sum(1 << type_chart.TYPE_INDEX[t] for t in IMPORTANT_TYPES)
+
+# Weakness counts are packed into one int, 4 bits per attacking type, so adding
+# two packed values adds every per-type count at once. A field reaches 3+ exactly
+# when adding 5 sets its high bit (counts never exceed 6, so nothing carries).
+_FIELD_BITS = 4
+_PLUS_FIVE = sum(5 << (_FIELD_BITS * i) for i in range(type_chart.NUM_TYPES))
+_HIGH_BITS = sum(8 << (_FIELD_BITS * i) for i in range(type_chart.NUM_TYPES))
+
+# Score weights
+W_IMPORTANT = 3.0     # per important type present on the team
+W_COVERAGE = 1.0      # per type hit super effectively by STAB
+W_ROLE = 4.0          # per required role filled
+W_UNANSWERED = 3.0    # per attacking type some member is weak to and nobody resists
+W_STACKED = 2.0       # per attacking type three or more members are weak to
+W_BST = 0.5           # per member, scaled by BST / 600
+
+
+def species_roles(stats):
+    """Role names a species qualifies for from its base stats"""
+    roles = []
+    if stats.get('attack', 0) >= 100 and stats.get('speed', 0) >= 80:
+        roles.append('physical_sweeper')
+    if stats.get('special-attack', 0) >= 100 and stats.get('speed', 0) >= 80:
+        roles.append('special_sweeper')
+    if (stats.get('hp', 0) >= 80 and
+            stats.get('defense', 0) >= 80 and
+            stats.get('special-defense', 0) >= 80):
+        roles.append('wall')
+    if stats.get('hp', 0) >= 90:
+        roles.append('tank')
+    return roles
+
+
+def _bits(flags):
+    return sum(1 << i for i, flag in enumerate(flags) if flag)
+
+
+class Candidate:
+    """Per-species bitmasks used by the completion search"""
+    __slots__ = ('name', 'types', 'stab_mask', 'cover_mask', 'resist_mask',
+                 'weak_mask', 'weak_packed', 'role_mask', 'bst')
+
+    def __init__(self, pokemon):
+        self.name = pokemon['name']
+        self.types = list(pokemon.get('types', []))
+        pair = type_chart.type_pair(self.types)
+        if pair is None:
+            profile = type_chart.defensive_profile([])
+            stab = []
+        else:
+            profile = type_chart.DUAL_PROFILES[pair]
+            stab = sorted(set(pair))
+        self.stab_mask = sum(1 << i for i in stab)
+        self.cover_mask = _bits(type_chart.SE_MASK[stab].any(axis=0)) if stab else 0
+        self.resist_mask = _bits(profile < 1)
+        self.weak_mask = _bits(profile > 1)
+        self.weak_packed = sum(1 << (_FIELD_BITS * i) for i, weak in enumerate(profile > 1) if weak)
+        stats = pokemon.get('stats', {})
+        self.role_mask = sum(ROLE_BIT[r] for r in species_roles(stats))
+        self.bst = sum(stats.values())
+
+
+class _State:
+    """Aggregated masks for a (partial) team"""
+    __slots__ = ('stab', 'cover', 'resist', 'weak', 'weak_packed', 'roles', 'bst', 'members', 'last')
+
+    def __init__(self, stab=0, cover=0, resist=0, weak=0, weak_packed=0, roles=(0, 0, 0),
+                 bst=0.0, members=(), last=-1):
+        self.stab = stab
+        self.cover = cover
+        self.resist = resist
+        self.weak = weak
+        self.weak_packed = weak_packed
+        self.roles = roles
+        self.bst = bst
+        self.members = members
+        self.last = last
+
+    def add(self, cand, index):
+        return _State(self.stab | cand.stab_mask,
+                      self.cover | cand.cover_mask,
+                      self.resist | cand.resist_mask,
+                      self.weak | cand.weak_mask,
+                      self.weak_packed + cand.weak_packed,
+                      tuple(count + bool(cand.role_mask & ROLE_BIT[role])
+                            for count, role in zip(self.roles, REQUIRED_ROLES)),
+                      self.bst + cand.bst,
+                      self.members + (cand,),
+                      index)
+
+    def breakdown(self, size):
+        return {
+            'important_types': (self.stab & IMPORTANT_MASK).bit_count(),
+            'super_effective_coverage': self.cover.bit_count(),
+            'roles_filled': sum(1 for count in self.roles if count > 0),
+            'unanswered_weaknesses': (self.weak & ~self.resist).bit_count(),
+            'stacked_weaknesses': ((self.weak_packed + _PLUS_FIVE) & _HIGH_BITS).bit_count(),
+            'average_bst': round(self.bst / size, 1) if size else 0.0
+        }
+
+    def score(self, size):
+        b = self.breakdown(size)
+        return (W_IMPORTANT * b['important_types']
+                + W_COVERAGE * b['super_effective_coverage']
+                + W_ROLE * b['roles_filled']
+                - W_UNANSWERED * b['unanswered_weaknesses']
+                - W_STACKED * b['stacked_weaknesses']
+                + W_BST * size * b['average_bst'] / 600)
+
+
+def build_candidates(species_list):
+    """Precompute bitmasks for every candidate species (do this once per pool)"""
+    seen = set()
+    candidates = []
+    for pokemon in species_list:
+        key = normalize(pokemon['name'])
+        if key in seen or not pokemon.get('types'):
+            continue
+        seen.add(key)
+        candidates.append(Candidate(pokemon))
+    return candidates
+
+
+def normalize(name):
+    """Name key shared by PokeAPI, Smogon and Prolog spellings"""
+    return name.lower().replace('_', '-').replace(' ', '-').replace("'", "").replace('.', '')
+
+
+def complete_team(team_data, candidates, k=5, beam_width=64, slots=None):
+    """Return the top-k ways to fill the empty slots, best first
+
+    Beam search over combinations: each round extends every surviving partial
+    team by one candidate with a higher pool index than its last addition
+    (so each combination is generated once) and keeps the beam_width best.
+    """
+    open_slots = TEAM_SIZE - len(team_data)
+    if slots is not None:
+        open_slots = min(open_slots, slots)
+    if open_slots <= 0:
+        return []
+
+    on_team = {normalize(p['name']) for p in team_data}
+    pool = [c for c in candidates if normalize(c.name) not in on_team]
+
+    base = _State()
+    for pokemon in team_data:
+        base = base.add(Candidate(pokemon), -1)
+    # Existing members count toward the aggregates but are not part of the answer
+    base.members = ()
+
+    size = len(team_data)
+    beam = [base]
+    for depth in range(1, open_slots + 1):
+        scored = []
+        counter = 0
+        for state in beam:
+            for index in range(state.last + 1, len(pool)):
+                child = state.add(pool[index], index)
+                counter += 1
+                scored.append((child.score(size + depth), counter, child))
+        if not scored:
+            break
+        width = k if depth == open_slots else beam_width
+        beam = [entry[2] for entry in heapq.nlargest(width, scored)]
+
+    final_size = size + len(beam[0].members) if beam else size
+    return [{
+        'members': [c.name for c in state.members],
+        'score': round(state.score(final_size), 3),
+        'breakdown': state.breakdown(final_size)
+    } for state in beam[:k] if state.members]
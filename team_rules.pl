@@ -9,6 +9,56 @@
 :- dynamic base_stat/3.
 :- dynamic viable_pokemon/1.
 
+% ===== TEAM CONTEXTS =====
+% Each Python engine-pool slot keeps its team in its own module (team_ctx_N)
+% so concurrent requests never see each other's facts. Every rule that reads
+% the team facts is module transparent: called as team_ctx_N:Goal, its body
+% resolves current_pokemon/has_type/base_stat/viable_pokemon in team_ctx_N,
+% while static facts fall through to this (user) module.
+:- module_transparent
+    offensive_pokemon/1, wall/1, has_role/2,
+    team_covers_type/1, needs_offensive_coverage/1,
+    pokemon_resists_type/2, pokemon_weak_to/2, count_team_weak_to/2, team_weak_against/2,
+    count_role/2, needs_role/1, team_archetype/1,
+    provides_coverage/2, recommend_pokemon/2, all_recommendations/1,
+    debug_current_team/1, debug_team_types/1, debug_missing_coverage/1,
+    get_pokemon_types/2, pokemon_has_type/2, already_on_team/1, static_recommend/2,
+    load_team/1, add_member/1, remove_member/1.
+
+team_fact(current_pokemon/1).
+team_fact(has_type/2).
+team_fact(base_stat/3).
+team_fact(viable_pokemon/1).
+
+% Declare the team facts as local dynamic predicates of a context module
+init_team_context(Ctx) :-
+    forall(team_fact(Name/Arity), dynamic(Ctx:Name/Arity)).
+
+% Remove every team fact from a context module
+clear_team_context(Ctx) :-
+    forall(team_fact(Name/Arity),
+           ( functor(Head, Name, Arity), retractall(Ctx:Head) )).
+
+% Replace the calling context's team in one call (used by Python's bulk loader)
+% Team is a list of pokemon(Name, Types, Stats), Stats a list of StatName-Value
+load_team(Team) :-
+    context_module(Ctx),
+    clear_team_context(Ctx),
+    forall(member(Pokemon, Team), add_member(Pokemon)).
+
+% Assert one member's facts into the calling context (team sessions edit a
+% long-lived context one member at a time)
+add_member(pokemon(Name, Types, Stats)) :-
+    assertz(current_pokemon(Name)),
+    forall(member(Type, Types), assertz(has_type(Name, Type))),
+    forall(member(Stat-Value, Stats), assertz(base_stat(Name, Stat, Value))).
+
+% Exact inverse of add_member/1: one copy of each of that member's facts
+remove_member(pokemon(Name, Types, Stats)) :-
+    ignore(retract(current_pokemon(Name))),
+    forall(member(Type, Types), ignore(retract(has_type(Name, Type)))),
+    forall(member(Stat-Value, Stats), ignore(retract(base_stat(Name, Stat, Value)))).
+
 % ===== ROLE DEFINITIONS =====
 
 % Offensive Pokemon (Physical)
@@ -226,13 +276,14 @@ count_team_weak_to(AttackType, Count) :-
     length(WeakPokemon, Count).
 
 % Calculate team weakness severity (0-4 scale based on how many are weak)
+% The team is collected once and reused for every attacking type
 team_weak_against(AttackType, Severity) :-
+    findall(P, current_pokemon(P), Team),
+    length(Team, TotalCount),
+    TotalCount > 0,
     important_coverage_type(AttackType),
-    count_team_weak_to(AttackType, WeakCount),
+    aggregate_all(count, (member(P, Team), pokemon_weak_to(P, AttackType)), WeakCount),
     WeakCount > 0,
-    findall(P2, current_pokemon(P2), AllPokemon),
-    length(AllPokemon, TotalCount),
-    TotalCount > 0,
     Severity is (WeakCount / TotalCount) * 4.
 
 % ===== ROLE REQUIREMENTS =====
@@ -271,6 +322,11 @@ team_archetype(hyper_offense) :-
     forall(current_pokemon(P), offensive_pokemon(P)).
 
 % ===== RECOMMENDATIONS =====
+% Deprecated: the server no longer asks Prolog for recommendations. It queries
+% needs_offensive_coverage/1, team_weak_against/2 and needs_role/1 and ranks
+% candidates with rule_engine.rank(). recommend_pokemon/2 and static_recommend/2
+% are kept only as the reference rule_engine.recommend() is checked against
+% (python rule_engine.py --check); do not build new callers on them.
 
 % Helper to check if pokemon provides type coverage
 provides_coverage(Pokemon, Type) :-
@@ -445,6 +501,14 @@ get_pokemon_types(Pokemon, Types) :-
         findall(T, has_type(Pokemon, T), Types)
     ).
 
+% Type of a statically known Pokemon (tabled: derived once, then a table lookup)
+:- table static_type/2.
+static_type(Pokemon, Type) :-
+    pokemon_type(Pokemon, Type, _).
+static_type(Pokemon, Type) :-
+    pokemon_type(Pokemon, _, Type),
+    Type \= none.
+
 % Check if Pokemon has a specific type (static or dynamic)
 pokemon_has_type(Pokemon, Type) :-
     (pokemon_type(Pokemon, Type, _) ; pokemon_type(Pokemon, _, Type), Type \= none).
@@ -497,6 +561,7 @@ pokemon_stats(clodsire, 130, 75, 60, 45, 100, 20).
 pokemon_stats(glimmora, 83, 55, 90, 130, 81, 86).
 
 % Check roles based on static stats
+:- table static_has_role/2.
 static_has_role(Pokemon, physical_sweeper) :-
     pokemon_stats(Pokemon, _, Atk, _, _, _, Spd),
     Atk >= 100,
@@ -564,41 +629,59 @@ static_viable(dondozo).
 static_viable(clodsire).
 static_viable(glimmora).
 
-% Check if already on team (handles different name formats)
-already_on_team(Pokemon) :-
-    current_pokemon(Pokemon).
+% ===== PRECOMPILED INDEXES =====
+% Built once when the file is consulted. Both are indexed on the first
+% argument, so "viable Pokemon of type T" or "with role R" is a direct lookup
+% instead of a scan over every static_viable/1 fact. Entries keep
+% static_viable/1 order, so recommendations come out in the same order.
+:- dynamic type_index/2.
+:- dynamic role_index/2.
+
+build_static_indexes :-
+    retractall(type_index(_, _)),
+    retractall(role_index(_, _)),
+    forall(( static_viable(Pokemon), static_type(Pokemon, Type) ),
+           assertz(type_index(Type, Pokemon))),
+    forall(( static_viable(Pokemon), static_has_role(Pokemon, Role) ),
+           assertz(role_index(Role, Pokemon))).
+
+:- initialization(build_static_indexes).
+
+% Canonical name key: lowercase, '-' and '_' unified (same as Python's normalizer)
+name_key(Name, Key) :-
+    downcase_atom(Name, Lower),
+    atomic_list_concat(Parts, '-', Lower),
+    atomic_list_concat(Parts, '_', Key).
+
+% Check if already on team (exact match on the normalized name)
 already_on_team(Pokemon) :-
-    current_pokemon(Current),
-    atom_string(Pokemon, PStr),
-    atom_string(Current, CStr),
-    sub_string(CStr, _, _, _, PStr).
+    current_pokemon(Pokemon),
+    !.
 already_on_team(Pokemon) :-
+    name_key(Pokemon, Key),
     current_pokemon(Current),
-    atom_string(Pokemon, PStr),
-    atom_string(Current, CStr),
-    sub_string(PStr, _, _, _, CStr).
+    name_key(Current, Key),
+    !.
 
-% Static-based recommendation: Missing type coverage
+% Static-based recommendation (deprecated, see RECOMMENDATIONS above): Missing type coverage
 static_recommend(Pokemon, Explanation) :-
     needs_offensive_coverage(Type),
-    static_viable(Pokemon),
+    type_index(Type, Pokemon),
     \+ already_on_team(Pokemon),
-    pokemon_has_type(Pokemon, Type),
     format(atom(Explanation), 'Provides missing ~w-type coverage', [Type]).
 
 % Static-based recommendation: Missing role
 static_recommend(Pokemon, Explanation) :-
     needs_role(Role),
-    static_viable(Pokemon),
+    role_index(Role, Pokemon),
     \+ already_on_team(Pokemon),
-    static_has_role(Pokemon, Role),
     format(atom(Explanation), 'Fills the missing ~w role', [Role]).
 
 % Static-based recommendation: General good pick
 static_recommend(Pokemon, Explanation) :-
     static_viable(Pokemon),
     \+ already_on_team(Pokemon),
-    pokemon_has_type(Pokemon, Type),
+    static_type(Pokemon, Type),
     important_coverage_type(Type),
     Explanation = 'Strong competitive pick with good type coverage'.
 
@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+import type_chart
+from team_completion import ROLE_NAMES, TEAM_SIZE, species_roles
+
+DEFAULT_TTL = int(os.environ.get("SESSION_TTL", str(30 * 60)))
+DEFAULT_MAX_SESSIONS = int(os.environ.get("SESSION_MAX", "1000"))
+
+
+class SessionError(Exception):
+    """An edit that cannot be applied (team full, member not on the team)"""
+
+
+def _normalize(name):
+    return name.lower().replace("'", "").replace("-", "_").replace(" ", "_").replace(".", "")
+
+
+class MemberDelta:
+    """Everything one member contributes to the team aggregates, computed once"""
+    __slots__ = ('pokemon', 'key', 'types', 'stab', 'weak', 'resist', 'immune', 'roles', 'facts')
+
+    def __init__(self, pokemon):
+        self.pokemon = pokemon
+        self.key = _normalize(pokemon['name'])
+        self.types = list(pokemon.get('types', []))
+        pair = type_chart.type_pair(self.types)
+        self.stab = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+        if pair is None:
+            # Same as team_matchups: members without known types contribute nothing
+            zeros = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+            self.weak = self.resist = self.immune = zeros
+        else:
+            profile = type_chart.DUAL_PROFILES[pair]
+            self.stab[list(set(pair))] = 1
+            self.weak = (profile > 1).astype(np.int16)
+            self.resist = ((profile < 1) & (profile > 0)).astype(np.int16)
+            self.immune = (profile == 0).astype(np.int16)
+        self.roles = species_roles(pokemon.get('stats', {}))
+        # (name, types, [(stat, value)]) as PrologContext.add_member() takes it
+        self.facts = (self.key,
+                      [t.lower().replace('-', '_') for t in self.types],
+                      [(stat.lower().replace('-', '_'), value)
+                       for stat, value in pokemon.get('stats', {}).items()])
+
+
+class TeamSession:
+    """A team edited one member at a time, with aggregates updated by delta"""
+
+    def __init__(self, session_id, context=None):
+        self.id = session_id
+        self.context = context  # PrologContext holding exactly this team's facts, or None
+        self.created_at = self.last_used = time.time()
+        self.version = 0
+        self.lock = threading.RLock()
+        self._members = []
+        self.type_counts = {}
+        self.role_counts = {role: 0 for role in ROLE_NAMES}
+        self.stab_counts = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+        self.weak = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+        self.resist = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+        self.immune = np.zeros(type_chart.NUM_TYPES, dtype=np.int16)
+        self._analysis = None  # (version, analysis)
+
+    @property
+    def members(self):
+        return [m.pokemon for m in self._members]
+
+    def _apply(self, delta, sign):
+        self.stab_counts += sign * delta.stab
+        self.weak += sign * delta.weak
+        self.resist += sign * delta.resist
+        self.immune += sign * delta.immune
+        for t in delta.types:
+            count = self.type_counts.get(t, 0) + sign
+            if count:
+                self.type_counts[t] = count
+            else:
+                del self.type_counts[t]
+        for role in delta.roles:
+            self.role_counts[role] += sign
+        self.version += 1
+
+    def add(self, pokemon):
+        """Add a member; only its facts are asserted in the Prolog context"""
+        if len(self._members) >= TEAM_SIZE:
+            raise SessionError("Team is already full")
+        delta = MemberDelta(pokemon)
+        if self.context is not None:
+            self.context.add_member(delta.facts)
+        self._members.append(delta)
+        self._apply(delta, 1)
+        return delta
+
+    def remove(self, name):
+        """Remove the first member with this name; only its facts are retracted"""
+        key = _normalize(name)
+        for i, delta in enumerate(self._members):
+            if delta.key == key:
+                break
+        else:
+            raise SessionError(f"{name} is not on the team")
+        if self.context is not None:
+            self.context.remove_member(delta.facts)
+        del self._members[i]
+        self._apply(delta, -1)
+        return delta
+
+    def attach_context(self, context):
+        """Give a session created before Prolog was ready its own context, loaded in one call"""
+        context.load_team([m.facts for m in self._members])
+        self.context = context
+
+    def matchups(self):
+        """Same keys team_matchups() computes, read off the running aggregates"""
+        stab = self.stab_counts > 0
+        return {
+            'weak': self.weak,
+            'resist': self.resist,
+            'immune': self.immune,
+            'stab': stab,
+            'coverage': type_chart.SE_MASK[stab].any(axis=0)
+        }
+
+    def cached_analysis(self):
+        if self._analysis is not None and self._analysis[0] == self.version:
+            return self._analysis[1]
+        return None
+
+    def store_analysis(self, analysis):
+        self._analysis = (self.version, analysis)
+
+
+class SessionStore:
+    """Sessions by id, expired after ttl idle seconds and capped at max_sessions (LRU)"""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_sessions=DEFAULT_MAX_SESSIONS, release_context=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.release_context = release_context
+        self._sessions = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _drop(self, session):
+        with session.lock:
+            if session.context is not None and self.release_context is not None:
+                self.release_context(session.context)
+                session.context = None
+
+    def _purge(self, now):
+        dropped = []
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+            dropped.append(session)
+        return dropped
+
+    def create(self, context=None):
+        now = time.time()
+        session = TeamSession(uuid.uuid4().hex, context)
+        with self._lock:
+            dropped = self._purge(now)
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                dropped.append(self._sessions.popitem(last=False)[1])
+                self.evicted += 1
+            self.created += 1
+        for old in dropped:
+            self._drop(old)
+        return session
+
+    def get(self, session_id):
+        """The live session with this id (touching it), or None"""
+        now = time.time()
+        with self._lock:
+            dropped = self._purge(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+        for old in dropped:
+            self._drop(old)
+        return session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._drop(session)
+        return session is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
@@ -0,0 +1,29 @@
+"""/api/bootstrap serves the gzipped bundle only to clients that accept gzip"""
+import gzip
+import json
+
+import pytest
+
+import bootstrap
+import inference_system
+
+
+@pytest.fixture
+def client(monkeypatch):
+    bundle = bootstrap.Bundle({'garchomp': {'types': ['dragon', 'ground'], 'stats': {'speed': 102}}})
+    monkeypatch.setattr(inference_system, 'get_bootstrap_bundle', lambda: bundle)
+    return inference_system.create_app(warm=None).test_client()
+
+
+@pytest.mark.parametrize('accept', ['gzip', 'gzip, deflate', 'deflate;q=1, gzip;q=0.5', '*'])
+def test_gzip_when_accepted(client, accept):
+    response = client.get('/api/bootstrap', headers={'Accept-Encoding': accept})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['names'] == ['garchomp']
+
+
+@pytest.mark.parametrize('accept', ['gzip;q=0', 'identity', ''])
+def test_identity_when_gzip_refused(client, accept):
+    response = client.get('/api/bootstrap', headers={'Accept-Encoding': accept})
+    assert response.headers.get('Content-Encoding') != 'gzip'
+    assert json.loads(response.data)['names'] == ['garchomp']
@@ -0,0 +1,101 @@
+"""rule_engine.rank(): weighted scores, their breakdown, tie order and the k limit"""
+import pytest
+
+import rule_engine
+
+STAT_NAMES = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+
+GARCHOMP = {'name': 'garchomp', 'types': ['dragon', 'ground'],
+            'stats': {'hp': 108, 'attack': 130, 'defense': 95, 'special-attack': 80,
+                      'special-defense': 85, 'speed': 102}}
+
+
+def species(name, types, *stats):
+    return {'name': name, 'types': list(types), 'stats': dict(zip(STAT_NAMES, stats))}
+
+
+def pool(*entries):
+    return rule_engine.build_pool(entries)
+
+
+def test_score_and_breakdown():
+    # Garchomp alone: missing fighting/steel/fairy/fire/water/ice, weak to fairy (4.0),
+    # ice (8.0: both of its types) and dragon (4.0), no special sweeper
+    candidate = species('test-steel-fairy', ['steel', 'fairy'], 80, 60, 100, 120, 100, 100)
+    [result] = rule_engine.rank([GARCHOMP], k=1, pool=pool(candidate))
+
+    assert result['pokemon'] == 'test_steel_fairy'
+    assert result['breakdown'] == {
+        'coverage': 6.0,
+        'weaknesses': 16.0,
+        'roles': 2.0,
+        'bst': round(560 / 600, 3),
+        'types_filled': ['steel', 'fairy'],
+        'weaknesses_resisted': {'fairy': 4.0, 'ice': 8.0, 'dragon': 4.0},
+        'roles_filled': ['special_sweeper'],
+        'base_stat_total': 560
+    }
+    assert result['score'] == round(6.0 + 16.0 + 2.0 + 560 / 600, 3)
+    assert result['explanation'].startswith('Provides missing steel, fairy-type coverage; '
+                                            'Helps resist team weakness to fairy-type attacks (severity: 4.0)')
+    assert result['explanation'].endswith('Fills the missing special_sweeper role')
+
+
+def test_weights():
+    pick = species('pick', ['fire'], 50, 50, 50, 50, 50, 50)
+    [result] = rule_engine.rank([GARCHOMP], k=1, pool=pool(pick))
+    breakdown = result['breakdown']
+    assert breakdown['coverage'] == rule_engine.W_COVERAGE * 1
+    # Fire resists fire, ice and fairy; of Garchomp's weaknesses that is ice (8.0) and fairy (4.0)
+    assert breakdown['weaknesses'] == rule_engine.W_RESIST * 12.0
+    assert breakdown['roles'] == 0
+    assert breakdown['bst'] == rule_engine.W_BST * round(300 / 600, 3)
+
+
+def test_best_first():
+    entries = [
+        species('filler', ['normal'], 50, 50, 50, 50, 50, 50),
+        species('coverage', ['fighting'], 50, 50, 50, 50, 50, 50),
+        species('everything', ['steel', 'fairy'], 80, 60, 100, 120, 100, 100),
+    ]
+    names = [r['pokemon'] for r in rule_engine.rank([GARCHOMP], k=3, pool=pool(*entries))]
+    assert names == ['everything', 'coverage', 'filler']
+
+
+def test_ties_keep_pool_order():
+    entries = [species(name, ['water'], 70, 70, 70, 70, 70, 70) for name in ('zeta', 'alpha', 'mu')]
+    results = rule_engine.rank([GARCHOMP], k=3, pool=pool(*entries))
+    assert [r['pokemon'] for r in results] == ['zeta', 'alpha', 'mu']
+    assert len({r['score'] for r in results}) == 1
+
+
+@pytest.mark.parametrize('k', [0, 1, 3, 10])
+def test_k_limit(k):
+    entries = [species(f'species-{i}', ['water'], 50 + i, 50, 50, 50, 50, 50) for i in range(5)]
+    results = rule_engine.rank([GARCHOMP], k=k, pool=pool(*entries))
+    assert len(results) == min(k, 5)
+    # Higher BST wins among otherwise equal candidates
+    assert [r['pokemon'] for r in results] == [f'species_{i}' for i in range(4, 4 - min(k, 5), -1)]
+
+
+def test_skips_team_members():
+    entries = [GARCHOMP, species('Great Tusk', ['ground', 'fighting'], 115, 131, 131, 53, 53, 87)]
+    team = [GARCHOMP, species('great-tusk', ['ground', 'fighting'], 115, 131, 131, 53, 53, 87)]
+    assert rule_engine.rank(team, k=5, pool=pool(*entries)) == []
+
+
+def test_given_needs_replace_derived_ones():
+    candidate = species('test-steel-fairy', ['steel', 'fairy'], 80, 60, 100, 120, 100, 100)
+    [result] = rule_engine.rank([GARCHOMP], k=1, pool=pool(candidate), needs=([], [], []))
+    assert result['score'] == round(560 / 600, 3)
+    assert result['explanation'] == 'Strong competitive pick (base stat total 560)'
+
+
+def test_default_pool_is_static_viable():
+    rules = rule_engine.load_rule_base()
+    results = rule_engine.rank([GARCHOMP], k=len(rules.viable))
+    names = [r['pokemon'] for r in results]
+    assert 'garchomp' not in names
+    assert set(names) <= set(rules.viable)
+    scores = [r['score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
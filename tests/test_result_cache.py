@@ -0,0 +1,27 @@
+"""AnalysisCache: generation changes drop entries, and results computed across a change are not stored"""
+import result_cache
+
+
+def make_cache():
+    generation = [0]
+    return result_cache.AnalysisCache(lambda: generation[0]), generation
+
+
+def test_generation_change_drops_entries():
+    cache, generation = make_cache()
+    cache.put('team', 'analysis')
+    assert cache.get('team') == 'analysis'
+    generation[0] += 1
+    assert cache.get('team') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_result_from_an_old_generation_is_not_stored():
+    cache, generation = make_cache()
+    started = cache.generation()
+    # The indexes are rebuilt while the analysis runs
+    generation[0] += 1
+    cache.put('team', 'stale analysis', started)
+    assert cache.get('team') is None
+    cache.put('team', 'analysis', cache.generation())
+    assert cache.get('team') == 'analysis'
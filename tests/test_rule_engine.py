@@ -0,0 +1,77 @@
+"""rule_engine against team_rules.pl: native regression fixtures, and a live comparison when SWI-Prolog is installed"""
+import json
+import os
+import shutil
+
+import pytest
+
+import rule_engine
+
+# Native answers for a fixed set of teams, hand-checked against the rules but not
+# produced by SWI-Prolog; test_fixtures_match_prolog compares them when it is installed
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), 'native_answers.json')
+
+
+def _prolog_installed():
+    if shutil.which('swipl') is None:
+        return False
+    try:
+        import pyswip  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+requires_prolog = pytest.mark.skipif(not _prolog_installed(), reason="SWI-Prolog/PySwip not installed")
+
+
+def load_cases():
+    with open(FIXTURES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)['cases']
+
+
+def case_id(case):
+    return '+'.join(member['name'] for member in case['team'])
+
+
+@pytest.mark.parametrize('case', load_cases(), ids=case_id)
+def test_matches_native_regression_fixtures(case):
+    assert rule_engine.native_answers(case['team']) == case['answers']
+
+
+def test_recommend_limit_and_dedup():
+    # Garchomp needs fighting, steel, fairy, ... coverage; a species with two
+    # missing types must still appear once
+    team = [{'name': 'garchomp', 'types': ['dragon', 'ground'],
+             'stats': {'hp': 108, 'attack': 130, 'defense': 95, 'special-attack': 80,
+                       'special-defense': 85, 'speed': 102}}]
+    names = [r['pokemon'] for r in rule_engine.recommend(team, limit=50)]
+    assert len(names) == len(set(names)) > 5
+    assert 'garchomp' not in names
+    assert rule_engine.recommend(team, limit=3) == rule_engine.recommend(team, limit=50)[:3]
+
+
+def test_already_on_team_ignores_dash_spelling():
+    team = [{'name': 'Great-Tusk', 'types': ['ground', 'fighting'], 'stats': {}}]
+    assert all(r['pokemon'] != 'great_tusk' for r in rule_engine.recommend(team, limit=50))
+
+
+def test_empty_team():
+    team = rule_engine.TeamFacts([])
+    rules = rule_engine.load_rule_base()
+    assert rule_engine.needs_offensive_coverage(team) == list(rules.important_types)
+    assert rule_engine.team_weak_against(team) == []
+    assert rule_engine.needs_role(team) == [role for role, _ in rules.required_roles]
+
+
+@requires_prolog
+def test_fixtures_match_prolog():
+    advisor = rule_engine._start_prolog()
+    for case in load_cases():
+        assert rule_engine.prolog_answers(advisor, case['team']) == case['answers'], case_id(case)
+
+
+@requires_prolog
+def test_generated_corpus_matches_prolog():
+    mismatches = rule_engine.check_against_prolog(count=500, seed=0)
+    assert mismatches == [], mismatches[:5]
@@ -0,0 +1,90 @@
+"""SmogonFormats: known-format checks, negative caching of failed loads, and derived() entries"""
+import json
+
+import pytest
+
+import smogon_loader
+
+
+@pytest.fixture
+def formats(tmp_path):
+    created = []
+
+    def factory(fmt):
+        loader = smogon_loader.SmogonDataLoader(snapshot_dir=str(tmp_path), offline=True, format_id=fmt)
+        created.append(loader)
+        return loader
+
+    default = factory('gen9ou')
+    default._publish(smogon_loader._SmogonState({'Garchomp': {'Swords Dance': {}}}))
+    formats = smogon_loader.SmogonFormats(default, factory, failure_ttl=60)
+    formats.created = created
+    return formats
+
+
+def write_snapshot(directory, fmt, sets):
+    with open(directory / f"{fmt}.json", 'w', encoding='utf-8') as f:
+        json.dump(sets, f)
+
+
+def test_loads_from_snapshot(formats, tmp_path):
+    write_snapshot(tmp_path, 'gen9uu', {'Great Tusk': {'Rapid Spin': {}}})
+    loader = formats.get('Gen9 UU')
+    assert loader.format_id == 'gen9uu'
+    assert loader.viable_pokemon == {'Great Tusk'}
+    assert formats.get('gen9uu') is loader
+    assert formats.stats()['hits'] == 1
+
+
+def test_unknown_format_is_rejected_without_loading(formats):
+    with pytest.raises(smogon_loader.UnknownFormat):
+        formats.get('gen9madeuptier')
+    assert formats.stats()['rejected'] == 1
+    assert formats.stats()['failures'] == 0
+
+
+def test_snapshot_makes_a_format_known(formats, tmp_path):
+    write_snapshot(tmp_path, 'gen9customtier', {'Garchomp': {}})
+    assert formats.get('gen9customtier').viable_pokemon == {'Garchomp'}
+
+
+def test_failed_load_is_cached_until_the_ttl(formats, tmp_path, monkeypatch):
+    with pytest.raises(smogon_loader.UnknownFormat):
+        formats.get('gen9ru')
+    loads = len(formats.created)
+    for _ in range(3):
+        with pytest.raises(smogon_loader.UnknownFormat):
+            formats.get('gen9ru')
+    stats = formats.stats()
+    assert stats['failures'] == 1
+    assert stats['rejected'] == 3
+    assert stats['failed_recently'] == ['gen9ru']
+    # Known-format checks build no loader for a format that is already failing
+    assert len(formats.created) == loads
+
+    write_snapshot(tmp_path, 'gen9ru', {'Garchomp': {}})
+    now = smogon_loader.time.time()
+    monkeypatch.setattr(smogon_loader.time, 'time', lambda: now + 61)
+    assert formats.get('gen9ru').viable_pokemon == {'Garchomp'}
+    assert formats.stats()['failed_recently'] == []
+
+
+def test_derived_replaces_older_versions(formats):
+    loader = formats.default
+    builds = []
+
+    def build(version):
+        def run(loader):
+            builds.append(version)
+            return f"pool {version}"
+        return run
+
+    assert loader.derived('pool', 1, build(1)) == 'pool 1'
+    assert loader.derived('pool', 1, build(1)) == 'pool 1'
+    assert loader.derived('pool', 2, build(2)) == 'pool 2'
+    assert builds == [1, 2]
+    assert list(loader._state.derived) == ['pool']
+
+    loader._publish(smogon_loader._SmogonState({'Garchomp': {}}))
+    assert loader.derived('pool', 2, build(2)) == 'pool 2'
+    assert builds == [1, 2, 2]
@@ -0,0 +1,123 @@
+"""SmogonDataLoader: the normalized name index, its atomic swap on refresh, and the species index"""
+import pytest
+
+import smogon_loader
+
+SETS = {
+    'Great Tusk': {'Rapid Spin': {}},
+    'Landorus-Therian': {'Stealth Rock': {}},
+    'Ogerpon-Wellspring': {'Ivy Cudgel': {}},
+    'Ogerpon': {'Swords Dance': {}},
+    'Mr. Mime': {'Nasty Plot': {}},
+}
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = smogon_loader.SmogonDataLoader(snapshot_dir=str(tmp_path), offline=True)
+    loader._publish(smogon_loader._SmogonState(SETS))
+    return loader
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Great Tusk', 'Great Tusk'),
+    ('great-tusk', 'Great Tusk'),
+    ('great_tusk', 'Great Tusk'),
+    ('landorus-therian', 'Landorus-Therian'),
+    ('landorus', 'Landorus-Therian'),
+    ('mr-mime', 'Mr. Mime'),
+    # An exact name is never shadowed by another form's base species
+    ('ogerpon', 'Ogerpon'),
+    ('ogerpon-wellspring', 'Ogerpon-Wellspring'),
+])
+def test_find_smogon_name(loader, name, expected):
+    assert loader.find_smogon_name(name) == expected
+    assert loader.is_viable(name)
+
+
+@pytest.mark.parametrize('name', ['garchomp', 'great', 'tusk', ''])
+def test_unknown_names(loader, name):
+    assert loader.find_smogon_name(name) is None
+    assert not loader.is_viable(name)
+
+
+def test_index_is_swapped_with_the_data(loader):
+    state = loader._state
+    version = loader.version
+    loader._publish(smogon_loader._SmogonState({'Garchomp': {}}))
+    assert loader.version > version
+    assert loader.is_viable('garchomp')
+    assert not loader.is_viable('great-tusk')
+    # A reader holding the old state still sees a consistent old index
+    assert state.name_index[smogon_loader.normalize_smogon_name('Great Tusk')] == 'Great Tusk'
+
+
+SPECIES = {
+    'Great Tusk': {'types': ['ground', 'fighting'],
+                   'stats': {'hp': 115, 'attack': 131, 'defense': 131, 'special-attack': 53,
+                             'special-defense': 53, 'speed': 87}},
+    'Landorus-Therian': {'types': ['ground', 'flying'],
+                         'stats': {'hp': 89, 'attack': 145, 'defense': 90, 'special-attack': 105,
+                                   'special-defense': 80, 'speed': 91}},
+    'Mr. Mime': {'types': ['psychic', 'fairy'],
+                 'stats': {'hp': 40, 'attack': 45, 'defense': 65, 'special-attack': 100,
+                           'special-defense': 120, 'speed': 90}},
+}
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    species = dict(SPECIES)
+    version = [0]
+    loader = smogon_loader.SmogonDataLoader(snapshot_dir=str(tmp_path), offline=True,
+                                            species_lookup=species.get, species_version=lambda: version[0])
+    loader._publish(smogon_loader._SmogonState(SETS))
+    return loader, species, version
+
+
+def test_viable_recommendations_filter_on_types_and_roles(indexed):
+    loader, _, _ = indexed
+    assert loader.get_viable_recommendations(['ground']) == ['Great Tusk', 'Landorus-Therian']
+    assert loader.get_viable_recommendations(['ground', 'flying']) == ['Landorus-Therian', 'Great Tusk']
+    assert loader.get_viable_recommendations(['ground'], ['special_sweeper']) == ['Landorus-Therian']
+    assert loader.get_viable_recommendations(['fairy'], ['physical_sweeper']) == []
+    # Species without data are in neither index
+    assert loader.get_viable_recommendations(['grass']) == []
+    assert loader.get_viable_recommendations(missing_roles=['tank']) == ['Great Tusk']
+    assert loader.get_viable_recommendations(['ground'], limit=1) == ['Great Tusk']
+
+
+def test_set_name_roles_are_aliases(indexed):
+    loader, _, _ = indexed
+    assert (loader.get_viable_recommendations(['ground'], ['sweeper'])
+            == loader.get_viable_recommendations(['ground'], ['physical_sweeper', 'special_sweeper']))
+
+
+def test_index_is_rebuilt_when_species_data_changes(indexed):
+    loader, species, version = indexed
+    index = loader.species_index()
+    assert loader.species_index() is index
+    species['Ogerpon'] = {'types': ['grass'], 'stats': {'attack': 120, 'speed': 110}}
+    assert loader.get_viable_recommendations(['grass']) == []
+    version[0] += 1
+    assert loader.species_index() is not index
+    assert loader.get_viable_recommendations(['grass']) == ['Ogerpon']
+
+
+def test_index_is_rebuilt_with_the_sets(indexed):
+    loader, _, _ = indexed
+    index = loader.species_index()
+    loader._publish(smogon_loader._SmogonState({'Great Tusk': {}}))
+    assert loader.species_index() is not index
+    assert loader.get_viable_recommendations(['ground']) == ['Great Tusk']
+
+
+def test_set_roles_and_info(loader):
+    assert loader.get_pokemon_roles('great-tusk') == ['balanced']
+    assert loader.get_pokemon_roles('Ogerpon') == ['setup_sweeper']
+    assert loader.get_pokemon_roles('Mr. Mime') == ['setup_sweeper']
+    info = loader.get_pokemon_set_info('Ogerpon')
+    assert info['num_sets'] == 1
+    assert info['roles'] == ['setup_sweeper']
+    assert set(info['sets']) == {'Swords Dance'}
+    assert loader.get_pokemon_set_info('garchomp') is None
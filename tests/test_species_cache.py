@@ -0,0 +1,174 @@
+"""SpeciesCache against a local PokeAPI stub: coalescing, retries and the fetch cap"""
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+import species_cache
+
+
+class StubPokeAPI(http.server.ThreadingHTTPServer):
+    """Serves /pokemon/<slug>; statuses[slug] lists the status of each successive request"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.statuses = {}
+        self.delay = 0.0
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def next_status(self, slug):
+        with self.lock:
+            count = self.requests.get(slug, 0)
+            self.requests[slug] = count + 1
+            statuses = self.statuses.get(slug, [200])
+            return statuses[min(count, len(statuses) - 1)]
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        slug = self.path.rsplit('/', 1)[-1]
+        status = server.next_status(slug)
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        body = b'{}'
+        if status == 200:
+            body = json.dumps({
+                'name': slug,
+                'types': [{'type': {'name': 'normal'}}],
+                'stats': [{'stat': {'name': 'hp'}, 'base_stat': 100}]
+            }).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubPokeAPI()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_cache(stub, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return species_cache.SpeciesCache(snapshot_path=None, offline=False, base_url=stub.base_url,
+                                      timeout=5, **kwargs)
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_parses_species(stub):
+    cache = make_cache(stub)
+    assert cache.get('Great Tusk') == {'name': 'great-tusk', 'types': ['normal'], 'stats': {'hp': 100}}
+    assert cache.get('great_tusk')['name'] == 'great-tusk'
+    assert stub.requests == {'great-tusk': 1}
+
+
+def test_concurrent_misses_share_one_fetch(stub):
+    stub.delay = 0.3
+    cache = make_cache(stub)
+    results = run_threads(4, lambda i: cache.get('garchomp'))
+    assert all(r is not None and r['name'] == 'garchomp' for r in results)
+    assert stub.requests == {'garchomp': 1}
+    assert cache.stats()['coalesced'] == 3
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retries_with_backoff(stub, status):
+    stub.statuses['garchomp'] = [status, status, 200]
+    cache = make_cache(stub, retries=2, backoff=0.05)
+    started = time.perf_counter()
+    assert cache.get('garchomp')['name'] == 'garchomp'
+    # Two sleeps: backoff, then backoff * 2
+    assert time.perf_counter() - started >= 0.15
+    assert stub.requests == {'garchomp': 3}
+    stats = cache.stats()
+    assert stats['retried'] == 2
+    assert stats['upstream_errors'] == 0
+
+
+def test_gives_up_after_retries(stub):
+    stub.statuses['garchomp'] = [503]
+    cache = make_cache(stub, retries=2)
+    assert cache.get('garchomp') is None
+    assert stub.requests == {'garchomp': 3}
+    assert cache.stats()['upstream_errors'] == 1
+    assert 'garchomp' not in cache
+
+
+def test_not_found_is_not_retried(stub):
+    stub.statuses['missingno'] = [404]
+    cache = make_cache(stub, retries=2)
+    assert cache.get('missingno') is None
+    assert stub.requests == {'missingno': 1}
+    stats = cache.stats()
+    assert stats['retried'] == 0
+    assert stats['upstream_errors'] == 0
+
+
+def test_client_error_is_not_retried(stub):
+    stub.statuses['garchomp'] = [400]
+    cache = make_cache(stub, retries=2)
+    assert cache.get('garchomp') is None
+    assert stub.requests == {'garchomp': 1}
+    assert cache.stats()['upstream_errors'] == 1
+
+
+def test_fetches_are_capped_at_concurrency(stub):
+    stub.delay = 0.1
+    cache = make_cache(stub, concurrency=2)
+    names = [f"species-{i}" for i in range(8)]
+    results = run_threads(len(names), lambda i: cache.get(names[i]))
+    assert all(r is not None for r in results)
+    assert len(stub.requests) == len(names)
+    assert stub.max_in_flight == 2
+
+
+def test_get_many_keeps_order(stub):
+    stub.delay = 0.05
+    cache = make_cache(stub, concurrency=3)
+    names = ['garchomp', 'great-tusk', 'kingambit', 'gholdengo']
+    assert [r['name'] for r in cache.get_many(names)] == names
+    assert stub.max_in_flight <= 3
+    assert [r['name'] for r in cache.get_many(names)] == names
+    assert sum(stub.requests.values()) == len(names)
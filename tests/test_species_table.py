@@ -0,0 +1,72 @@
+"""open_table: old tables are removed only when unused, and a table pruned mid-open is written again"""
+import os
+
+import pytest
+
+import species_table
+
+pytestmark = pytest.mark.skipif(species_table.fcntl is None, reason="needs fcntl locks")
+
+SPECIES = {'garchomp': {'types': ['dragon', 'ground'],
+                        'stats': {'hp': 108, 'attack': 130, 'defense': 95, 'special-attack': 80,
+                                  'special-defense': 85, 'speed': 102}}}
+NEWER = dict(SPECIES, pikachu={'types': ['electric'], 'stats': {'hp': 35, 'speed': 90}})
+
+
+def age(path, seconds=60):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_unused_older_table_is_removed(tmp_path):
+    path = str(tmp_path / 'species_table.bin')
+    old = species_table.open_table(SPECIES, path=path)
+    old.close()
+    age(old.path)
+    new = species_table.open_table(NEWER, path=path)
+    assert not os.path.exists(old.path)
+    assert os.path.exists(new.path)
+    new.close()
+
+
+def test_table_in_use_is_kept(tmp_path):
+    path = str(tmp_path / 'species_table.bin')
+    old = species_table.open_table(SPECIES, path=path)
+    age(old.path)
+    new = species_table.open_table(NEWER, path=path)
+    assert os.path.exists(old.path)
+    assert old.get('garchomp').types == ['dragon', 'ground']
+    old.close()
+    new.close()
+
+
+def test_newer_table_is_kept(tmp_path):
+    path = str(tmp_path / 'species_table.bin')
+    current = species_table.open_table(SPECIES, path=path)
+    age(current.path)
+    newer = species_table.open_table(NEWER, path=path)
+    newer.close()
+    # A worker still on the old data must not remove another worker's newer table
+    species_table.open_table(SPECIES, path=path).close()
+    assert os.path.exists(newer.path)
+    current.close()
+
+
+def test_table_removed_while_opening_is_rewritten(tmp_path, monkeypatch):
+    path = str(tmp_path / 'species_table.bin')
+    species_table.open_table(SPECIES, path=path).close()
+    read_digest = species_table.read_digest
+    calls = []
+
+    def pruned_after_check(table):
+        digest = read_digest(table)
+        if not calls:
+            os.remove(table)
+        calls.append(table)
+        return digest
+
+    monkeypatch.setattr(species_table, 'read_digest', pruned_after_check)
+    table = species_table.open_table(SPECIES, path=path)
+    assert len(calls) == 2
+    assert table.get('garchomp') is not None
+    table.close()
@@ -0,0 +1,42 @@
+"""type_chart is built from team_rules.pl's type facts, the one copy of the chart"""
+import pytest
+
+import bootstrap
+import rule_engine
+import static_species
+import type_chart
+
+
+@pytest.mark.parametrize('attack, defense, mult', [
+    ('fire', 'grass', 2), ('water', 'fire', 2), ('fire', 'water', 0.5),
+    ('normal', 'ghost', 0), ('ghost', 'normal', 0), ('ground', 'flying', 0),
+    ('dragon', 'fairy', 0), ('fighting', 'fairy', 0.5), ('normal', 'normal', 1),
+])
+def test_known_matchups(attack, defense, mult):
+    assert type_chart.CHART[type_chart.TYPE_INDEX[attack], type_chart.TYPE_INDEX[defense]] == mult
+
+
+def test_every_type_has_facts():
+    assert set(static_species.load_type_matchups()) == set(type_chart.TYPES)
+
+
+def test_rule_engine_reads_the_same_relations():
+    rules = rule_engine.load_rule_base()
+    for a, attack in enumerate(type_chart.TYPES):
+        assert rules.super_effective.get(attack, frozenset()) == {
+            type_chart.TYPES[d] for d in range(type_chart.NUM_TYPES) if type_chart.CHART[a, d] > 1}
+    for d, defense in enumerate(type_chart.TYPES):
+        assert rules.resisted.get(defense, frozenset()) == {
+            type_chart.TYPES[a] for a in range(type_chart.NUM_TYPES) if type_chart.CHART[a, d] < 1}
+
+
+def test_types_js_gets_this_chart():
+    chart = bootstrap.type_chart_dict()
+    assert chart == static_species.load_type_matchups()
+
+
+def test_conflicting_facts_are_rejected(tmp_path):
+    rules = tmp_path / 'team_rules.pl'
+    rules.write_text("super_effective(fire, grass).\nresists(grass, fire).\n")
+    with pytest.raises(ValueError):
+        static_species.load_type_matchups(str(rules))
@@ -0,0 +1,48 @@
+"""Requests during warm-up take the fallback path instead of building the table and pools"""
+import threading
+
+import pytest
+
+import inference_system
+
+TEAM = [{'name': 'pikachu', 'types': ['electric'],
+         'stats': {'hp': 35, 'attack': 55, 'defense': 40, 'special-attack': 50,
+                   'special-defense': 50, 'speed': 90}}]
+
+
+@pytest.fixture
+def warming(monkeypatch):
+    monkeypatch.setattr(inference_system, '_warm_up_thread', threading.current_thread())
+    monkeypatch.setattr(inference_system, '_ready', threading.Event())
+    monkeypatch.setattr(inference_system, '_pool_key', lambda: (1, 1))
+    for name in ('_species_table', '_completion_pool', '_recommendation_pool', '_species_index'):
+        monkeypatch.setattr(inference_system, name, None)
+        monkeypatch.setattr(inference_system, f'{name}_key', None)
+
+    def unexpected(*args):
+        raise AssertionError("built on the request path during warm-up")
+    monkeypatch.setattr(inference_system, 'candidate_species', unexpected)
+    monkeypatch.setattr(inference_system, 'known_species', unexpected)
+
+
+def test_getters_leave_the_build_to_warm_up(warming):
+    assert inference_system.warm_up_pending()
+    assert inference_system.get_species_table() is None
+    assert inference_system.get_completion_pool() is None
+    assert inference_system.get_recommendation_pool() is None
+
+
+def test_recommendations_use_the_fallback(warming):
+    advisor = inference_system.PokemonTeamAdvisor()
+    recommendations = advisor.prolog_recommendations(TEAM)
+    assert recommendations == advisor.fallback_recommendations(TEAM)
+    assert recommendations
+
+
+def test_warm_up_thread_builds(warming, monkeypatch):
+    monkeypatch.setattr(inference_system, 'candidate_species', lambda: [])
+    inference_system._index_builder.active = True
+    try:
+        assert inference_system.get_completion_pool() is not None
+    finally:
+        inference_system._index_builder.active = False
@@ -0,0 +1,102 @@
+import numpy as np
+
+from static_species import load_type_matchups
+
+# Canonical type order; every vector in this module is indexed this way
+TYPES = (
+    'normal', 'fire', 'water', 'electric', 'grass', 'ice',
+    'fighting', 'poison', 'ground', 'flying', 'psychic', 'bug',
+    'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy'
+)
+TYPE_INDEX = {t: i for i, t in enumerate(TYPES)}
+NUM_TYPES = len(TYPES)
+
+# Non-neutral matchups: attacking type -> {defending type: multiplier}, from the
+# type facts in team_rules.pl so the Prolog rules and this chart cannot drift apart
+_MATCHUPS = load_type_matchups()
+
+
+def _build_chart():
+    """Build the 18x18 effectiveness matrix, CHART[attack, defense]"""
+    chart = np.ones((NUM_TYPES, NUM_TYPES), dtype=np.float32)
+    for attack, row in _MATCHUPS.items():
+        for defense, mult in row.items():
+            chart[TYPE_INDEX[attack], TYPE_INDEX[defense]] = mult
+    chart.setflags(write=False)
+    return chart
+
+
+CHART = _build_chart()
+
+# DUAL_PROFILES[t1, t2] is the defensive multiplier vector (by attacking type)
+# for a t1/t2 Pokemon; the diagonal DUAL_PROFILES[t, t] is the mono-type profile.
+DUAL_PROFILES = CHART.T[:, None, :] * CHART.T[None, :, :]
+_diag = np.arange(NUM_TYPES)
+DUAL_PROFILES[_diag, _diag] = CHART.T
+DUAL_PROFILES.setflags(write=False)
+
+# Offensive reach of a single type: SE_MASK[attack, defense] is True when super effective
+SE_MASK = CHART > 1
+SE_MASK.setflags(write=False)
+
+
+def normalize_type(type_name):
+    """Map PokeAPI ('fire') or Prolog-style type names to the canonical form"""
+    return type_name.strip().lower().replace('_', '-')
+
+
+def type_pair(types):
+    """Return the (t1, t2) index pair for a list of 1-2 type names, or None"""
+    idx = [TYPE_INDEX[t] for t in (normalize_type(t) for t in types) if t in TYPE_INDEX]
+    if not idx:
+        return None
+    return (idx[0], idx[1] if len(idx) > 1 else idx[0])
+
+
+def team_type_pairs(team_data):
+    """Type index pairs for every member with known types, as two index arrays"""
+    pairs = [p for p in (type_pair(m.get('types', [])) for m in team_data) if p is not None]
+    if not pairs:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+    arr = np.asarray(pairs, dtype=np.intp)
+    return arr[:, 0], arr[:, 1]
+
+
+def defensive_profile(types):
+    """Multiplier taken from each attacking type by a Pokemon with these types"""
+    pair = type_pair(types)
+    if pair is None:
+        return np.ones(NUM_TYPES, dtype=np.float32)
+    return DUAL_PROFILES[pair]
+
+
+def team_matchups(team_data):
+    """Whole-team weakness, resistance, immunity and STAB coverage vectors"""
+    first, second = team_type_pairs(team_data)
+    profiles = DUAL_PROFILES[first, second]  # (members, attacking types)
+    stab = np.zeros(NUM_TYPES, dtype=bool)
+    stab[first] = True
+    stab[second] = True
+    return {
+        'profiles': profiles,
+        'weak': (profiles > 1).sum(axis=0),
+        'resist': ((profiles < 1) & (profiles > 0)).sum(axis=0),
+        'immune': (profiles == 0).sum(axis=0),
+        'stab': stab,
+        'coverage': SE_MASK[stab].any(axis=0)
+    }
+
+
+def vector_to_dict(vector, nonzero_only=True):
+    """Turn a per-type vector into a {type: value} dict for JSON responses"""
+    return {TYPES[i]: v.item() for i, v in enumerate(vector) if v or not nonzero_only}
+
+
+def major_weaknesses(matchups, limit=3):
+    """Attacking types the team is most exposed to, worst first"""
+    weak = matchups['weak']
+    covered = matchups['resist'] + matchups['immune']
+    # Exposure counts weak members, tie-broken by how few members can switch in
+    order = np.lexsort((covered, -weak))
+    return [TYPES[i] for i in order[:limit] if weak[i] > 0]
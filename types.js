@@ -4,8 +4,34 @@
 
 // Fetch all types' damage relations
 let typeDictionary = new Object;
+let bootstrapPromise = null;
+
+// Type chart, species names and compact types/stats in one cached request (shared with pokemon.js)
+function loadBootstrap() {
+    if (!bootstrapPromise) {
+        bootstrapPromise = fetch('http://127.0.0.1:5000/api/bootstrap')
+            .then(res => {
+                if (!res.ok) {
+                    throw new Error(`Bootstrap request failed: ${res.status}`);
+                }
+                return res.json();
+            });
+    }
+    return bootstrapPromise;
+}
 
 async function populateTypeDictionary() {
+    try {
+        const data = await loadBootstrap();
+        typeDictionary = data["type_chart"];
+    } catch (error) {
+        // Server not running: build the chart from PokeAPI instead
+        console.error('Failed to load bootstrap bundle:', error);
+        await populateTypeDictionaryFromPokeAPI();
+    }
+}
+
+async function populateTypeDictionaryFromPokeAPI() {
     // Fetch all types
     const res = await fetch(`https://pokeapi.co/api/v2/type/`);
     const data = await res.json();